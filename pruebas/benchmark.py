@@ -0,0 +1,217 @@
+# Archivo: pruebas/benchmark.py
+
+# Benchmark de lectores y escritor sobre un corpus sintético.
+#
+# Mide, para LectorPBTD01_v2, LectorPBTD03_v2 y EscritorPBTD01_v2:
+#   - el tiempo de la carga, de cada sección (_parsear_* / _escribir_*) y del
+#     guardado, con los eventos de pypbtdcev.instrumentacion, y el total por archivo,
+#   - los archivos por segundo,
+#   - la memoria pico (tracemalloc) de procesar un archivo.
+# Compara con una línea base guardada y termina con código 1 si alguna
+# métrica empeora más allá de la tolerancia.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m pruebas.benchmark                  # compara con la base
+#   python -m pruebas.benchmark --guardar-base   # guarda la medición como base
+#   python -m pruebas.benchmark --ci             # sin base, termina con código 2
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pypbtdcev.escritor import EscritorPBTD01_v2
+from pypbtdcev.instrumentacion import RegistroTiempos, observar
+from pypbtdcev.lector import LectorPBTD01_v2, LectorPBTD03_v2
+
+from .corpus_sintetico import generar_corpus
+
+RUTA_BASE = os.path.join(os.path.dirname(__file__), 'benchmark_base.json')
+DIRECTORIO_CORPUS = os.path.join(tempfile.gettempdir(), 'pypbtdcev_corpus')
+
+
+# ---------------------------------
+# --- Medición por sección ---
+# ---------------------------------
+
+def _acumular(secciones, tiempos, total, resto):
+    """Suma las secciones medidas y atribuye el tiempo restante a `resto`."""
+    tiempos = dict(tiempos.totales)
+    tiempos[resto] = total - sum(tiempos.values())
+    for clave, t in tiempos.items():
+        secciones.setdefault(clave, []).append(t)
+
+
+# -----------------
+# --- Escenarios ---
+# -----------------
+
+def _medir_lectura(clase, rutas, repeticiones):
+    secciones = {}
+    totales = []
+    for _ in range(repeticiones):
+        for ruta in rutas:
+            with observar(RegistroTiempos()) as tiempos:
+                inicio = time.perf_counter()
+                lector = clase(ruta)
+                total = time.perf_counter() - inicio
+            if not lector.datos_extraidos:
+                raise RuntimeError(f"No se pudo leer '{ruta}'.")
+            totales.append(total)
+            _acumular(secciones, tiempos, total, 'otros')
+    return secciones, totales
+
+
+def _medir_escritura(rutas_01, repeticiones, directorio_salida):
+    datos = [LectorPBTD01_v2(r).datos_extraidos for r in rutas_01]
+    secciones = {}
+    totales = []
+    salida = os.path.join(directorio_salida, 'salida_benchmark.xlsx')
+    escritor = EscritorPBTD01_v2()
+    for _ in range(repeticiones):
+        for i, ruta_plantilla in enumerate(rutas_01):
+            # Se escriben los datos de otra planilla sobre esta, como al clonar
+            origen = datos[(i + 1) % len(datos)]
+            with observar(RegistroTiempos()) as tiempos:
+                inicio = time.perf_counter()
+                escritor.crear_nueva_planilla(ruta_plantilla, salida, origen)
+                total = time.perf_counter() - inicio
+            totales.append(total)
+            _acumular(secciones, tiempos, total, 'otros')
+    return secciones, totales
+
+
+def _memoria_pico(funcion, *args):
+    tracemalloc.start()
+    try:
+        funcion(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def ejecutar(n_archivos=3, repeticiones=2, directorio_corpus=DIRECTORIO_CORPUS):
+    """Ejecuta todos los escenarios y devuelve {métrica: valor}."""
+    print(f"Preparando corpus sintético en '{directorio_corpus}'...")
+    corpus = generar_corpus(directorio_corpus, n_archivos)
+
+    metricas = {}
+    # Las planillas escritas van a un directorio temporal, no al corpus
+    with tempfile.TemporaryDirectory(prefix='pypbtdcev_benchmark_') as directorio_salida:
+        escenarios = {
+            'lectura_01': lambda: _medir_lectura(LectorPBTD01_v2, corpus['01'], repeticiones),
+            'lectura_03': lambda: _medir_lectura(LectorPBTD03_v2, corpus['03'], repeticiones),
+            'escritura_01': lambda: _medir_escritura(corpus['01'], repeticiones, directorio_salida)
+        }
+        for escenario, medir in escenarios.items():
+            print(f" -> {escenario}...")
+            secciones, totales = medir()
+            for clave, valores in secciones.items():
+                metricas[f'{escenario}.{clave}.s'] = statistics.median(valores)
+            metricas[f'{escenario}.total.s'] = statistics.median(totales)
+            metricas[f'{escenario}.archivos_por_s'] = len(totales) / sum(totales)
+
+        salida = os.path.join(directorio_salida, 'salida_memoria.xlsx')
+        metricas['lectura_01.memoria_pico.bytes'] = _memoria_pico(LectorPBTD01_v2, corpus['01'][0])
+        metricas['lectura_03.memoria_pico.bytes'] = _memoria_pico(LectorPBTD03_v2, corpus['03'][0])
+        datos = LectorPBTD01_v2(corpus['01'][0]).datos_extraidos
+        metricas['escritura_01.memoria_pico.bytes'] = _memoria_pico(
+            EscritorPBTD01_v2().crear_nueva_planilla, corpus['01'][0], salida, datos)
+    return metricas
+
+
+# ---------------------------
+# --- Comparación con base ---
+# ---------------------------
+
+def comparar(metricas, base, tolerancia, minimo_s=0.005):
+    """
+    Devuelve la lista de regresiones. Los tiempos y la memoria empeoran al
+    subir; los archivos por segundo, al bajar. Las diferencias de tiempo
+    menores que `minimo_s` se consideran ruido (secciones de microsegundos).
+    """
+    regresiones = []
+    for clave, valor_base in base.items():
+        if clave not in metricas or not valor_base:
+            continue
+        valor = metricas[clave]
+        if clave.endswith('archivos_por_s'):
+            empeora = valor < valor_base / (1 + tolerancia)
+        elif clave.endswith('.s'):
+            empeora = valor > valor_base * (1 + tolerancia) and valor - valor_base > minimo_s
+        else:
+            empeora = valor > valor_base * (1 + tolerancia)
+        if empeora:
+            regresiones.append((clave, valor_base, valor))
+    return regresiones
+
+
+def _formato(clave, valor):
+    if clave.endswith('.bytes'):
+        return f'{valor / 1024 ** 2:10.2f} MB'
+    if clave.endswith('.s'):
+        return f'{valor * 1000:10.1f} ms'
+    return f'{valor:10.2f} /s'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de lectores y escritor PBTD.')
+    parser.add_argument('--archivos', type=int, default=3,
+                        help='Planillas sintéticas de cada tipo (por defecto 3).')
+    parser.add_argument('--repeticiones', type=int, default=2)
+    parser.add_argument('--corpus', default=DIRECTORIO_CORPUS,
+                        help='Directorio del corpus (se reutiliza entre ejecuciones).')
+    parser.add_argument('--base', default=RUTA_BASE, help='Archivo JSON con la línea base.')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Empeoramiento relativo admitido (por defecto 0.25 = 25%%).')
+    parser.add_argument('--minimo-ms', type=float, default=5.0,
+                        help='Diferencia de tiempo mínima para contar como regresión (ms).')
+    parser.add_argument('--guardar-base', action='store_true',
+                        help='Guarda esta medición como nueva línea base.')
+    parser.add_argument('--ci', action='store_true', default=bool(os.environ.get('CI')),
+                        help='Falla (código 2) si no hay línea base. Activo si existe la '
+                             'variable de entorno CI.')
+    args = parser.parse_args(argv)
+
+    metricas = ejecutar(args.archivos, args.repeticiones, args.corpus)
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)
+
+    print("\n--- RESULTADOS ---")
+    for clave in sorted(metricas):
+        referencia = f"  (base {_formato(clave, base[clave]).strip()})" if clave in base else ''
+        print(f"{clave:66s} {_formato(clave, metricas[clave])}{referencia}")
+
+    if args.guardar_base:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(metricas, f, indent=2, sort_keys=True)
+        print(f"\n✅ Línea base guardada en '{args.base}'.")
+        return 0
+
+    if not base:
+        if args.ci:
+            print(f"\n❌ No hay línea base en '{args.base}'; no se puede comparar.")
+            return 2
+        print(f"\n⚠️ ADVERTENCIA: No hay línea base en '{args.base}'. "
+              "Ejecute con --guardar-base para crearla.")
+        return 0
+
+    regresiones = comparar(metricas, base, args.tolerancia, args.minimo_ms / 1000)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} métrica(s) empeoraron más de {args.tolerancia:.0%}:")
+        for clave, valor_base, valor in regresiones:
+            print(f"    {clave}: {_formato(clave, valor_base).strip()} -> {_formato(clave, valor).strip()}")
+        return 1
+    print("\n✅ Sin regresiones respecto de la línea base.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
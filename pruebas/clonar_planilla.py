@@ -3,6 +3,7 @@
 # Importamos las clases desde nuestro paquete pypbtdcev
 from pypbtdcev.lector import LectorPBTD01_v2
 from pypbtdcev.escritor import EscritorPBTD01_v2
+from pypbtdcev.instrumentacion import mostrar_progreso
 
 
 def main():
@@ -26,6 +27,9 @@ def main():
     # Nombre del nuevo archivo que se va a crear con los datos clonados
     archivo_clonado_salida = 'planilla_clonada.xlsm'
 
+    # Mostrar en consola el progreso de lector y escritor
+    mostrar_progreso()
+
     print("--- INICIANDO PROCESO DE CLONACIÓN DE DATOS ---")
 
     # --- PASO 1: LEER ---
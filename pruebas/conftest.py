@@ -0,0 +1,61 @@
+# Archivo: pruebas/conftest.py
+
+# Datos compartidos por las pruebas: planillas del corpus sintético
+# (corpus_sintetico.py), generadas y leídas una sola vez por sesión.
+#
+#   python -m pytest
+
+import copy
+
+import pytest
+
+from pypbtdcev.lector import LectorPBTD01_v2, LectorPBTD03_v2
+
+from .corpus_sintetico import generar_pbtd01, generar_pbtd03
+
+N_PLANILLAS_01 = 4
+
+
+@pytest.fixture(scope='session')
+def directorio_corpus(tmp_path_factory):
+    return tmp_path_factory.mktemp('corpus')
+
+
+@pytest.fixture(scope='session')
+def rutas_pbtd01(directorio_corpus):
+    rutas = []
+    for semilla in range(N_PLANILLAS_01):
+        ruta = str(directorio_corpus / f'pbtd01_{semilla}.xlsx')
+        rutas.append(generar_pbtd01(ruta, semilla=semilla))
+    return rutas
+
+
+@pytest.fixture(scope='session')
+def _planillas_01(rutas_pbtd01):
+    return {f'v{i}': LectorPBTD01_v2(ruta).datos_extraidos
+            for i, ruta in enumerate(rutas_pbtd01)}
+
+
+@pytest.fixture
+def planillas_01(_planillas_01):
+    """{id_vivienda: datos_extraidos} de PBTD01; cada prueba recibe su propia copia."""
+    return copy.deepcopy(_planillas_01)
+
+
+@pytest.fixture(scope='session')
+def ruta_pbtd03(directorio_corpus):
+    ruta = str(directorio_corpus / 'pbtd03_0.xlsm')
+    generar_pbtd03(ruta, semilla=0)
+    return ruta
+
+
+@pytest.fixture(scope='session')
+def datos_pbtd03(ruta_pbtd03):
+    """`datos_extraidos` de PBTD03 con 'Resultados' como lista de diccionarios; no modificar."""
+    return LectorPBTD03_v2(ruta_pbtd03).datos_extraidos
+
+
+@pytest.fixture(scope='session')
+def datos_pbtd03_arreglo(ruta_pbtd03):
+    """Igual que `datos_pbtd03`, con 'Resultados' en forma de arreglos; no modificar."""
+    return LectorPBTD03_v2(ruta_pbtd03, resultados_como_arreglo=True).datos_extraidos
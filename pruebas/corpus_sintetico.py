@@ -0,0 +1,257 @@
+# Archivo: pruebas/corpus_sintetico.py
+
+# Genera planillas PBTD01 y PBTD03 llenas con datos aleatorios pero válidos,
+# en las mismas celdas que leen LectorPBTD01_v2 y LectorPBTD03_v2.
+#
+# - PBTD03: se parte de la plantilla incluida en el paquete y se llenan las
+#   hojas 'CEV-CEVE' y 'Resultados' (el 'Resumen' son fórmulas de Excel).
+# - PBTD01: el repositorio no incluye la plantilla 01, así que se arma un libro
+#   con las hojas 'CEV-CEVE' y '3. Tablas Envolvente' en las coordenadas que
+#   usan el lector y el escritor.
+
+import os
+import random
+
+import openpyxl
+
+RUTA_PLANTILLA_03 = os.path.join(
+    os.path.dirname(__file__), '..', 'src', 'pypbtdcev', 'plantillas',
+    '03.-PBTD-Datos-de-Equipos-y-Resultados-v2.2.xlsm')
+
+REGIONES = {
+    'Metropolitana': ['Santiago', 'Maipú', 'Puente Alto', 'Ñuñoa'],
+    'Biobío': ['Concepción', 'Los Ángeles', 'Talcahuano'],
+    'Araucanía': ['Temuco', 'Villarrica', 'Angol'],
+    'Los Lagos': ['Puerto Montt', 'Osorno', 'Castro']
+}
+ZONAS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I']
+ORIENTACIONES = ['N', 'NE', 'E', 'SE', 'S', 'SO', 'O', 'NO']
+POSICIONES_AISLACION = ['Exterior', 'Interior', 'Intermedia']
+DENSIDADES = ['Liviano', 'Medio', 'Pesado']
+TIPOS_VENTANA = ['V1', 'V2', 'V3']
+TIPOS_MARCO = ['Aluminio', 'PVC', 'Madera']
+CASOS = [
+    'Caso Propuesto Con Clima', 'Caso Base 0° Con Clima', 'Caso Base 90° Con Clima',
+    'Caso Base 180° Con Clima', 'Caso Base 270° Con Clima',
+    'Caso Propuesto Sin Clima', 'Caso Base 0° Sin Clima', 'Caso Base 90° Sin Clima',
+    'Caso Base 180° Sin Clima', 'Caso Base 270° Sin Clima'
+]
+MESES = 12
+
+# Anclas de los bloques de obstrucciones (índices de pandas, como en el lector).
+ANCLAS_OBSTRUCCIONES = {
+    'N': (124, 4), 'E': (124, 9), 'S': (124, 14), 'O': (124, 19),
+    'NE': (136, 4), 'SE': (136, 9), 'SO': (136, 14), 'NO': (136, 19)
+}
+
+
+def _poner(ws, fila_idx, col_idx, valor):
+    """Escribe usando índices de pandas (base 0), como los usa el lector."""
+    ws.cell(row=fila_idx + 1, column=col_idx + 1).value = valor
+
+
+def _llenar_tabla(ws, rnd, fila_inicio_idx, n_filas, columnas, filas_llenas=None):
+    """
+    Llena una tabla fila a fila. `columnas` es una lista de (col_idx, tipo),
+    con tipo una lista de opciones (texto) o una tupla (min, max) (real).
+    """
+    filas_llenas = n_filas if filas_llenas is None else filas_llenas
+    for i in range(filas_llenas):
+        for col_idx, tipo in columnas:
+            if isinstance(tipo, tuple):
+                valor = round(rnd.uniform(*tipo), 3)
+            elif callable(tipo):
+                valor = tipo(i)
+            else:
+                valor = rnd.choice(tipo)
+            _poner(ws, fila_inicio_idx + i, col_idx, valor)
+
+
+def llenar_cev_ceve(ws, rnd):
+    """Llena las secciones de la hoja 'CEV-CEVE' que extrae el lector."""
+    region = rnd.choice(list(REGIONES))
+    generales = {
+        'E7': 'Calificación Energética', 'G7': 'Vivienda nueva', 'E8': region,
+        'E9': rnd.choice(REGIONES[region]), 'E10': rnd.choice(ZONAS),
+        'E11': rnd.randint(1, 5), 'E13': f'Casa {rnd.randint(1, 999)}',
+        'E14': f'Proyecto {rnd.randint(1, 99)}', 'E15': f'Calle {rnd.randint(1, 9999)}',
+        'E16': rnd.choice(['Casa', 'Departamento']), 'E19': f'{rnd.randint(100, 999)}-{rnd.randint(1, 99)}',
+        'E20': rnd.choice(['Evaluador A', 'Evaluador B', 'Evaluador C']),
+        'E21': rnd.randint(1000, 9999), 'E22': f'{rnd.randint(5, 25)}.{rnd.randint(100, 999)}.{rnd.randint(100, 999)}-{rnd.randint(0, 9)}',
+        'E24': 'v2.2', 'E25': rnd.randint(1, 500), 'E26': rnd.randint(1, 5),
+        'E28': 'Inmobiliaria X', 'E29': '76.000.000-0'
+    }
+    envolvente = {'E33': 'M1', 'E34': 'M2', 'E35': 'P1', 'E36': 'T1', 'E37': 'T2',
+                  'E38': 'V1', 'O38': 'Aluminio', 'E39': 'V2', 'O39': 'PVC', 'E40': 'PU1',
+                  'E44': 'Caldera a gas', 'E45': 'Calefont'}
+    for celda, valor in {**generales, **envolvente}.items():
+        ws[celda] = valor
+
+    # Dimensiones (filas 52 a 54) y totales
+    _llenar_tabla(ws, rnd, 51, 3, [(2, lambda i: f'Piso {i + 1}'), (3, (30.0, 90.0)),
+                                   (4, (2.3, 2.6)), (5, (70.0, 230.0))])
+    ws['D56'] = round(rnd.uniform(60, 180), 2)
+    ws['F56'] = round(rnd.uniform(140, 450), 2)
+
+    # Muros (filas 66 a 81)
+    _llenar_tabla(ws, rnd, 65, 16, [
+        (2, lambda i: f'M{i + 1}'), (3, ['M1', 'M2']), (4, (0.0, 359.0)), (5, ORIENTACIONES),
+        (6, DENSIDADES), (7, (2.0, 30.0)), (8, (0.3, 2.5)), (10, ['P1', 'P2']),
+        (11, ['P1', 'P2']), (12, ['P1', 'P2']), (14, POSICIONES_AISLACION)
+    ], filas_llenas=rnd.randint(4, 16))
+
+    # Puentes térmicos particulares (filas 87 a 91)
+    _llenar_tabla(ws, rnd, 86, 5, [
+        (2, lambda i: f'PT{i + 1}'), (3, ['M1', 'M2']), (4, (0.0, 359.0)), (5, ORIENTACIONES),
+        (6, ['Losa', 'Muro']), (7, ['Con aislación', 'Sin aislación']), (8, (1.0, 12.0))
+    ], filas_llenas=rnd.randint(0, 5))
+
+    # Puertas (filas 96 a 98) y ventanas (filas 103 a 122)
+    favs = [(c, (0.0, 1.5)) for c in range(15, 25)]
+    _llenar_tabla(ws, rnd, 95, 3, [
+        (2, lambda i: f'PU{i + 1}'), (3, ['PU1']), (4, (0.0, 359.0)), (5, ORIENTACIONES),
+        (7, ['Clase 1', 'Clase 2']), (10, (1.9, 2.2)), (11, (0.7, 1.0)), (13, (0.0, 0.5))
+    ] + favs, filas_llenas=rnd.randint(1, 3))
+    _llenar_tabla(ws, rnd, 102, 20, [
+        (2, lambda i: f'V{i + 1}'), (3, TIPOS_VENTANA), (4, (0.0, 359.0)), (5, ORIENTACIONES),
+        (6, ['M1', 'M2']), (7, ['Abatible', 'Corredera']), (8, ['Interior', 'Exterior']),
+        (9, ['Con retorno', 'Sin retorno']), (10, (0.4, 2.2)), (11, (0.4, 2.5)),
+        (12, ['Clase 1', 'Clase 2']), (13, TIPOS_MARCO)
+    ] + favs, filas_llenas=rnd.randint(4, 20))
+
+    # Obstrucciones: 8 bloques de 8 filas
+    for orientacion, (fila, col) in ANCLAS_OBSTRUCCIONES.items():
+        _poner(ws, fila, col, orientacion)
+        _poner(ws, fila - 1, col + 3, round(rnd.uniform(0, 100), 1))
+        _poner(ws, fila, col + 2, f'{rnd.randint(0, 180)}° - {rnd.randint(180, 359)}°')
+        _llenar_tabla(ws, rnd, fila + 2, 8, [
+            (2, lambda i: i + 1), (col, [1, 2, 3, 4]), (col + 1, (0.0, 10.0)),
+            (col + 2, (0.0, 10.0)), (col + 3, (0.0, 20.0))
+        ])
+
+    # Techos (filas 150 a 154) y pisos (filas 158 a 161)
+    _llenar_tabla(ws, rnd, 149, 5, [
+        (2, lambda i: f'T{i + 1}'), (3, ['T1', 'T2']), (5, DENSIDADES), (6, (20.0, 90.0)),
+        (7, (0.2, 0.8)), (10, ['Sí', 'No']), (11, ['Teja', 'Zinc', 'Losa']),
+        (13, POSICIONES_AISLACION)
+    ], filas_llenas=rnd.randint(1, 5))
+    _llenar_tabla(ws, rnd, 157, 4, [
+        (2, lambda i: f'P{i + 1}'), (3, ['P1']), (5, DENSIDADES), (6, (20.0, 90.0)),
+        (7, (0.3, 2.0)), (10, (10.0, 40.0)), (11, ['Sí', 'No']),
+        (13, POSICIONES_AISLACION), (17, (0.5, 1.5))
+    ], filas_llenas=rnd.randint(1, 4))
+
+    # Resumen envolvente (filas 169 a 178); el lector indexa por la columna C
+    etiquetas = ORIENTACIONES + ['Techos', 'Pisos']
+    reales = [(c, (0.0, 60.0)) for c in (3, 4, 5, 7, 8, 10, 11, 12, 13, 14, 15, 18)]
+    _llenar_tabla(ws, rnd, 168, 10, [(2, lambda i: etiquetas[i])] + reales)
+    _poner(ws, 167, 20, round(rnd.uniform(150, 400), 2))
+
+    # Condiciones de uso
+    for celda in ('E194', 'F194', 'E195', 'F195'):
+        ws[celda] = round(rnd.uniform(1, 6), 2)
+    horas = [(7, lambda i: i + 1)] + [(c, (0.0, 5.0)) for c in range(8, 20)]
+    _llenar_tabla(ws, rnd, 187, 24, horas)
+    _llenar_tabla(ws, rnd, 214, 24, horas)
+    ws['F217'] = rnd.choice(['Si', 'No'])
+    ws['F219'] = round(rnd.uniform(2, 12), 2)
+    ws['F221'] = rnd.randint(0, 4)
+    ws['F223'] = rnd.randint(0, 4)
+    ws['E227'] = rnd.choice(['Si', 'No'])
+    ws['F229'] = round(rnd.uniform(0, 90), 1)
+    ws['F230'] = 0.0
+    ws['F232'] = rnd.choice(['Si', 'No'])
+    ws['F234'] = round(rnd.uniform(0.3, 1.5), 2)
+
+
+def llenar_tablas_envolvente(ws, rnd):
+    """Llena la hoja '3. Tablas Envolvente' en las filas que lee el lector."""
+    def texto(prefijo):
+        return lambda i: f'{prefijo}{i + 1}'
+
+    # Puertas (filas 12 a 23), vidrios (27 a 42) y marcos (46 a 57)
+    _llenar_tabla(ws, rnd, 11, 12, [
+        (1, texto('Puerta ')), (2, texto('PU')), (3, (1.5, 3.5)), (4, ['Simple', 'DVH']),
+        (5, (0.0, 0.5)), (6, (1.5, 5.8)), (7, (0.1, 0.3)), (8, (1.5, 3.5)),
+        (9, (1.5, 3.5)), (10, (1.5, 5.8))
+    ], filas_llenas=rnd.randint(6, 12))
+    _llenar_tabla(ws, rnd, 26, 16, [
+        (1, texto('Vidrio ')), (2, texto('VI')), (3, (1.1, 5.8)), (4, (0.4, 0.87))
+    ], filas_llenas=rnd.randint(5, 16))
+    _llenar_tabla(ws, rnd, 45, 12, [
+        (1, texto('Marco ')), (2, texto('MA')), (3, (1.3, 5.9)), (4, (0.1, 0.3))
+    ], filas_llenas=rnd.randint(4, 12))
+
+    # Muros (61 a 75), techos (79 a 82) y pisos (87 a 100)
+    _llenar_tabla(ws, rnd, 60, 15, [
+        (1, texto('Muro ')), (2, texto('M')), (3, ['Albañilería', 'Hormigón', 'Madera']),
+        (4, (0.3, 2.5)), (5, (10.0, 25.0)), (6, (2.0, 10.0)), (7, POSICIONES_AISLACION)
+    ], filas_llenas=rnd.randint(1, 15))
+    _llenar_tabla(ws, rnd, 78, 4, [
+        (1, texto('Techo ')), (2, texto('T')), (3, (0.2, 0.8)), (5, (5.0, 20.0)),
+        (6, (5.0, 20.0)), (7, POSICIONES_AISLACION)
+    ], filas_llenas=rnd.randint(1, 4))
+    _llenar_tabla(ws, rnd, 86, 14, [
+        (1, texto('Piso ')), (2, texto('P')), (3, (0.3, 2.0))
+    ] + [(c, (0.02, 10.0)) for c in range(4, 12)] + [(12, POSICIONES_AISLACION)],
+        filas_llenas=rnd.randint(1, 5))
+
+
+def llenar_resultados(ws, rnd):
+    """
+    Llena la tabla horaria de 'Resultados' (desde la fila 6): 10 casos x 12
+    meses, en bloques de 24 horas separados por 2 filas vacías.
+    """
+    fila = 6
+    for caso in CASOS:
+        for mes in range(1, MESES + 1):
+            for hora in range(24):
+                for col in range(3, 62):
+                    ws.cell(row=fila, column=col).value = round(rnd.random() * 100, 3)
+                ws.cell(row=fila, column=5).value = mes
+                ws.cell(row=fila, column=35).value = round(rnd.random() * 1000, 2)
+                ws.cell(row=fila, column=36).value = round(rnd.random() * 200, 2)
+                ws.cell(row=fila, column=58).value = hora
+                ws.cell(row=fila, column=59).value = caso
+                ws.cell(row=fila, column=60).value = rnd.randint(0, 1)
+                ws.cell(row=fila, column=61).value = rnd.randint(0, 1)
+                fila += 1
+            fila += 2
+
+
+def generar_pbtd03(ruta_salida, semilla=0, ruta_plantilla=RUTA_PLANTILLA_03):
+    rnd = random.Random(semilla)
+    wb = openpyxl.load_workbook(ruta_plantilla, keep_vba=True)
+    llenar_cev_ceve(wb['CEV-CEVE'], rnd)
+    llenar_resultados(wb['Resultados'], rnd)
+    wb.save(ruta_salida)
+    return ruta_salida
+
+
+def generar_pbtd01(ruta_salida, semilla=0):
+    rnd = random.Random(semilla)
+    wb = openpyxl.Workbook()
+    wb.active.title = 'CEV-CEVE'
+    llenar_cev_ceve(wb['CEV-CEVE'], rnd)
+    llenar_tablas_envolvente(wb.create_sheet('3. Tablas Envolvente'), rnd)
+    wb.save(ruta_salida)
+    return ruta_salida
+
+
+def generar_corpus(directorio, n_archivos=5, semilla=0):
+    """
+    Genera (o reutiliza, si ya existen) `n_archivos` planillas de cada tipo.
+    Devuelve {'01': [rutas], '03': [rutas]}.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    corpus = {'01': [], '03': []}
+    for i in range(n_archivos):
+        ruta_01 = os.path.join(directorio, f'pbtd01_{semilla}_{i:03d}.xlsx')
+        ruta_03 = os.path.join(directorio, f'pbtd03_{semilla}_{i:03d}.xlsm')
+        if not os.path.exists(ruta_01):
+            generar_pbtd01(ruta_01, semilla=semilla * 1000 + i)
+        if not os.path.exists(ruta_03):
+            generar_pbtd03(ruta_03, semilla=semilla * 1000 + i)
+        corpus['01'].append(ruta_01)
+        corpus['03'].append(ruta_03)
+    return corpus
@@ -0,0 +1,30 @@
+# Archivo: pruebas/test_aislamiento.py
+
+from pypbtdcev.aislamiento import leer_aislado
+from pypbtdcev.lector import TIPO_DESCONOCIDO
+from pypbtdcev.metricas import MetricasLote
+from pypbtdcev.registros import TablaColumnar
+
+
+def test_archivo_defectuoso_no_detiene_el_lote(tmp_path, rutas_pbtd01):
+    ilegible = tmp_path / 'ilegible.xlsx'
+    ilegible.write_bytes(b'no es una planilla')
+    rutas = [rutas_pbtd01[0], str(ilegible), rutas_pbtd01[1]]
+    metricas = MetricasLote(trabajadores=2)
+
+    resultados = sorted(leer_aislado(rutas, procesos=2, metricas=metricas,
+                                     formato_tablas='columnar'),
+                        key=lambda r: r.indice)
+
+    assert [r.ok for r in resultados] == [True, False, True]
+    assert resultados[1].error.tipo == TIPO_DESCONOCIDO
+    # Las opciones también llegan al lector de PBTD01
+    tablas = resultados[0].datos['3. Tablas Envolvente']
+    assert all(isinstance(t, TablaColumnar) for t in tablas.values())
+    assert metricas.resumen()['plantillas']['PBTD01']['archivos'] == 2
+
+
+def test_trabajadores_reciclados(rutas_pbtd01, _planillas_01):
+    resultados = sorted(leer_aislado(rutas_pbtd01, procesos=1, archivos_por_trabajador=1),
+                        key=lambda r: r.indice)
+    assert [r.datos for r in resultados] == list(_planillas_01.values())
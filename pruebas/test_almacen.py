@@ -0,0 +1,67 @@
+# Archivo: pruebas/test_almacen.py
+
+import numpy as np
+import pytest
+
+from pypbtdcev.almacen import AlmacenResultados
+
+
+def _tabla(n_filas, inicio=0.0):
+    valores = inicio + np.arange(n_filas * 2, dtype=np.float64).reshape(n_filas, 2)
+    return {'columnas': ['a', 'b'], 'valores': valores, 'caso': None}
+
+
+def test_ingresar_planilla(tmp_path, ruta_pbtd03, datos_pbtd03_arreglo):
+    almacen = AlmacenResultados(str(tmp_path / 'almacen'))
+    entrada = almacen.ingresar(ruta_pbtd03)
+    zona = datos_pbtd03_arreglo['CEV-CEVE']['datos_generales_proyecto']['zona_termica_proyecto']
+    assert (entrada['id'], entrada['posicion'], entrada['zona_termica_proyecto']) == ('pbtd03_0', 0, zona)
+
+    resultados = datos_pbtd03_arreglo['Resultados']
+    columna = resultados['columnas'][3]
+    vista = almacen.vista(columna, zona)
+    n = resultados['valores'].shape[0]
+    np.testing.assert_array_equal(vista[0, :n], resultados['valores'][:, 3])
+
+
+def test_mismo_archivo_no_se_duplica(tmp_path, ruta_pbtd03):
+    raiz = str(tmp_path / 'almacen')
+    almacen = AlmacenResultados(raiz)
+    primera = almacen.ingresar(ruta_pbtd03)
+    assert almacen.ingresar(ruta_pbtd03, id_vivienda='otro_nombre') == primera
+    assert almacen.ingresar_planillas([ruta_pbtd03]) == 0
+
+    # También después de reabrir el almacén
+    reabierto = AlmacenResultados(raiz)
+    assert reabierto.ingresar_planillas([ruta_pbtd03]) == 0
+    assert len(reabierto.indice) == 1
+
+
+def test_mismo_id_no_se_duplica(tmp_path):
+    almacen = AlmacenResultados(str(tmp_path / 'almacen'), filas=4)
+    primera = almacen.agregar('v1', _tabla(4), {'zona_termica_proyecto': 'C'})
+    assert almacen.agregar('v1', _tabla(4, 100.0), {'zona_termica_proyecto': 'C'}) is primera
+    assert almacen.vista('a', 'C').shape == (1, 4)
+
+
+def test_posiciones_por_particion(tmp_path):
+    raiz = str(tmp_path / 'almacen')
+    almacen = AlmacenResultados(raiz, filas=4)
+    for i, zona in enumerate(['A', 'B', 'A', 'A', 'B']):
+        almacen.agregar(f'v{i}', _tabla(3, 10.0 * i), {'zona_termica_proyecto': zona})
+
+    reabierto = AlmacenResultados(raiz)
+    entrada = reabierto.agregar('v5', _tabla(4, 50.0), {'zona_termica_proyecto': 'B'})
+    assert entrada['posicion'] == 2
+
+    entradas, valores = reabierto.consultar('b', zona='A')
+    assert [e['id'] for e in entradas] == ['v0', 'v2', 'v3']
+    np.testing.assert_array_equal(valores[1], [21.0, 23.0, 25.0, np.nan])
+    np.testing.assert_array_equal(reabierto.vista('a', 'B')[2], [50.0, 52.0, 54.0, 56.0])
+
+
+def test_tabla_mas_larga_que_el_almacen(tmp_path):
+    almacen = AlmacenResultados(str(tmp_path / 'almacen'), filas=4)
+    with pytest.raises(ValueError, match='5 filas'):
+        almacen.agregar('v1', _tabla(5))
+    assert almacen.indice == []
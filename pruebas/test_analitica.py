@@ -0,0 +1,81 @@
+# Archivo: pruebas/test_analitica.py
+
+import numpy as np
+
+from pypbtdcev.analitica import (CASOS, COL_DEMANDA_CALEFACCION, COL_HD_MAS, COL_HD_MENOS,
+                                 COL_HORA, COL_MES, DIAS_POR_MES, MESES, TABLAS_VERIFICABLES,
+                                 agregar_diario, analizar_datos, cargas_punta, horas_confort,
+                                 tabla_resultados, verificar_resumen)
+
+
+def _fila(caso, mes, hora, demanda, hd_menos=0, hd_mas=0, **extra):
+    return dict({COL_MES: mes, COL_HORA: hora, COL_DEMANDA_CALEFACCION: demanda,
+                 COL_HD_MENOS: hd_menos, COL_HD_MAS: hd_mas, 'caso': caso}, **extra)
+
+
+def test_lista_y_arreglo_dan_lo_mismo(datos_pbtd03, datos_pbtd03_arreglo):
+    lista = agregar_diario(datos_pbtd03['Resultados'])
+    arreglo = agregar_diario(datos_pbtd03_arreglo['Resultados'])
+    assert lista['columnas'] == arreglo['columnas']
+    np.testing.assert_allclose(lista['valores'], arreglo['valores'])
+    # El corpus trae un día de 24 horas por caso y mes
+    assert (arreglo['filas'] == 24).all()
+
+
+def test_suma_diaria_por_caso_y_mes():
+    filas = [_fila(CASOS[0], 1, h, 10.0) for h in range(24)] + \
+        [_fila(CASOS[3], 7, h, None if h % 2 else 2.0) for h in range(24)]
+    diario = agregar_diario(filas)
+    j = diario['columnas'].index(COL_DEMANDA_CALEFACCION)
+    assert diario['valores'][0, 0, j] == 240.0
+    assert diario['valores'][3, 6, j] == 24.0     # las celdas vacías cuentan como cero
+    assert diario['valores'][..., j].sum() == 264.0
+
+
+def test_columnas_de_texto_se_omiten():
+    filas = [_fila(CASOS[0], 1, h, 1.5, observacion='revisar' if h == 3 else None) for h in range(24)]
+    tabla = tabla_resultados(filas)
+    assert 'observacion' not in tabla['columnas']
+    assert 'caso' not in tabla['columnas']
+    assert tabla['valores'].shape == (24, 5)
+    assert list(tabla['caso'][:2]) == [CASOS[0], CASOS[0]]
+
+
+def test_horas_confort_sin_datos_es_nan():
+    filas = [_fila(CASOS[1], 2, h, 0.0, hd_menos=int(h < 6), hd_mas=int(h > 20)) for h in range(24)]
+    confort = horas_confort(agregar_diario(filas))
+    assert confort['hd_menos'][1, 1] == 6 and confort['hd_mas'][1, 1] == 3
+    assert confort['confort'][1, 1] == 15
+    vacios = np.ones(confort['confort'].shape, dtype=bool)
+    vacios[1, 1] = False
+    assert np.isnan(confort['confort'][vacios]).all()
+
+
+def test_cargas_punta():
+    filas = [_fila(CASOS[2], 12, h, float(h * 10)) for h in range(24)]
+    puntas = cargas_punta(filas)[COL_DEMANDA_CALEFACCION]
+    assert puntas[2, 11] == 230.0
+    assert np.isnan(puntas[0, 0])
+
+
+def test_verificar_resumen(datos_pbtd03_arreglo):
+    diario = agregar_diario(datos_pbtd03_arreglo['Resultados'])
+    j = diario['columnas'].index(COL_DEMANDA_CALEFACCION)
+    mensual = diario['valores'][..., j] * np.array(DIAS_POR_MES) / 1000
+    tabla = {'caso_propuesto_con_clima': dict(zip(MESES, mensual[0].tolist())),
+             'caso_base_0_deg_con_clima': dict(zip(MESES, mensual[1].tolist()))}
+    nombre = next(n for n, (col, _) in TABLAS_VERIFICABLES.items() if col == COL_DEMANDA_CALEFACCION)
+    resumen = {'tablas_mensuales': {nombre: tabla}}
+    assert verificar_resumen(resumen, diario) == []
+
+    tabla['caso_base_0_deg_con_clima']['marzo'] += 50
+    (diferencia,) = verificar_resumen(resumen, diario)
+    assert (diferencia['tabla'], diferencia['caso'], diferencia['mes']) == \
+        (nombre, 'caso_base_0_deg_con_clima', 'marzo')
+
+
+def test_analizar_datos(datos_pbtd03_arreglo):
+    analisis = analizar_datos(datos_pbtd03_arreglo)
+    assert analisis['mensual']['valores'].shape == (len(CASOS), 12, len(analisis['diario']['columnas']))
+    np.testing.assert_allclose(analisis['mensual']['valores'][:, 0],
+                               analisis['diario']['valores'][:, 0] * 31)
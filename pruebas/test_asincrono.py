@@ -0,0 +1,53 @@
+# Archivo: pruebas/test_asincrono.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pypbtdcev.asincrono import ServicioAsincronoPBTD
+
+
+class _EjecutorContador(ThreadPoolExecutor):
+    """Registra cuántos trabajos llegan a correr a la vez."""
+
+    def __init__(self):
+        super().__init__(max_workers=8)
+        self._lock = threading.Lock()
+        self.activos = 0
+        self.maximo = 0
+
+    def submit(self, funcion, *args, **kwargs):
+        def envuelta():
+            with self._lock:
+                self.activos += 1
+                self.maximo = max(self.maximo, self.activos)
+            try:
+                time.sleep(0.05)
+                return funcion(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.activos -= 1
+        return super().submit(envuelta)
+
+
+def test_lectura_en_proceso_hijo(rutas_pbtd01, _planillas_01):
+    servicio = ServicioAsincronoPBTD(concurrencia=2)
+
+    async def leer():
+        return await asyncio.gather(*(servicio.leer_pbtd01(r) for r in rutas_pbtd01[:2]))
+
+    assert asyncio.run(leer()) == [_planillas_01['v0'], _planillas_01['v1']]
+
+
+def test_concurrencia_acotada_en_varios_loops(rutas_pbtd01):
+    with _EjecutorContador() as ejecutor:
+        servicio = ServicioAsincronoPBTD(concurrencia=2, pendientes_max=1, ejecutor=ejecutor)
+
+        async def leer():
+            return await asyncio.gather(*(servicio.leer_pbtd01(r) for r in rutas_pbtd01))
+
+        # Los semáforos se recrean en cada loop; el segundo asyncio.run no falla
+        for _ in range(2):
+            assert all(asyncio.run(leer()))
+        assert ejecutor.maximo == 2
@@ -0,0 +1,39 @@
+# Archivo: pruebas/test_benchmark.py
+
+import json
+
+from . import benchmark
+
+BASE = {
+    'lectura_03.total.s': 0.100,
+    'lectura_03._parsear_hoja_resumen.s': 0.001,
+    'lectura_03.archivos_por_s': 10.0,
+    'lectura_03.memoria_pico.bytes': 1000,
+}
+
+
+def test_comparar_detecta_regresiones():
+    metricas = {
+        'lectura_03.total.s': 0.200,                 # el doble: regresión
+        'lectura_03._parsear_hoja_resumen.s': 0.004,  # el cuádruple, pero 3 ms: ruido
+        'lectura_03.archivos_por_s': 5.0,             # la mitad: regresión
+        'lectura_03.memoria_pico.bytes': 1100,        # dentro de la tolerancia
+    }
+    regresiones = benchmark.comparar(metricas, BASE, tolerancia=0.25)
+    assert sorted(clave for clave, _, _ in regresiones) == [
+        'lectura_03.archivos_por_s', 'lectura_03.total.s']
+
+
+def test_main_codigos_de_salida(tmp_path, monkeypatch):
+    medicion = dict(BASE)
+    monkeypatch.setattr(benchmark, 'ejecutar', lambda *args: dict(medicion))
+    ruta_base = str(tmp_path / 'base.json')
+
+    assert benchmark.main(['--base', ruta_base, '--ci']) == 2
+    assert benchmark.main(['--base', ruta_base, '--guardar-base']) == 0
+    with open(ruta_base, encoding='utf-8') as f:
+        assert json.load(f) == BASE
+
+    assert benchmark.main(['--base', ruta_base]) == 0
+    medicion['lectura_03.memoria_pico.bytes'] = 2000
+    assert benchmark.main(['--base', ruta_base]) == 1
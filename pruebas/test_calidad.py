@@ -0,0 +1,85 @@
+# Archivo: pruebas/test_calidad.py
+
+import pytest
+
+from pypbtdcev.calidad import evaluar_datos, rango_plausible, reglas_predefinidas
+
+
+def _consistente(datos):
+    """Ajusta volúmenes y totales del corpus (aleatorios) para que cumplan las reglas."""
+    dimensiones = datos['CEV-CEVE']['dimensiones_de_la_vivienda']
+    for piso in dimensiones['pisos']:
+        piso['volumen_m3'] = piso['area_m2'] * piso['altura_m']
+    dimensiones['totales'] = {
+        'area_total_m2': sum(p['area_m2'] for p in dimensiones['pisos']),
+        'volumen_total_m3': sum(p['volumen_m3'] for p in dimensiones['pisos'])}
+    cev = datos['CEV-CEVE']
+    muros = [m['nombre_muro'] for m in cev['area_y_coeficiente_muros']]
+    for ventana in cev['ventanas']:
+        if ventana['id_ventana']:
+            ventana['elemento_envolvente'] = muros[0]
+    return datos
+
+
+@pytest.fixture
+def portafolio(planillas_01):
+    return {id_vivienda: _consistente(datos) for id_vivienda, datos in planillas_01.items()}
+
+
+def test_portafolio_consistente_sin_violaciones(portafolio):
+    violaciones = evaluar_datos(portafolio)
+    assert violaciones.empty, violaciones.to_string()
+
+
+def _inyectar_area_total(cev):
+    cev['dimensiones_de_la_vivienda']['totales']['area_total_m2'] += 50.0
+    return 'area_total_m2_igual_suma_pisos', 'proyecto', None, 'area_total_m2'
+
+
+def _inyectar_volumen_piso(cev):
+    dimensiones = cev['dimensiones_de_la_vivienda']
+    # El total se ajusta para que solo falle la regla del piso
+    dimensiones['totales']['volumen_total_m3'] += dimensiones['pisos'][1]['volumen_m3']
+    dimensiones['pisos'][1]['volumen_m3'] *= 2
+    return 'volumen_piso_igual_area_por_altura', 'dimensiones', 1, 'volumen_m3'
+
+
+def _inyectar_ventana_sin_muro(cev):
+    cev['ventanas'][2]['elemento_envolvente'] = 'M99'
+    return 'ventana_en_muro_inexistente', 'ventanas', 2, 'elemento_envolvente'
+
+
+def _inyectar_u_fuera_de_rango(cev):
+    cev['area_y_coeficiente_muros'][0]['u_w_m2k'] = 9.5
+    return 'muros.u_w_m2k_fuera_de_rango', 'muros', 0, 'u_w_m2k'
+
+
+@pytest.mark.parametrize('inyectar', [_inyectar_area_total, _inyectar_volumen_piso,
+                                      _inyectar_ventana_sin_muro, _inyectar_u_fuera_de_rango])
+def test_violacion_inyectada(portafolio, inyectar):
+    regla, tabla, fila, campo = inyectar(portafolio['v2']['CEV-CEVE'])
+    violaciones = evaluar_datos(portafolio)
+    assert len(violaciones) == 1, violaciones.to_string()
+    violacion = violaciones.iloc[0]
+    assert violacion['id_vivienda'] == 'v2'
+    assert (violacion['regla'], violacion['tabla'], violacion['campo']) == (regla, tabla, campo)
+    if fila is None:
+        assert violacion['fila'] is violaciones['fila'].dtype.na_value
+    else:
+        assert violacion['fila'] == fila
+
+
+def test_referencia_de_total_es_suma_de_pisos(portafolio):
+    _inyectar_area_total(portafolio['v1']['CEV-CEVE'])
+    pisos = portafolio['v1']['CEV-CEVE']['dimensiones_de_la_vivienda']['pisos']
+    violacion = evaluar_datos(portafolio).iloc[0]
+    assert violacion['referencia'] == pytest.approx(sum(p['area_m2'] for p in pisos))
+
+
+def test_regla_de_rango_propia(portafolio):
+    portafolio['v0']['CEV-CEVE']['ventanas'][0]['alto_m'] = 7.0
+    reglas = reglas_predefinidas() + [rango_plausible('ventanas', 'alto_m', 0.2, 4.0)]
+    violaciones = evaluar_datos(portafolio, reglas)
+    assert violaciones[['id_vivienda', 'regla', 'fila']].values.tolist() == \
+        [['v0', 'ventanas.alto_m_fuera_de_rango', 0]]
+    assert violaciones.iloc[0]['referencia'] == 4.0
@@ -0,0 +1,121 @@
+# Archivo: pruebas/test_comparativa.py
+
+import copy
+import random
+
+import pytest
+
+from pypbtdcev.comparativa import METRICAS, NIVELES, IndicePercentiles, clave_grupo
+from pypbtdcev.portafolio import ConstructorPortafolio
+
+ZONAS = ['A', 'B', 'C']
+TIPOS = ['Departamento', 'Casa']
+
+
+def _vivienda(base, aleatorio, i):
+    """Copia de `base` con grupo y 'Resumen' al azar; algunas solo traen el total anual."""
+    datos = copy.deepcopy(base)
+    cev = datos['CEV-CEVE']
+    cev['datos_generales_proyecto']['zona_termica_proyecto'] = aleatorio.choice(ZONAS)
+    cev['datos_generales_proyecto']['tipo_de_vivienda'] = aleatorio.choice(TIPOS)
+    area = round(aleatorio.uniform(35, 220), 1)
+    cev['dimensiones_de_la_vivienda']['totales']['area_total_m2'] = area
+
+    calefaccion = round(aleatorio.uniform(20, 180), 2)
+    demanda = {'demanda_refrigeracion_kwh_por_m2_ano': round(aleatorio.uniform(0, 30), 2),
+               'demanda_total_kwh_por_m2_ano': round(aleatorio.uniform(30, 200), 2)}
+    if i % 4 == 0:
+        demanda['demanda_calefaccion_kwh_ano'] = round(calefaccion * area, 1)
+    else:
+        demanda['demanda_calefaccion_kwh_por_m2_ano'] = calefaccion
+    datos['Resumen'] = {
+        'demanda_energetica': {'tabla_demanda': {'caso_propuesto': demanda}},
+        'consumos': {'4_balance_general': {'consumo_total_final': {
+            'kwh_m2_ano': round(aleatorio.uniform(50, 300), 2)}}},
+    }
+    return datos
+
+
+@pytest.fixture
+def viviendas(planillas_01):
+    aleatorio = random.Random(11)
+    bases = list(planillas_01.values())
+    return {f'viv{i:03d}': _vivienda(bases[i % len(bases)], aleatorio, i) for i in range(80)}
+
+
+def _incremental(viviendas):
+    indice = IndicePercentiles()
+    for datos in viviendas.values():
+        indice.agregar(datos)
+    return indice
+
+
+def _por_lote(viviendas):
+    constructor = ConstructorPortafolio()
+    for id_vivienda, datos in viviendas.items():
+        constructor.agregar(id_vivienda, datos)
+    return IndicePercentiles.desde_portafolio(constructor.lote())
+
+
+def _listas(indice, viviendas):
+    """{(grupo, métrica): valores} de todos los niveles de grupo de `viviendas`."""
+    grupos = {clave_grupo(datos)[:nivel] for datos in viviendas.values() for nivel in NIVELES}
+    return {(grupo, metrica): indice.valores(grupo, metrica)
+            for grupo in grupos for metrica in METRICAS}
+
+
+def _iguales(a, b):
+    assert a.keys() == b.keys()
+    for clave, lista in a.items():
+        assert b[clave] == pytest.approx(lista, rel=1e-12), clave
+
+
+def test_incremental_igual_a_por_lote(viviendas):
+    incremental, por_lote = _incremental(viviendas), _por_lote(viviendas)
+    assert len(incremental) == len(por_lote) == len(viviendas)
+    listas = _listas(incremental, viviendas)
+    assert sum(len(lista) for lista in listas.values()) > 0
+    _iguales(listas, _listas(por_lote, viviendas))
+
+
+def test_ubicar_igual_en_ambos(viviendas):
+    incremental, por_lote = _incremental(viviendas), _por_lote(viviendas)
+    for datos in list(viviendas.values())[:10]:
+        a, b = incremental.ubicar(datos), por_lote.ubicar(datos)
+        assert {m: u.a_dict() for m, u in a.items()} == {m: u.a_dict() for m, u in b.items()}
+
+
+def test_fusion_con_indice_existente(viviendas):
+    ids = list(viviendas)
+    primera = {i: viviendas[i] for i in ids[:30]}
+    segunda = {i: viviendas[i] for i in ids[30:]}
+    indice = _incremental(primera)
+    constructor = ConstructorPortafolio()
+    for id_vivienda, datos in segunda.items():
+        constructor.agregar(id_vivienda, datos)
+    indice.agregar_portafolio(constructor.lote())
+
+    esperado = _incremental(viviendas)
+    assert len(indice) == len(esperado)
+    _iguales(_listas(esperado, viviendas), _listas(indice, viviendas))
+
+
+def test_percentil(viviendas):
+    indice = _incremental(viviendas)
+    zona, tipo, _ = clave_grupo(next(iter(viviendas.values())))
+    lista = indice.valores((zona, tipo), 'demanda_calefaccion_kwh_m2')
+    assert lista == sorted(lista)
+    assert indice.percentil((zona, tipo), 'demanda_calefaccion_kwh_m2', lista[0] - 1) == (0.0, len(lista))
+    assert indice.percentil((zona, tipo), 'demanda_calefaccion_kwh_m2', lista[-1] + 1) == (100.0, len(lista))
+
+
+def test_guardar_y_cargar(viviendas, tmp_path):
+    indice = _incremental(viviendas)
+    ruta = str(tmp_path / 'percentiles.json')
+    indice.guardar(ruta)
+    cargado = IndicePercentiles.cargar(ruta)
+    assert len(cargado) == len(indice)
+    assert _listas(cargado, viviendas) == _listas(indice, viviendas)
+    datos = next(iter(viviendas.values()))
+    assert {m: u.a_dict() for m, u in cargado.ubicar(datos).items()} == \
+        {m: u.a_dict() for m, u in indice.ubicar(datos).items()}
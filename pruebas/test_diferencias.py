@@ -0,0 +1,75 @@
+# Archivo: pruebas/test_diferencias.py
+
+import copy
+
+from pypbtdcev.diferencias import (AGREGADO, ELIMINADO, MODIFICADO, comparar,
+                                   tabla_cambios)
+
+
+def test_copia_identica(planillas_01):
+    diferencia = comparar(planillas_01['v0'], copy.deepcopy(planillas_01['v0']))
+    assert diferencia.identicas
+    assert 'CEV-CEVE.ventanas' in diferencia.secciones_iguales
+
+
+def test_orden_de_filas_no_es_cambio(planillas_01):
+    siguiente = copy.deepcopy(planillas_01['v0'])
+    siguiente['CEV-CEVE']['ventanas'].reverse()
+    siguiente['CEV-CEVE']['area_y_coeficiente_muros'].reverse()
+    assert comparar(planillas_01['v0'], siguiente).cambios == []
+
+
+def test_fila_eliminada_no_desplaza_las_siguientes(planillas_01):
+    anterior = planillas_01['v0']
+    siguiente = copy.deepcopy(anterior)
+    ventanas = siguiente['CEV-CEVE']['ventanas']
+    # Las planillas traen filas vacías al final; se elimina una del medio de las llenas
+    llenas = [i for i, ventana in enumerate(ventanas) if ventana['id_ventana']]
+    eliminada = ventanas.pop(llenas[len(llenas) // 2])
+
+    cambios = comparar(anterior, siguiente).cambios
+    assert len(cambios) == 1
+    cambio = cambios[0]
+    assert (cambio.seccion, cambio.fila, cambio.campo, cambio.tipo) == \
+        ('CEV-CEVE.ventanas', eliminada['id_ventana'], None, ELIMINADO)
+    assert cambio.antes == eliminada
+
+
+def test_fila_insertada(planillas_01):
+    anterior = planillas_01['v0']
+    siguiente = copy.deepcopy(anterior)
+    ventanas = siguiente['CEV-CEVE']['ventanas']
+    nueva = dict(ventanas[0], id_ventana='V99')
+    ventanas.insert(1, nueva)
+
+    cambios = comparar(anterior, siguiente).cambios
+    assert [(c.seccion, c.fila, c.tipo) for c in cambios] == [('CEV-CEVE.ventanas', 'V99', AGREGADO)]
+
+
+def test_campo_modificado(planillas_01):
+    anterior = planillas_01['v1']
+    siguiente = copy.deepcopy(anterior)
+    muro = siguiente['CEV-CEVE']['area_y_coeficiente_muros'][1]
+    antes = muro['u_w_m2k']
+    muro['u_w_m2k'] = antes + 0.5
+
+    cambios = comparar(anterior, siguiente, 'it1', 'it2').cambios
+    assert len(cambios) == 1
+    cambio = cambios[0]
+    assert (cambio.seccion, cambio.fila, cambio.campo, cambio.tipo) == \
+        ('CEV-CEVE.area_y_coeficiente_muros', muro['muro'], 'u_w_m2k', MODIFICADO)
+    assert (cambio.antes, cambio.despues) == (antes, antes + 0.5)
+
+
+def test_diferencia_bajo_tolerancia(planillas_01):
+    siguiente = copy.deepcopy(planillas_01['v1'])
+    siguiente['CEV-CEVE']['area_y_coeficiente_muros'][1]['u_w_m2k'] *= 1 + 1e-9
+    assert comparar(planillas_01['v1'], siguiente).identicas
+
+
+def test_tabla_cambios(planillas_01):
+    siguiente = copy.deepcopy(planillas_01['v2'])
+    siguiente['CEV-CEVE']['ventanas'].pop(0)
+    tabla = tabla_cambios([(('caso', '1'), comparar(planillas_01['v2'], siguiente, 'a', 'b'))])
+    assert tabla[['caso', 'anterior', 'siguiente', 'fila', 'tipo']].values.tolist() == \
+        [['caso / 1', 'a', 'b', 'V1', ELIMINADO]]
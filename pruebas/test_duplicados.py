@@ -0,0 +1,78 @@
+# Archivo: pruebas/test_duplicados.py
+
+import copy
+
+import pytest
+
+from pypbtdcev.duplicados import EXACTO, SIMILAR, IndiceDuplicados
+
+
+@pytest.fixture
+def indice(planillas_01):
+    indice = IndiceDuplicados()
+    for id_vivienda, datos in planillas_01.items():
+        indice.agregar(id_vivienda, datos)
+    return indice
+
+
+def _copia_exacta(datos):
+    """Mismos datos con otro encabezado de proyecto y las filas en otro orden."""
+    copia = copy.deepcopy(datos)
+    cev = copia['CEV-CEVE']
+    cev['datos_generales_proyecto']['caso_interno_evaluador'] = 'OTRO-CASO'
+    cev['ventanas'].reverse()
+    return copia
+
+
+def _copia_similar(datos):
+    """Otra transmitancia en todos los muros (un solo valor no alcanza a mover la firma)."""
+    copia = copy.deepcopy(datos)
+    for muro in copia['CEV-CEVE']['area_y_coeficiente_muros']:
+        if muro['u_w_m2k'] is not None:
+            muro['u_w_m2k'] += 0.3
+    return copia
+
+
+def test_planillas_distintas_no_son_duplicados(indice):
+    assert len(indice) == 4
+    assert indice.duplicados().empty
+
+
+def test_duplicado_exacto(indice, planillas_01):
+    indice.agregar('v0_copia', _copia_exacta(planillas_01['v0']))
+    tabla = indice.duplicados()
+    assert tabla[['id_a', 'id_b', 'tipo', 'similitud']].values.tolist() == \
+        [['v0', 'v0_copia', EXACTO, 1.0]]
+
+
+def test_duplicado_similar(indice, planillas_01):
+    indice.agregar('v1_editada', _copia_similar(planillas_01['v1']))
+    tabla = indice.duplicados()
+    assert tabla[['id_a', 'id_b', 'tipo']].values.tolist() == [['v1', 'v1_editada', SIMILAR]]
+    assert 0.8 <= tabla.iloc[0]['similitud'] < 1.0
+
+
+def test_grupo_une_pares_encadenados(indice, planillas_01):
+    indice.agregar('v2_copia', _copia_exacta(planillas_01['v2']))
+    indice.agregar('v2_editada', _copia_similar(planillas_01['v2']))
+    tabla = indice.duplicados()
+    assert set(tabla['tipo']) == {EXACTO, SIMILAR}
+    assert tabla['grupo'].nunique() == 1
+
+
+def test_buscar(indice, planillas_01):
+    resultado = indice.buscar(_copia_exacta(planillas_01['v3']))
+    assert resultado == [('v3', EXACTO, 1.0)]
+    ((id_vivienda, tipo, similitud),) = indice.buscar(_copia_similar(planillas_01['v3']))
+    assert (id_vivienda, tipo) == ('v3', SIMILAR) and similitud < 1.0
+
+
+def test_guardar_y_cargar(indice, planillas_01, tmp_path):
+    indice.agregar('v0_copia', _copia_exacta(planillas_01['v0']))
+    indice.agregar('v1_editada', _copia_similar(planillas_01['v1']))
+    ruta = str(tmp_path / 'indice.npz')
+    indice.guardar(ruta)
+
+    cargado = IndiceDuplicados.cargar(ruta)
+    assert cargado.ids == indice.ids
+    assert cargado.duplicados().equals(indice.duplicados())
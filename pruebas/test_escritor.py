@@ -0,0 +1,83 @@
+# Archivo: pruebas/test_escritor.py
+
+import openpyxl
+import pytest
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from pypbtdcev.escritor import EscritorPBTD01_v2
+from pypbtdcev.instrumentacion import observar
+from pypbtdcev.validaciones import IndiceValidaciones, indice_de_plantilla
+
+
+def test_celdas_a_escribir_coincide_con_la_escritura(tmp_path, rutas_pbtd01, planillas_01):
+    salida = str(tmp_path / 'salida.xlsx')
+    escritor = EscritorPBTD01_v2()
+    assert escritor.crear_nueva_planilla(rutas_pbtd01[1], salida, planillas_01['v0'])
+
+    celdas = escritor.celdas_a_escribir(planillas_01['v0'])
+    plantilla, escrito = openpyxl.load_workbook(rutas_pbtd01[1]), openpyxl.load_workbook(salida)
+    for hoja, valores in celdas.items():
+        ws = escrito[hoja]
+        assert {celda: ws[celda].value for celda in valores} == valores
+        # Ninguna celda cambia fuera del mapa
+        for fila_plantilla, fila_escrita in zip(plantilla[hoja].iter_rows(), ws.iter_rows()):
+            for antes, despues in zip(fila_plantilla, fila_escrita):
+                if antes.value != despues.value:
+                    assert despues.coordinate in valores
+
+
+def test_validar_no_pasa_por_la_escritura(planillas_01):
+    eventos = []
+    with observar(eventos.append):
+        assert EscritorPBTD01_v2().validar(planillas_01['v0'], IndiceValidaciones({})) == []
+    assert eventos == []
+
+
+@pytest.fixture
+def plantilla_con_validaciones(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'CEV-CEVE'
+    wb.create_sheet('3. Tablas Envolvente')
+    listas = wb.create_sheet('Listas')
+    listas.sheet_state = 'hidden'
+    comunas = {'Metropolitana': ['Santiago', 'Maipu'], 'Valparaiso': ['Vina del Mar', 'Quilpue']}
+    for col, (region, nombres) in enumerate(comunas.items(), start=1):
+        letra = openpyxl.utils.get_column_letter(col)
+        for fila, nombre in enumerate(nombres, start=1):
+            listas.cell(fila, col, nombre)
+        wb.defined_names[region] = DefinedName(region, attr_text=f"Listas!${letra}$1:${letra}$2")
+
+    for dv, celda in [
+            (DataValidation(type='list', formula1='"Metropolitana,Valparaiso"'), 'E8'),
+            (DataValidation(type='list', formula1='INDIRECT(E8)'), 'E9'),
+            (DataValidation(type='whole', operator='between', formula1='1', formula2='10'), 'E11')]:
+        ws.add_data_validation(dv)
+        dv.add(celda)
+    ruta = str(tmp_path / 'plantilla_validaciones.xlsx')
+    wb.save(ruta)
+    return ruta
+
+
+def _datos(region, comuna, dormitorios):
+    return {'CEV-CEVE': {'datos_generales_proyecto': {
+        'region': region, 'comuna': comuna, 'dormitorios_de_la_vivienda': dormitorios}}}
+
+
+def test_validar_con_reglas_resueltas(tmp_path, plantilla_con_validaciones):
+    indice = indice_de_plantilla(plantilla_con_validaciones)
+    assert len(indice) == 3 and indice.sin_resolver == []
+
+    escritor = EscritorPBTD01_v2()
+    assert escritor.validar(_datos('Metropolitana', 'maipu ', 3), indice) == []
+    fallas = escritor.validar(_datos('Araucania', 'Temuco', 12), indice)
+    # Sin lista para la región no se puede decidir la comuna: solo fallan E8 y E11
+    assert sorted(f.celda for f in fallas) == ['E11', 'E8']
+    # La comuna se revisa contra la lista de la región escrita en E8
+    [falla] = escritor.validar(_datos('Valparaiso', 'Santiago', 3), indice)
+    assert falla.celda == 'E9'
+
+    salida = str(tmp_path / 'salida.xlsx')
+    assert not escritor.crear_nueva_planilla(plantilla_con_validaciones, salida,
+                                             _datos('Valparaiso', 'Santiago', 3), validaciones=indice)
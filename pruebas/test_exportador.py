@@ -0,0 +1,54 @@
+# Archivo: pruebas/test_exportador.py
+
+import numpy as np
+import pytest
+
+from pypbtdcev.exportador import ExportadorParquet, leer_tabla, tablas_normalizadas
+
+pa = pytest.importorskip('pyarrow')
+
+
+def _datos_con_resultados(columnas, n_filas=3):
+    valores = np.arange(n_filas * len(columnas), dtype=np.float64).reshape(n_filas, -1)
+    return {'CEV-CEVE': {'datos_generales_proyecto': {'zona_termica_proyecto': 'C'}},
+            'Resultados': {'columnas': columnas, 'valores': valores, 'caso': None}}
+
+
+def test_pbtd03(tmp_path, datos_pbtd03_arreglo):
+    directorio = str(tmp_path / 'parquet')
+    with ExportadorParquet(directorio) as exportador:
+        exportador.agregar('v1', datos_pbtd03_arreglo, archivo='v1.xlsm')
+
+    proyecto = leer_tabla(directorio, 'proyecto').to_pylist()
+    generales = datos_pbtd03_arreglo['CEV-CEVE']['datos_generales_proyecto']
+    assert len(proyecto) == 1
+    assert proyecto[0]['comuna'] == generales['comuna']
+    assert leer_tabla(directorio, 'proyecto').schema.field('area_total_m2').type == pa.float64()
+
+    resultados = datos_pbtd03_arreglo['Resultados']
+    tabla = leer_tabla(directorio, 'resultados', columnas=['caso', resultados['columnas'][2]])
+    assert tabla.num_rows == resultados['valores'].shape[0]
+    np.testing.assert_array_equal(tabla.column(1).to_numpy(), resultados['valores'][:, 2])
+
+    muros = leer_tabla(directorio, 'muros')
+    assert muros.num_rows == len(tablas_normalizadas('v1', datos_pbtd03_arreglo)['muros'])
+
+
+def test_resultados_con_columnas_distintas(tmp_path):
+    directorio = str(tmp_path / 'parquet')
+    with ExportadorParquet(directorio) as exportador:
+        exportador.agregar('v1', _datos_con_resultados(['a', 'b']))
+        exportador.agregar('v2', _datos_con_resultados(['b', 'c', 'a']))
+
+    tabla = leer_tabla(directorio, 'resultados')
+    assert tabla.column_names == ['id_vivienda', 'fila', 'caso', 'a', 'b', 'c']
+    filas = tabla.to_pylist()
+    assert [f['c'] for f in filas] == [None, None, None, 1.0, 4.0, 7.0]
+    assert [f['a'] for f in filas[3:]] == [2.0, 5.0, 8.0]
+
+
+def test_columna_nueva_despues_de_escribir(tmp_path):
+    with ExportadorParquet(str(tmp_path / 'parquet'), filas_por_grupo=2) as exportador:
+        exportador.agregar('v1', _datos_con_resultados(['a', 'b']))
+        with pytest.raises(ValueError, match="'v2'.*\\['c'\\]"):
+            exportador.agregar('v2', _datos_con_resultados(['a', 'b', 'c']))
@@ -0,0 +1,40 @@
+# Archivo: pruebas/test_importacion.py
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from .corpus_sintetico import RUTA_PLANTILLA_03
+from .tiempo_importacion import MODULOS, PESADOS
+
+_CODIGO = '''
+import json, sys
+{codigo}
+print(json.dumps([m for m in {pesados!r} if m in sys.modules]))
+'''
+
+
+def _pesados_cargados(codigo):
+    salida = subprocess.run(
+        [sys.executable, '-c', _CODIGO.format(codigo=codigo, pesados=PESADOS)],
+        capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('modulo', MODULOS + ['pypbtdcev.cli'])
+def test_importar_no_carga_dependencias_pesadas(modulo):
+    assert _pesados_cargados(f'import {modulo}') == []
+
+
+def test_tipo_planilla_sin_pandas():
+    codigo = ('from pypbtdcev.utilidades import tipo_planilla\n'
+              f'assert tipo_planilla({RUTA_PLANTILLA_03!r}) == "PBTD03"')
+    assert 'pandas' not in _pesados_cargados(codigo)
+
+
+def test_primer_uso_carga_el_modulo():
+    codigo = ('from pypbtdcev.analitica import np\n'
+              'np.zeros(1)')
+    assert _pesados_cargados(codigo) == ['numpy']
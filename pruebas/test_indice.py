@@ -0,0 +1,59 @@
+# Archivo: pruebas/test_indice.py
+
+import os
+import shutil
+
+import pytest
+
+from pypbtdcev.indice import IndicePlanillas
+from pypbtdcev.registros import TablaColumnar
+from pypbtdcev.utilidades import leer_planilla
+
+
+@pytest.fixture
+def directorio(tmp_path, ruta_pbtd03, rutas_pbtd01):
+    destino = tmp_path / 'planillas'
+    destino.mkdir()
+    shutil.copy(ruta_pbtd03, destino / 'a.xlsm')
+    shutil.copy(rutas_pbtd01[0], destino / 'b.xlsx')
+    return destino
+
+
+def test_reindexacion_incremental(tmp_path, directorio, rutas_pbtd01):
+    with IndicePlanillas(str(tmp_path / 'indice.db')) as indice:
+        assert indice.indexar_directorio(str(directorio))['nuevo'] == 2
+        assert indice.indexar_directorio(str(directorio))['sin_cambios'] == 2
+
+        # Solo cambia la fecha: no se relee
+        os.utime(directorio / 'b.xlsx', (1, 1))
+        assert indice.indexar(str(directorio / 'b.xlsx')) == 'sin_cambios'
+
+        shutil.copy(rutas_pbtd01[1], directorio / 'b.xlsx')
+        assert indice.indexar(str(directorio / 'b.xlsx')) == 'actualizado'
+
+        os.remove(directorio / 'a.xlsm')
+        conteo = indice.indexar_directorio(str(directorio))
+        assert (conteo['eliminado'], conteo['sin_cambios']) == (1, 1)
+
+
+def test_buscar(tmp_path, directorio, planillas_01):
+    generales = planillas_01['v0']['CEV-CEVE']['datos_generales_proyecto']
+    with IndicePlanillas(str(tmp_path / 'indice.db')) as indice:
+        indice.indexar_directorio(str(directorio))
+        encontradas = indice.buscar(tipo='PBTD01', comuna=generales['comuna'])
+        assert [os.path.basename(f['ruta']) for f in encontradas] == ['b.xlsx']
+        assert encontradas[0]['iteracion_evaluador'] == generales['iteracion_evaluador']
+
+        iteracion = generales['iteracion_evaluador']
+        assert indice.buscar(tipo='PBTD01', iteracion_evaluador__gt=iteracion) == []
+        with pytest.raises(ValueError):
+            indice.buscar(no_existe=1)
+
+
+def test_leer_planilla_pasa_opciones_a_pbtd01(rutas_pbtd01):
+    # 'resultados_como_arreglo' no aplica a PBTD01 y se descarta
+    tipo, datos = leer_planilla(rutas_pbtd01[0], formato_tablas='columnar',
+                                resultados_como_arreglo=True)
+    assert tipo == 'PBTD01'
+    tablas = datos['3. Tablas Envolvente']
+    assert all(isinstance(t, TablaColumnar) for t in tablas.values())
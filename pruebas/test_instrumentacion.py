@@ -0,0 +1,46 @@
+# Archivo: pruebas/test_instrumentacion.py
+
+import pytest
+
+from pypbtdcev.instrumentacion import RegistroTiempos, archivo_en_curso, medir, observar
+from pypbtdcev.lector import LectorPBTD01_v2
+
+
+def test_eventos_de_lectura(rutas_pbtd01):
+    eventos = []
+    with observar(eventos.append):
+        LectorPBTD01_v2(rutas_pbtd01[0])
+    n = len(eventos)
+    LectorPBTD01_v2(rutas_pbtd01[0])
+    assert len(eventos) == n
+
+    carga = [e for e in eventos if e['tipo'] == 'carga']
+    assert len(carga) == 1 and carga[0]['filas'] > 0 and carga[0]['bytes'] > 0
+    secciones = [e for e in eventos if e['tipo'] == 'seccion']
+    assert secciones and all(e['nombre'].startswith('_parsear_') for e in secciones)
+    assert {e['archivo'] for e in eventos} == {rutas_pbtd01[0]}
+
+
+def test_niveles_y_errores():
+    tiempos = RegistroTiempos()
+    eventos = []
+    with observar(tiempos), observar(eventos.append), archivo_en_curso('x.xlsx'):
+        with medir('seccion', 'externa'):
+            with medir('seccion', 'interna', 'detalle'):
+                pass
+        with pytest.raises(KeyError), medir('seccion', 'falla'):
+            raise KeyError('x')
+
+    assert [(e['nombre'], e['nivel'], e['error']) for e in eventos] == [
+        ('interna', 1, None), ('externa', 0, None), ('falla', 0, 'KeyError')]
+    # RegistroTiempos no cuenta dos veces las llamadas anidadas
+    assert set(tiempos.totales) == {'externa', 'falla'}
+
+
+def test_observador_con_errores_no_interrumpe(rutas_pbtd01, _planillas_01):
+    def defectuoso(evento):
+        raise RuntimeError('falla del observador')
+
+    with observar(defectuoso):
+        datos = LectorPBTD01_v2(rutas_pbtd01[0]).datos_extraidos
+    assert datos == _planillas_01['v0']
@@ -0,0 +1,57 @@
+# Archivo: pruebas/test_lector.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from pypbtdcev.lector import TIPO_DESCONOCIDO, LectorPBTD, LectorPBTD01_v2, LectorPBTD03_v2
+from pypbtdcev.utilidades import leer_planilla
+
+
+def test_modo_liviano_pbtd03(ruta_pbtd03, datos_pbtd03, datos_pbtd03_arreglo):
+    lector = LectorPBTD03_v2(ruta_pbtd03, resultados_como_arreglo=True, modo_liviano=True)
+    assert lector.xl_file_data == {}
+
+    resultados = lector.datos_extraidos['Resultados']
+    assert resultados['valores'].dtype == np.float32
+    np.testing.assert_allclose(resultados['valores'],
+                               datos_pbtd03_arreglo['Resultados']['valores'], rtol=1e-6)
+
+    # Fuera de 'Resultados' como arreglo, los datos no cambian
+    datos = LectorPBTD03_v2(ruta_pbtd03, modo_liviano=True).datos_extraidos
+    assert datos == datos_pbtd03
+
+
+def test_modo_liviano_pbtd01(rutas_pbtd01, _planillas_01):
+    lector = LectorPBTD01_v2(rutas_pbtd01[0], modo_liviano=True)
+    assert lector.xl_file_data == {}
+    assert lector.datos_extraidos == _planillas_01['v0']
+
+
+def test_lector_reutilizable_entre_hilos(rutas_pbtd01, ruta_pbtd03, _planillas_01, datos_pbtd03):
+    lector = LectorPBTD()
+    rutas = list(rutas_pbtd01) + [ruta_pbtd03]
+    with ThreadPoolExecutor(4) as ejecutor:
+        resultados = list(ejecutor.map(lector.leer, rutas))
+    assert [tipo for tipo, _ in resultados] == ['PBTD01'] * len(rutas_pbtd01) + ['PBTD03']
+    assert [datos for _, datos in resultados] == list(_planillas_01.values()) + [datos_pbtd03]
+
+
+def test_leer_con_error(tmp_path):
+    ilegible = tmp_path / 'ilegible.xlsx'
+    ilegible.write_bytes(b'no es una planilla')
+    lector = LectorPBTD()
+    assert lector.leer_con_error(str(tmp_path / 'no_existe.xlsx'))[:3] == \
+        (None, None, 'FileNotFoundError')
+    assert lector.leer_con_error(str(ilegible))[:3] == (None, None, TIPO_DESCONOCIDO)
+    with pytest.raises(ValueError):
+        LectorPBTD(formato_tablas='parquet')
+
+
+def test_leer_planilla_usa_lector_pbtd(tmp_path, rutas_pbtd01, _planillas_01, caplog):
+    assert leer_planilla(rutas_pbtd01[0], modo_liviano=True) == ('PBTD01', _planillas_01['v0'])
+    with caplog.at_level(logging.WARNING, logger='pypbtdcev'):
+        assert leer_planilla(str(tmp_path / 'no_existe.xlsx')) == (None, None)
+    assert 'no_existe.xlsx' in caplog.text
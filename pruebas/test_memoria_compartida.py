@@ -0,0 +1,47 @@
+# Archivo: pruebas/test_memoria_compartida.py
+
+import os
+
+import numpy as np
+import pytest
+
+from pypbtdcev.memoria_compartida import leer_en_paralelo
+
+RENOVACIONES = ('CEV-CEVE', 'condiciones_de_uso', 'renovaciones_aire_por_hora')
+
+
+def _segmentos():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def test_como_diccionarios_reproduce_el_lector(ruta_pbtd03, datos_pbtd03_arreglo):
+    antes = _segmentos()
+    [resultado] = leer_en_paralelo([ruta_pbtd03], procesos=1, como_diccionarios=True)
+
+    datos = resultado.datos
+    np.testing.assert_array_equal(datos['Resultados']['valores'],
+                                  datos_pbtd03_arreglo['Resultados']['valores'])
+    assert datos['Resultados']['columnas'] == datos_pbtd03_arreglo['Resultados']['columnas']
+    assert datos['CEV-CEVE']['condiciones_de_uso']['renovaciones_aire_por_hora'] == \
+        datos_pbtd03_arreglo['CEV-CEVE']['condiciones_de_uso']['renovaciones_aire_por_hora']
+    # El segmento se libera apenas se reconstruyen los diccionarios
+    assert _segmentos() == antes
+
+
+def test_vistas_sin_copia(ruta_pbtd03, datos_pbtd03_arreglo):
+    antes = _segmentos()
+    [resultado] = leer_en_paralelo([ruta_pbtd03], procesos=1)
+    with resultado:
+        valores = resultado.datos['Resultados']['valores']
+        assert not valores.flags.writeable
+        with pytest.raises(ValueError):
+            valores[0, 0] = 1.0
+
+        renovaciones = resultado.datos[RENOVACIONES[0]][RENOVACIONES[1]][RENOVACIONES[2]]
+        originales = datos_pbtd03_arreglo[RENOVACIONES[0]][RENOVACIONES[1]][RENOVACIONES[2]]
+        assert renovaciones['filas'] == [r['hora'] for r in originales]
+        columna = renovaciones['columnas'][0]
+        np.testing.assert_array_equal(renovaciones['valores'][:, 0],
+                                      [r[columna] for r in originales])
+        del valores, renovaciones
+    assert _segmentos() == antes
@@ -0,0 +1,67 @@
+# Archivo: pruebas/test_metricas.py
+
+import threading
+import urllib.request
+
+import pytest
+
+from pypbtdcev.metricas import CONTENT_TYPE, MetricasLote
+
+
+def test_acumulados_de_varios_hilos(tmp_path):
+    ruta = tmp_path / 'planilla.xlsx'
+    ruta.write_bytes(b'x' * 100)
+    metricas = MetricasLote(trabajadores=4)
+
+    def trabajar():
+        for _ in range(50):
+            metricas.registrar('PBTD03', 0.2, 10)
+    hilos = [threading.Thread(target=trabajar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    with metricas.medir_archivo('PBTD01', str(ruta)) as medicion:
+        medicion.fallo(FileNotFoundError())
+    with pytest.raises(KeyError), metricas.medir_archivo('PBTD01'):
+        raise KeyError('x')
+
+    resumen = metricas.resumen()
+    pbtd03 = resumen['plantillas']['PBTD03']
+    assert (pbtd03['archivos'], pbtd03['bytes']) == (200, 2000)
+    assert pbtd03['cuantiles'][0.5] == 0.2
+    assert resumen['plantillas']['PBTD01']['bytes'] == 100
+    assert resumen['fallos'] == {('PBTD01', 'FileNotFoundError'): 1, ('PBTD01', 'KeyError'): 1}
+
+
+def test_texto_prometheus():
+    metricas = MetricasLote()
+    for duracion in (0.01, 0.3, 100.0):
+        metricas.registrar('PBTD"03', duracion)
+    texto = metricas.texto_prometheus()
+
+    assert 'pypbtdcev_archivos_total{plantilla="PBTD\\"03"} 3' in texto
+    # Histograma acumulado: 1 hasta 0.05 s, 2 hasta 0.5 s y 3 en +Inf
+    assert 'pypbtdcev_archivo_latencia_segundos_bucket{plantilla="PBTD\\"03",le="0.05"} 1' in texto
+    assert 'pypbtdcev_archivo_latencia_segundos_bucket{plantilla="PBTD\\"03",le="0.5"} 2' in texto
+    assert 'pypbtdcev_archivo_latencia_segundos_bucket{plantilla="PBTD\\"03",le="+Inf"} 3' in texto
+
+
+def test_servir_y_escribir(tmp_path):
+    metricas = MetricasLote()
+    metricas.registrar('PBTD01', 0.1)
+    servidor = metricas.servir(puerto=0)
+    try:
+        url = f'http://127.0.0.1:{servidor.server_address[1]}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as respuesta:
+            assert respuesta.headers['Content-Type'] == CONTENT_TYPE
+            texto = respuesta.read().decode('utf-8')
+        assert 'pypbtdcev_archivos_total{plantilla="PBTD01"} 1' in texto
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    ruta = tmp_path / 'metricas.prom'
+    metricas.escribir(str(ruta))
+    assert 'pypbtdcev_archivos_total{plantilla="PBTD01"} 1' in ruta.read_text(encoding='utf-8')
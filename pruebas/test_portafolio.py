@@ -0,0 +1,35 @@
+# Archivo: pruebas/test_portafolio.py
+
+import pandas as pd
+
+from pypbtdcev.portafolio import ConstructorPortafolio, DiccionarioCategorias
+
+
+def test_codigos_estables_entre_lotes(tmp_path):
+    categorias = DiccionarioCategorias()
+    primero = categorias.codificar('comuna', ['Temuco', None, 'Osorno'])
+    segundo = categorias.codificar('comuna', ['Arica', 'Temuco'])
+    assert list(primero.codes) == [0, -1, 1]
+    assert list(segundo.codes) == [2, 0]
+
+    ruta = str(tmp_path / 'categorias.json')
+    categorias.guardar(ruta)
+    cargadas = DiccionarioCategorias.cargar(ruta)
+    assert list(cargadas.codificar('comuna', ['Osorno']).codes) == [1]
+
+
+def test_construir_por_lotes(tmp_path, rutas_pbtd01, _planillas_01):
+    ilegible = tmp_path / 'ilegible.xlsx'
+    ilegible.write_bytes(b'no es una planilla')
+    constructor = ConstructorPortafolio()
+
+    lotes = list(constructor.lotes(rutas_pbtd01 + [str(ilegible)], tamano_lote=3))
+    assert [len(lote['proyecto']) for lote in lotes] == [3, 1]
+
+    portafolio = constructor.concatenar(lotes)
+    proyecto = portafolio['proyecto']
+    assert isinstance(proyecto['comuna'].dtype, pd.CategoricalDtype)
+    comunas = [d['CEV-CEVE']['datos_generales_proyecto']['comuna'] for d in _planillas_01.values()]
+    assert list(proyecto['comuna'].astype(object)) == comunas
+    assert list(proyecto['id_vivienda']) == [f'pbtd01_{i}' for i in range(len(rutas_pbtd01))]
+    assert len(portafolio['muros']) > 0
@@ -0,0 +1,41 @@
+# Archivo: pruebas/test_registros.py
+
+import numpy as np
+import pytest
+
+from pypbtdcev.lector import LectorPBTD01_v2
+from pypbtdcev.registros import RegistroBase, TablaColumnar, a_diccionarios, compactar_tabla
+
+
+@pytest.mark.parametrize('formato', ['registros', 'columnar'])
+def test_formatos_equivalen_a_diccionarios(rutas_pbtd01, _planillas_01, formato):
+    datos = LectorPBTD01_v2(rutas_pbtd01[0], formato_tablas=formato).datos_extraidos
+    assert a_diccionarios(datos) == _planillas_01['v0']
+
+
+def test_registros_comparten_tipo_y_se_leen_como_diccionario():
+    filas = [{'nombre': 'M1', 'u': 0.5}, {'nombre': 'M2', 'u': None}]
+    registros = compactar_tabla('muros', filas, 'registros')
+    assert type(registros[0]) is type(compactar_tabla('muros', filas[:1], 'registros')[0])
+    assert isinstance(registros[0], RegistroBase) and not hasattr(registros[0], '__dict__')
+
+    assert registros[0]['u'] == 0.5 and registros[1].get('u', 1.0) is None
+    assert registros[0].get('falta', 1.0) == 1.0 and 'falta' not in registros[0]
+    with pytest.raises(KeyError):
+        registros[0]['falta']
+    assert registros == filas
+
+
+def test_tabla_columnar():
+    filas = [{'nombre': 'M1', 'u': 0.5}, {'nombre': 'M2', 'u': None}, {'nombre': 'M3', 'u': 2.0}]
+    tabla = TablaColumnar.desde_filas(filas)
+    np.testing.assert_array_equal(tabla.columna('u'), [0.5, np.nan, 2.0])
+    assert tabla.columna('nombre') == ['M1', 'M2', 'M3']
+    assert (len(tabla), tabla[-1], tabla[1:]) == (3, filas[2], filas[1:])
+    with pytest.raises(IndexError):
+        tabla[3]
+
+
+def test_formato_desconocido(rutas_pbtd01):
+    with pytest.raises(ValueError):
+        LectorPBTD01_v2(rutas_pbtd01[0], formato_tablas='parquet')
@@ -0,0 +1,89 @@
+# Archivo: pruebas/test_serializacion.py
+
+import json
+
+import numpy as np
+import pytest
+
+from pypbtdcev.lector import LectorPBTD03_v2
+from pypbtdcev.serializacion import (FILAS_POR_FRAGMENTO, FORMATO_TABLA, EscritorJSONL,
+                                     leer_jsonl, serializar)
+
+
+def _ida_y_vuelta(ruta, datos, arreglos=False, **metadatos):
+    with EscritorJSONL(ruta) as escritor:
+        escritor.escribir_planilla(datos, **metadatos)
+    (registro,) = leer_jsonl(ruta, arreglos=arreglos)
+    return registro
+
+
+def _sin_compactar(datos):
+    """`datos` tal como queda en JSON con 'Resultados' como lista de diccionarios."""
+    return json.loads(''.join(serializar({'datos': datos}, resultados_compactos=False)))['datos']
+
+
+def _resultados_sinteticos(n):
+    """'Resultados' como lista de diccionarios, con celdas vacías (NaN) y texto."""
+    filas = []
+    for i in range(n):
+        filas.append({'hora': i + 1, 'caso': 'Caso Propuesto' if i % 2 else 'Caso Base',
+                      'temperatura_c': float('nan') if i % 7 == 0 else 18.0 + i / 10,
+                      'demanda_kwh': i * 0.25})
+    return filas
+
+
+def test_pbtd01(planillas_01, tmp_path):
+    datos = planillas_01['v0']
+    registro = _ida_y_vuelta(str(tmp_path / 'p.jsonl'), datos, archivo='v0.xlsx', tipo='PBTD01')
+    assert registro['archivo'] == 'v0.xlsx' and registro['tipo'] == 'PBTD01'
+    assert registro['datos'] == datos
+
+
+def test_resultados_compactos(planillas_01, tmp_path):
+    datos = planillas_01['v1']
+    datos['Resultados'] = _resultados_sinteticos(2 * FILAS_POR_FRAGMENTO + 3)
+    ruta = str(tmp_path / 'p.jsonl')
+    registro = _ida_y_vuelta(ruta, datos)
+
+    with open(ruta, encoding='utf-8') as f:
+        crudo = json.loads(f.readline())
+    assert crudo['datos']['Resultados']['_formato'] == FORMATO_TABLA
+    assert len(crudo['datos']['Resultados']['filas']) == len(datos['Resultados'])
+
+    resultados = registro['datos']['Resultados']
+    assert resultados[0]['temperatura_c'] is None
+    assert resultados == _sin_compactar(datos)['Resultados']
+
+
+def test_resultados_arreglo(planillas_01, tmp_path):
+    datos = planillas_01['v2']
+    valores = np.arange(3 * (FILAS_POR_FRAGMENTO + 5), dtype=np.float64).reshape(-1, 3) / 4
+    valores[::5, 1] = np.nan
+    caso = np.array(['Caso Base', 'Caso Propuesto'] * (len(valores) // 2) + ['Caso Base'], dtype=object)
+    datos['Resultados'] = {'columnas': ['a', 'b', 'c'], 'valores': valores, 'caso': caso}
+
+    resultados = _ida_y_vuelta(str(tmp_path / 'p.jsonl'), datos, arreglos=True)['datos']['Resultados']
+    assert resultados['columnas'] == ['a', 'b', 'c']
+    np.testing.assert_array_equal(resultados['valores'], valores)
+    np.testing.assert_array_equal(resultados['caso'], caso)
+
+
+def test_pbtd03(datos_pbtd03, tmp_path):
+    registro = _ida_y_vuelta(str(tmp_path / 'p.jsonl'), datos_pbtd03, tipo='PBTD03')
+    assert registro['datos'] == _sin_compactar(datos_pbtd03)
+
+
+def test_pbtd03_arreglo(ruta_pbtd03, tmp_path):
+    datos = LectorPBTD03_v2(ruta_pbtd03, resultados_como_arreglo=True).datos_extraidos
+    registro = _ida_y_vuelta(str(tmp_path / 'p.jsonl'), datos, arreglos=True)
+    original, leido = datos['Resultados'], registro['datos']['Resultados']
+    assert leido['columnas'] == list(original['columnas'])
+    np.testing.assert_array_equal(leido['valores'], original['valores'])
+    assert {k: v for k, v in registro['datos'].items() if k != 'Resultados'} == \
+        _sin_compactar({k: v for k, v in datos.items() if k != 'Resultados'})
+
+
+@pytest.mark.parametrize('valor', [float('nan'), float('inf'), -float('inf')])
+def test_no_finitos_a_null(valor, tmp_path):
+    registro = _ida_y_vuelta(str(tmp_path / 'p.jsonl'), {'x': [valor, np.float64(1.5)]})
+    assert registro['datos'] == {'x': [None, 1.5]}
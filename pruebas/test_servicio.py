@@ -0,0 +1,64 @@
+# Archivo: pruebas/test_servicio.py
+
+import http.client
+import json
+
+import pytest
+
+from pypbtdcev.servicio import ClientePBTD, ErrorServicio, ServicioPBTD
+
+
+@pytest.fixture(scope='module')
+def servicio_http():
+    with ServicioPBTD(procesos=1) as servicio:
+        servidor = servicio.iniciar(puerto=0)
+        yield servicio, servidor.server_address[1]
+
+
+def _post(puerto, ruta, cuerpo, **cabeceras):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+    try:
+        conexion.request('POST', ruta, body=json.dumps(cuerpo).encode('utf-8'), headers=cabeceras)
+        respuesta = conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read())
+    finally:
+        conexion.close()
+
+
+def test_leer_y_sondear(servicio_http, rutas_pbtd01, _planillas_01):
+    _, puerto = servicio_http
+    cliente = ClientePBTD(f'http://127.0.0.1:{puerto}')
+    respuesta = cliente.leer(rutas_pbtd01[0], formato_tablas='columnar')
+    assert (respuesta['tipo'], respuesta['datos']) == ('PBTD01', _planillas_01['v0'])
+    assert cliente.sondear(rutas_pbtd01[0])['tipo'] == 'PBTD01'
+
+
+def test_opciones_no_admitidas(servicio_http, rutas_pbtd01):
+    _, puerto = servicio_http
+    with pytest.raises(ErrorServicio) as error:
+        ClientePBTD(f'http://127.0.0.1:{puerto}').leer(rutas_pbtd01[0], filepath='/etc/passwd')
+    assert (error.value.estado, error.value.detalle['error']) == (400, 'OpcionDesconocida')
+
+
+@pytest.mark.parametrize('cabeceras, estado', [
+    ({}, 415),
+    ({'Content-Type': 'text/plain'}, 415),
+    ({'Content-Type': 'application/json', 'Origin': 'http://ejemplo.com'}, 403),
+    ({'Content-Type': 'application/json', 'Host': 'ejemplo.com:8765'}, 403),
+])
+def test_pedidos_de_navegador_rechazados(servicio_http, rutas_pbtd01, cabeceras, estado):
+    _, puerto = servicio_http
+    assert _post(puerto, '/sondear', {'ruta': rutas_pbtd01[0]}, **cabeceras)[0] == estado
+
+
+def test_socket_unix_y_cierre(tmp_path, rutas_pbtd01):
+    ruta_socket = str(tmp_path / 's.sock')
+    servicio = ServicioPBTD(procesos=1)
+    servicio.iniciar(socket_unix=ruta_socket)
+    try:
+        assert ClientePBTD(socket_unix=ruta_socket).salud()['procesos'] == 1
+    finally:
+        servicio.cerrar()
+    # Con el grupo cerrado no se queda esperando un trabajador libre
+    estado, cuerpo = servicio.atender('leer', {'ruta': rutas_pbtd01[0]})
+    assert (estado, json.loads(cuerpo)['error']) == (503, 'ServicioCerrado')
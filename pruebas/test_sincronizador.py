@@ -0,0 +1,52 @@
+# Archivo: pruebas/test_sincronizador.py
+
+import os
+import shutil
+
+from pypbtdcev.sincronizador import SincronizadorDirectorio
+
+
+def _eventos(sincronizador):
+    return sorted((e['evento'], os.path.basename(e['ruta'])) for e in sincronizador.sincronizar())
+
+
+def test_solo_se_leen_los_cambios(tmp_path, rutas_pbtd01):
+    directorio = tmp_path / 'planillas'
+    directorio.mkdir()
+    shutil.copy(rutas_pbtd01[0], directorio / 'a.xlsx')
+    shutil.copy(rutas_pbtd01[1], directorio / 'b.xlsx')
+    (directorio / '~$a.xlsx').write_bytes(b'')
+    manifiesto = str(tmp_path / 'manifiesto.json')
+
+    eventos = list(SincronizadorDirectorio(str(directorio), manifiesto).sincronizar())
+    assert sorted(os.path.basename(e['ruta']) for e in eventos) == ['a.xlsx', 'b.xlsx']
+    assert all(e['tipo'] == 'PBTD01' and e['datos'] for e in eventos)
+
+    # Otra instancia retoma el manifiesto guardado
+    sincronizador = SincronizadorDirectorio(str(directorio), manifiesto)
+    assert _eventos(sincronizador) == []
+
+    os.utime(directorio / 'a.xlsx', (1, 1))
+    shutil.copy(rutas_pbtd01[2], directorio / 'b.xlsx')
+    shutil.copy(rutas_pbtd01[3], directorio / 'c.xlsx')
+    assert _eventos(sincronizador) == [('agregado', 'c.xlsx'), ('modificado', 'b.xlsx')]
+
+    os.remove(directorio / 'c.xlsx')
+    assert _eventos(sincronizador) == [('eliminado', 'c.xlsx')]
+
+
+def test_pasada_cortada_reemite_el_archivo(tmp_path, rutas_pbtd01):
+    directorio = tmp_path / 'planillas'
+    directorio.mkdir()
+    shutil.copy(rutas_pbtd01[0], directorio / 'a.xlsx')
+    shutil.copy(rutas_pbtd01[1], directorio / 'b.xlsx')
+    manifiesto = str(tmp_path / 'manifiesto.json')
+
+    pasada = SincronizadorDirectorio(str(directorio), manifiesto).sincronizar()
+    primero = next(pasada)
+    pasada.close()
+
+    # El evento recibido no se confirmó, así que se vuelve a emitir
+    eventos = _eventos(SincronizadorDirectorio(str(directorio), manifiesto))
+    assert ('agregado', os.path.basename(primero['ruta'])) in eventos
+    assert len(eventos) == 2
@@ -0,0 +1,85 @@
+# Archivo: pruebas/tiempo_importacion.py
+
+# Benchmark del tiempo de arranque (importación en frío) de pypbtdcev.
+#
+# Cada medición corre en un intérprete nuevo, así que incluye todo lo que
+# paga una invocación aislada (ej: una función serverless por archivo):
+#   - importar cada módulo del paquete, y qué dependencias pesadas
+#     (pandas, numpy, openpyxl) quedan cargadas después,
+#   - una consulta de metadatos (tipo_planilla) sobre la plantilla 03,
+#   - como referencia, importar pandas, numpy y openpyxl directamente, que
+#     es lo que antes pagaba cualquier `import pypbtdcev.lector`.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m pruebas.tiempo_importacion
+#   python -m pruebas.tiempo_importacion --repeticiones 10
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .corpus_sintetico import RUTA_PLANTILLA_03
+
+MODULOS = [
+    'pypbtdcev', 'pypbtdcev.utilidades', 'pypbtdcev.lector', 'pypbtdcev.escritor',
+    'pypbtdcev.exportador', 'pypbtdcev.portafolio', 'pypbtdcev.analitica',
+    'pypbtdcev.almacen', 'pypbtdcev.indice', 'pypbtdcev.memoria_compartida',
+    'pypbtdcev.aislamiento', 'pypbtdcev.metricas'
+]
+
+PESADOS = ('pandas', 'numpy', 'openpyxl')
+
+# Se ejecuta en el intérprete nuevo: mide y devuelve el resultado en JSON.
+_PLANTILLA_MEDICION = '''
+import json, sys, time
+inicio = time.perf_counter()
+{codigo}
+duracion = time.perf_counter() - inicio
+print(json.dumps({{'s': duracion, 'pesados': [m for m in {pesados!r} if m in sys.modules]}}))
+'''
+
+ESCENARIOS = {f'import {m}': f'import {m}' for m in MODULOS}
+ESCENARIOS['consulta tipo_planilla'] = (
+    'from pypbtdcev.utilidades import tipo_planilla\n'
+    f'tipo_planilla({RUTA_PLANTILLA_03!r})')
+ESCENARIOS['referencia: import pandas, numpy, openpyxl'] = 'import pandas, numpy, openpyxl'
+
+
+def _medir_una_vez(codigo):
+    entorno = dict(os.environ)
+    raiz_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    entorno['PYTHONPATH'] = os.pathsep.join(p for p in (raiz_src, entorno.get('PYTHONPATH')) if p)
+    salida = subprocess.run(
+        [sys.executable, '-c', _PLANTILLA_MEDICION.format(codigo=codigo, pesados=PESADOS)],
+        capture_output=True, text=True, env=entorno, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir(repeticiones=5):
+    """Devuelve {escenario: (mediana_s, dependencias_pesadas_cargadas)}."""
+    resultados = {}
+    for escenario, codigo in ESCENARIOS.items():
+        mediciones = [_medir_una_vez(codigo) for _ in range(repeticiones)]
+        resultados[escenario] = (statistics.median(m['s'] for m in mediciones),
+                                 mediciones[-1]['pesados'])
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de importación en frío de pypbtdcev.')
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help='Intérpretes nuevos por escenario (se informa la mediana).')
+    args = parser.parse_args(argv)
+
+    print(f"--- TIEMPO DE IMPORTACIÓN (mediana de {args.repeticiones} intérpretes nuevos) ---")
+    for escenario, (segundos, pesados) in medir(args.repeticiones).items():
+        cargados = ', '.join(pesados) if pesados else '-'
+        print(f"{escenario:50s} {segundos * 1000:8.1f} ms   pesados: {cargados}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
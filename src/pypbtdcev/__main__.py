@@ -0,0 +1,6 @@
+# Permite ejecutar el comando como `python -m pypbtdcev ...`
+import sys
+
+from .cli import main
+
+sys.exit(main())
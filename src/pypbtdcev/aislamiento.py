@@ -0,0 +1,258 @@
+# ----------------------------
+# -------- AISLAMIENTO -------
+# ----------------------------
+
+import collections
+import logging
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+from .lector import LectorPBTD
+from .metricas import tamano_archivo
+
+logger = logging.getLogger(__name__)
+
+# Tipos de error que no vienen de una excepción del lector.
+TIEMPO_AGOTADO = 'TiempoAgotado'
+TRABAJADOR_TERMINADO = 'TrabajadorTerminado'
+
+
+class ErrorLectura:
+    """
+    Registro de un archivo que no se pudo leer.
+    - `tipo`: nombre de la excepción (ej: 'MemoryError', 'KeyError') o uno de
+      TIEMPO_AGOTADO, TRABAJADOR_TERMINADO o TIPO_DESCONOCIDO (ver lector.py).
+    - `mensaje`: descripción del error.
+    """
+    __slots__ = ('tipo', 'mensaje')
+
+    def __init__(self, tipo, mensaje=''):
+        self.tipo = tipo
+        self.mensaje = mensaje
+
+    def __repr__(self):
+        return f"ErrorLectura({self.tipo!r}, {self.mensaje!r})"
+
+
+class ResultadoLectura:
+    """
+    Resultado de leer un archivo en un trabajador aislado. `datos` es
+    `datos_extraidos` (None si falló) y `error` es un ErrorLectura o None.
+    """
+    __slots__ = ('indice', 'ruta', 'tipo_planilla', 'datos', 'error', 'duracion_s')
+
+    def __init__(self, indice, ruta, tipo_planilla, datos, error, duracion_s):
+        self.indice = indice
+        self.ruta = ruta
+        self.tipo_planilla = tipo_planilla
+        self.datos = datos
+        self.error = error
+        self.duracion_s = duracion_s
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        estado = 'ok' if self.ok else repr(self.error)
+        return f"ResultadoLectura({self.ruta!r}, {estado}, {self.duracion_s:.2f} s)"
+
+
+# -----------------------------
+# --- Lado del trabajador ---
+# -----------------------------
+
+def _limitar_memoria(limite_bytes):
+    """
+    Limita el espacio de direcciones del proceso (RLIMIT_AS). Al superarlo,
+    las asignaciones fallan con MemoryError en lugar de agotar la máquina.
+    """
+    try:
+        import resource
+    except ImportError:
+        logger.warning("⚠️ ADVERTENCIA: El módulo 'resource' no está disponible "
+                       "en esta plataforma; no se aplica el límite de memoria.")
+        return
+    _, maximo = resource.getrlimit(resource.RLIMIT_AS)
+    if maximo != resource.RLIM_INFINITY:
+        limite_bytes = min(limite_bytes, maximo)
+    resource.setrlimit(resource.RLIMIT_AS, (limite_bytes, maximo))
+
+
+def _leer(ruta, opciones):
+    """Devuelve (tipo_planilla, datos, tipo_error, mensaje)."""
+    return LectorPBTD(**opciones).leer_con_error(ruta)
+
+
+def _bucle_trabajador(conexion, limite_memoria, opciones, nivel_registro):
+    """
+    Recibe (indice, ruta) hasta recibir None y responde
+    (indice, tipo_planilla, datos, tipo_error, mensaje, duracion_s).
+    """
+    logging.getLogger('pypbtdcev').setLevel(nivel_registro)
+    if limite_memoria:
+        _limitar_memoria(limite_memoria)
+    try:
+        while True:
+            tarea = conexion.recv()
+            if tarea is None:
+                break
+            indice, ruta = tarea
+            inicio = time.perf_counter()
+            try:
+                tipo, datos, error, mensaje = _leer(ruta, opciones)
+            except BaseException as e:
+                tipo, datos, error, mensaje = None, None, type(e).__name__, str(e)
+            duracion = time.perf_counter() - inicio
+            try:
+                conexion.send((indice, tipo, datos, error, mensaje, duracion))
+            except MemoryError:
+                conexion.send((indice, tipo, None, 'MemoryError',
+                               'Sin memoria al enviar los datos.', duracion))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conexion.close()
+
+
+# --------------------------
+# --- Lado del padre ---
+# --------------------------
+
+class _Trabajador:
+    __slots__ = ('proceso', 'conexion', 'tarea', 'limite', 'inicio', 'atendidos')
+
+    def __init__(self, contexto, objetivo, args):
+        """`objetivo(conexion, *args)` es el bucle del proceso (ej: _bucle_trabajador)."""
+        self.conexion, extremo_hijo = contexto.Pipe(duplex=True)
+        self.proceso = contexto.Process(target=objetivo, args=(extremo_hijo,) + tuple(args),
+                                        daemon=True)
+        self.proceso.start()
+        extremo_hijo.close()
+        self.tarea = None
+        self.limite = None
+        self.inicio = None
+        self.atendidos = 0
+
+    def asignar(self, indice, ruta, timeout_s):
+        self.tarea = (indice, ruta)
+        self.inicio = time.perf_counter()
+        self.limite = self.inicio + timeout_s if timeout_s else None
+        self.atendidos += 1
+        self.conexion.send(self.tarea)
+
+    def detener(self):
+        """Termina el proceso sin esperar que acabe su tarea."""
+        if self.proceso.is_alive():
+            self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+    def retirar(self):
+        """Pide al proceso que termine después de su tarea actual (ya no tiene)."""
+        try:
+            self.conexion.send(None)
+        except OSError:
+            pass
+        self.proceso.join(5)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join()
+        self.conexion.close()
+
+
+def leer_aislado(rutas, procesos=None, timeout_s=300, memoria_max_bytes=None,
+                 archivos_por_trabajador=500, metricas=None, nivel_registro=logging.CRITICAL,
+                 **opciones):
+    """
+    Lee planillas PBTD01/PBTD03 en procesos de trabajo aislados y entrega un
+    `ResultadoLectura` por archivo, a medida que terminan (usar `.indice`
+    para el orden original). Un archivo problemático nunca detiene el lote:
+
+    - `timeout_s`: tiempo máximo por archivo; al superarlo, el trabajador se
+      termina, se reemplaza y el archivo queda con error TIEMPO_AGOTADO.
+    - `memoria_max_bytes`: límite del espacio de direcciones de cada
+      trabajador (RLIMIT_AS, solo Unix). Incluye las bibliotecas cargadas
+      (~300 MB con pandas), así que conviene dejar margen. Al superarlo, la
+      lectura falla con 'MemoryError' y el trabajador se reemplaza.
+    - `archivos_por_trabajador`: cada trabajador se recicla tras esa cantidad
+      de archivos, para devolver la memoria fragmentada al sistema.
+    - `metricas`: un `MetricasLote` donde registrar cada archivo.
+    - `nivel_registro`: nivel del logger 'pypbtdcev' en los trabajadores; por
+      defecto los errores no se muestran, llegan como `ErrorLectura`.
+    - `opciones`: argumentos para LectorPBTD, que se aplican a PBTD01 y PBTD03
+      (ej: modo_liviano=True, formato_tablas='registros').
+    """
+    procesos = procesos or multiprocessing.cpu_count()
+    metodos = multiprocessing.get_all_start_methods()
+    # 'fork' hereda pandas/openpyxl ya importados: el trabajador parte al instante
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else 'spawn')
+
+    def nuevo():
+        return _Trabajador(contexto, _bucle_trabajador,
+                           (memoria_max_bytes, opciones, nivel_registro))
+
+    pendientes = collections.deque(enumerate(rutas))
+    libres = []
+    ocupados = {}  # conexión -> trabajador
+
+    def resultado(trabajador, tipo, datos, error, mensaje, duracion):
+        indice, ruta = trabajador.tarea
+        trabajador.tarea = None
+        if metricas is not None:
+            metricas.registrar(tipo or 'desconocida', duracion, tamano_archivo(ruta), error)
+        return ResultadoLectura(indice, ruta, tipo, datos,
+                                ErrorLectura(error, mensaje) if error else None, duracion)
+
+    def liberar(trabajador, reemplazar):
+        del ocupados[trabajador.conexion]
+        if reemplazar:
+            trabajador.detener()
+            trabajador = nuevo()
+        elif archivos_por_trabajador and trabajador.atendidos >= archivos_por_trabajador:
+            trabajador.retirar()
+            trabajador = nuevo()
+        libres.append(trabajador)
+
+    try:
+        while pendientes or ocupados:
+            # Asignar archivos a los trabajadores libres (se crean a demanda)
+            while pendientes and (libres or len(ocupados) < procesos):
+                trabajador = libres.pop() if libres else nuevo()
+                indice, ruta = pendientes.popleft()
+                trabajador.asignar(indice, ruta, timeout_s)
+                ocupados[trabajador.conexion] = trabajador
+
+            ahora = time.perf_counter()
+            limites = [t.limite for t in ocupados.values() if t.limite is not None]
+            espera = max(0.0, min(limites) - ahora) if limites else None
+            for conexion in wait(list(ocupados), timeout=espera):
+                trabajador = ocupados[conexion]
+                try:
+                    _, tipo, datos, error, mensaje, duracion = conexion.recv()
+                except (EOFError, OSError):
+                    # El proceso murió (ej: señal del sistema por falta de memoria)
+                    trabajador.proceso.join()
+                    duracion = time.perf_counter() - trabajador.inicio
+                    yield resultado(trabajador, None, None, TRABAJADOR_TERMINADO,
+                                    f"El trabajador terminó con código {trabajador.proceso.exitcode}.",
+                                    duracion)
+                    liberar(trabajador, reemplazar=True)
+                    continue
+                yield resultado(trabajador, tipo, datos, error, mensaje, duracion)
+                # Tras un MemoryError (o ArrowMemoryError) el proceso puede quedar en mal estado
+                liberar(trabajador, reemplazar=bool(error) and error.endswith('MemoryError'))
+
+            ahora = time.perf_counter()
+            for trabajador in list(ocupados.values()):
+                if trabajador.limite is not None and ahora >= trabajador.limite:
+                    yield resultado(trabajador, None, None, TIEMPO_AGOTADO,
+                                    f"Se superaron {timeout_s} s; el trabajador se reinició.",
+                                    ahora - trabajador.inicio)
+                    liberar(trabajador, reemplazar=True)
+    finally:
+        for trabajador in list(ocupados.values()):
+            trabajador.detener()
+        for trabajador in libres:
+            trabajador.retirar()
@@ -0,0 +1,249 @@
+# ----------------------------
+# --------- ALMACÉN ----------
+# ----------------------------
+
+import collections
+import json
+import logging
+import os
+import re
+
+from .lector import LectorPBTD03_v2
+from .utilidades import hash_archivo, modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+# Filas de la tabla horaria (filas 6 a 3124 de la hoja 'Resultados').
+FILAS_RESULTADOS = 3119
+
+# Campos de 'datos_generales_proyecto' que se guardan en el índice.
+CAMPOS_INDICE = ['region', 'comuna', 'zona_termica_proyecto']
+
+
+class AlmacenResultados:
+    """
+    Almacén en disco, de solo agregado, para la tabla horaria 'Resultados'
+    de muchas viviendas.
+
+    Cada columna se guarda como un archivo binario float64 por partición
+    (zona térmica). Dentro de un archivo cada vivienda ocupa un bloque fijo
+    de FILAS_RESULTADOS valores, así que una columna de una partición se
+    lee como una matriz memory-mapped (viviendas, filas) sin copiar datos.
+
+    Estructura del directorio:
+        raiz/esquema.json            -> columnas y filas por vivienda
+        raiz/indice.jsonl            -> una línea por vivienda
+        raiz/zona=<Z>/<k>.f64        -> columna k de la partición Z
+
+    Una vivienda ya indexada (mismo id, o mismo contenido de archivo al
+    usar `ingresar`) no se vuelve a agregar.
+    """
+
+    def __init__(self, raiz, filas=FILAS_RESULTADOS):
+        self.raiz = raiz
+        os.makedirs(raiz, exist_ok=True)
+        self._ruta_esquema = os.path.join(raiz, 'esquema.json')
+        self._ruta_indice = os.path.join(raiz, 'indice.jsonl')
+
+        if os.path.exists(self._ruta_esquema):
+            with open(self._ruta_esquema, encoding='utf-8') as f:
+                esquema = json.load(f)
+            self.columnas = esquema['columnas']
+            self.filas = esquema['filas']
+        else:
+            self.columnas = None
+            self.filas = filas
+
+        self.indice = []
+        if os.path.exists(self._ruta_indice):
+            with open(self._ruta_indice, encoding='utf-8') as f:
+                self.indice = [json.loads(linea) for linea in f if linea.strip()]
+        # Viviendas por partición, y entradas por id y por hash del archivo
+        self._conteos = collections.Counter(e['particion'] for e in self.indice)
+        self._por_id = {e['id']: e for e in self.indice}
+        self._por_hash = {e['hash']: e for e in self.indice if e.get('hash')}
+
+    # ------------------------
+    # --- Rutas y esquema ---
+    # ------------------------
+
+    @staticmethod
+    def _nombre_particion(zona):
+        """Convierte la zona térmica en un nombre de carpeta seguro."""
+        if zona is None or str(zona).strip() == '':
+            return 'sin_zona'
+        return re.sub(r'[^A-Za-z0-9_-]', '_', str(zona).strip())
+
+    def _ruta_columna(self, particion, k):
+        return os.path.join(self.raiz, f'zona={particion}', f'{k}.f64')
+
+    def _guardar_esquema(self):
+        with open(self._ruta_esquema, 'w', encoding='utf-8') as f:
+            json.dump({'columnas': self.columnas, 'filas': self.filas}, f)
+
+    def _viviendas_en_particion(self, particion):
+        return self._conteos[particion]
+
+    # -----------------
+    # --- Ingreso ---
+    # -----------------
+
+    def agregar(self, id_vivienda, tabla, datos_generales=None, archivo=None, hash_contenido=None):
+        """
+        Agrega la tabla horaria de una vivienda.
+        `tabla` es la salida de `_parsear_hoja_resultados_arreglo`
+        ({'columnas', 'valores', 'caso'}). Si `id_vivienda` ya está en el
+        almacén, no se agrega y se devuelve la entrada existente.
+        """
+        if id_vivienda in self._por_id:
+            logger.warning(f"⚠️ ADVERTENCIA: La vivienda '{id_vivienda}' ya está en el almacén, se omite.")
+            return self._por_id[id_vivienda]
+        if tabla['valores'].shape[0] > self.filas:
+            raise ValueError(f"La tabla de '{id_vivienda}' tiene {tabla['valores'].shape[0]} filas; "
+                             f"el almacén guarda {self.filas} por vivienda.")
+
+        datos_generales = datos_generales or {}
+        if self.columnas is None:
+            self.columnas = list(tabla['columnas'])
+            self._guardar_esquema()
+
+        particion = self._nombre_particion(
+            datos_generales.get('zona_termica_proyecto'))
+        posicion = self._viviendas_en_particion(particion)
+        os.makedirs(os.path.join(self.raiz, f'zona={particion}'), exist_ok=True)
+
+        # Alinear las columnas de la tabla con el esquema del almacén
+        bloque = np.full((self.filas, len(self.columnas)), np.nan)
+        n = min(self.filas, tabla['valores'].shape[0])
+        for k, col in enumerate(self.columnas):
+            if col in tabla['columnas']:
+                bloque[:n, k] = tabla['valores'][:n, tabla['columnas'].index(col)]
+
+        bytes_bloque = self.filas * 8
+        for k in range(len(self.columnas)):
+            ruta = self._ruta_columna(particion, k)
+            with open(ruta, 'ab') as f:
+                # Descartar restos de un agregado interrumpido
+                f.truncate(posicion * bytes_bloque)
+                f.write(np.ascontiguousarray(bloque[:, k], dtype='<f8').tobytes())
+
+        # El índice se escribe al final: una vivienda existe solo si está indexada
+        entrada = {'id': id_vivienda, 'archivo': archivo, 'hash': hash_contenido,
+                   'particion': particion, 'posicion': posicion}
+        for campo in CAMPOS_INDICE:
+            entrada[campo] = datos_generales.get(campo)
+        with open(self._ruta_indice, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entrada, ensure_ascii=False, default=str) + '\n')
+        self.indice.append(entrada)
+        self._conteos[particion] += 1
+        self._por_id[id_vivienda] = entrada
+        if hash_contenido:
+            self._por_hash[hash_contenido] = entrada
+        return entrada
+
+    def ingresar(self, ruta, id_vivienda=None, metricas=None):
+        """
+        Lee una planilla PBTD03 y agrega su tabla horaria al almacén.
+        Devuelve la entrada del índice o None si no se pudo leer. Un archivo
+        con el mismo contenido que uno ya ingresado no se vuelve a leer.
+        Si se entrega `metricas` (MetricasLote), registra la planilla en ellas.
+        """
+        if metricas is None:
+            return self._ingresar(ruta, id_vivienda)[0]
+        with metricas.medir_archivo('PBTD03', ruta) as medicion:
+            entrada, error = self._ingresar(ruta, id_vivienda)
+            medicion.fallo(error)
+        return entrada
+
+    def _ingresar(self, ruta, id_vivienda):
+        """Devuelve (entrada, error); error es el tipo de excepción del lector o None."""
+        hash_contenido = hash_archivo(ruta)
+        if hash_contenido in self._por_hash:
+            logger.info(f"'{ruta}' ya está en el almacén, se omite.")
+            return self._por_hash[hash_contenido], None
+
+        lector = LectorPBTD03_v2(ruta, resultados_como_arreglo=True)
+        datos = lector.datos_extraidos
+        if not datos or datos.get('Resultados') is None:
+            logger.warning(f"⚠️ ADVERTENCIA: '{ruta}' no tiene 'Resultados', se omite.")
+            return None, lector.error or 'SinResultados'
+
+        cev = datos.get('CEV-CEVE') or {}
+        if id_vivienda is None:
+            id_vivienda = os.path.splitext(os.path.basename(ruta))[0]
+        entrada = self.agregar(id_vivienda, datos['Resultados'],
+                               cev.get('datos_generales_proyecto'), archivo=ruta,
+                               hash_contenido=hash_contenido)
+        return entrada, None
+
+    def ingresar_planillas(self, rutas, metricas=None):
+        """
+        Ingresa las planillas de a una, sin retener sus datos en memoria.
+        Devuelve la cantidad de viviendas agregadas (sin contar las que ya estaban).
+        """
+        antes = len(self.indice)
+        for ruta in rutas:
+            self.ingresar(ruta, metricas=metricas)
+        return len(self.indice) - antes
+
+    # -------------------
+    # --- Consultas ---
+    # -------------------
+
+    def viviendas(self, **filtros):
+        """
+        Devuelve las entradas del índice que cumplen todos los filtros
+        (ej: comuna='Temuco', zona_termica_proyecto='C').
+        """
+        return [e for e in self.indice
+                if all(e.get(k) == v for k, v in filtros.items())]
+
+    def vista(self, columna, zona):
+        """
+        Devuelve la columna de toda una zona térmica como matriz
+        memory-mapped de solo lectura (viviendas, filas), sin copiar datos.
+        """
+        return self._mapear(self._nombre_particion(zona), columna)
+
+    def _mapear(self, particion, columna):
+        n = self._viviendas_en_particion(particion)
+        if self.columnas is None or n == 0:
+            return np.empty((0, self.filas))
+        k = self.columnas.index(columna)
+        return np.memmap(self._ruta_columna(particion, k), dtype='<f8',
+                         mode='r', shape=(n, self.filas))
+
+    def consultar(self, columna, desde=0, hasta=None, zona=None, **filtros):
+        """
+        Devuelve (entradas, valores) de la columna en las filas [desde, hasta)
+        para las viviendas de la zona que cumplen los filtros.
+
+        Si solo se filtra por zona, 'valores' es una vista directa sobre el
+        archivo mapeado. Con filtros adicionales se copia únicamente el
+        bloque de las viviendas seleccionadas.
+        """
+        if zona is not None:
+            return self._consultar_particion(
+                self._nombre_particion(zona), columna, desde, hasta, filtros)
+
+        particiones = sorted({e['particion'] for e in self.viviendas(**filtros)})
+        partes = [self._consultar_particion(p, columna, desde, hasta, filtros)
+                  for p in particiones]
+        entradas = [e for p in partes for e in p[0]]
+        valores = np.concatenate([p[1] for p in partes]) if partes \
+            else np.empty((0, 0))
+        return entradas, valores
+
+    def _consultar_particion(self, particion, columna, desde, hasta, filtros):
+        en_particion = sorted((e for e in self.indice if e['particion'] == particion),
+                              key=lambda e: e['posicion'])
+        matriz = self._mapear(particion, columna)[:, desde:hasta]
+        if not filtros:
+            return en_particion, matriz
+
+        seleccion = [e for e in en_particion
+                     if all(e.get(k) == v for k, v in filtros.items())]
+        return seleccion, matriz[[e['posicion'] for e in seleccion]]
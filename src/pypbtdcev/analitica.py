@@ -0,0 +1,336 @@
+# ----------------------------
+# -------- ANALÍTICA ---------
+# ----------------------------
+
+from .lector import LectorPBTD03_v2
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+
+# Columnas de la hoja 'Resultados' tal como las nombra el lector.
+COL_MES = 'mes'
+COL_HORA = 'tiempo_0-23_[hrs]'
+COL_DEMANDA_CALEFACCION = 'demanda_calef_[wh]'
+COL_DEMANDA_REFRIGERACION = 'demanda_ref_[wh]'
+COL_HD_MENOS = 'hd_(-)'
+COL_HD_MAS = 'hd_(+)'
+
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+         'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+
+# Días de cada mes, igual a la fila 4 de la hoja 'Resumen'.
+DIAS_POR_MES = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Casos simulados en 'Resultados' (columna BG), en el orden del 'Resumen'.
+CASOS = [
+    'Caso Propuesto Con Clima', 'Caso Base 0° Con Clima', 'Caso Base 90° Con Clima',
+    'Caso Base 180° Con Clima', 'Caso Base 270° Con Clima',
+    'Caso Propuesto Sin Clima', 'Caso Base 0° Sin Clima', 'Caso Base 90° Sin Clima',
+    'Caso Base 180° Sin Clima', 'Caso Base 270° Sin Clima'
+]
+
+# Tablas mensuales del 'Resumen' que se pueden reconstruir desde 'Resultados':
+# tabla -> (columna horaria, multiplicar por días del mes y pasar a kWh)
+TABLAS_VERIFICABLES = {
+    '5_demanda_calefaccion_escenarios': (COL_DEMANDA_CALEFACCION, True),
+    '6_demanda_refrigeracion_escenarios': (COL_DEMANDA_REFRIGERACION, True),
+    '7_hd_menos_escenarios': (COL_HD_MENOS, False),
+    '8_hd_mas_escenarios': (COL_HD_MAS, False)
+}
+
+
+def normalizar_caso(texto):
+    """
+    Normaliza el nombre de un caso igual que las etiquetas de las tablas
+    mensuales del 'Resumen' (ej: 'Caso Base 0° Con Clima' -> 'caso_base_0_deg_con_clima').
+    """
+    label = str(texto).lower().strip()
+    label = (label.replace(' ', '_').replace('°', '_deg').replace('+', '_mas')
+                  .replace('-', '_menos').replace('.', '').replace('ñ', 'n'))
+    while '__' in label:
+        label = label.replace('__', '_')
+    return label
+
+
+CASOS_NORMALIZADOS = [normalizar_caso(c) for c in CASOS]
+
+
+def tabla_resultados(resultados):
+    """
+    Devuelve la tabla horaria en forma de arreglos ('columnas', 'valores', 'caso').
+    Acepta la salida de `_parsear_hoja_resultados_arreglo` (se devuelve tal cual)
+    o la lista de diccionarios de `_parsear_hoja_resultados`. En la lista, las
+    columnas con texto (fuera de la del caso) se omiten.
+    """
+    if resultados is None:
+        return None
+    if isinstance(resultados, dict):
+        return resultados
+
+    registros = list(resultados)
+    if not registros:
+        return {'columnas': [], 'valores': np.empty((0, 0)), 'caso': None}
+
+    columnas = list(registros[0].keys())
+    col_caso = next((c for c in columnas if c.startswith('caso')), None)
+    if col_caso is not None:
+        columnas.remove(col_caso)
+
+    try:
+        valores = np.array([[r.get(c) for c in columnas] for r in registros],
+                           dtype=np.float64)
+    except (ValueError, TypeError):
+        columnas, valores = _columnas_numericas(registros, columnas)
+    caso = None
+    if col_caso is not None:
+        caso = np.array([r.get(col_caso) for r in registros], dtype=object)
+    return {'columnas': columnas, 'valores': valores, 'caso': caso}
+
+
+def _columnas_numericas(registros, columnas):
+    """Convierte columna por columna y descarta las que no son numéricas."""
+    numericas, series = [], []
+    for c in columnas:
+        try:
+            series.append(np.array([r.get(c) for r in registros], dtype=np.float64))
+        except (ValueError, TypeError):
+            continue
+        numericas.append(c)
+    valores = np.column_stack(series) if series else np.empty((len(registros), 0))
+    return numericas, valores
+
+
+def _indices_grupo(tabla):
+    """
+    Calcula para cada fila el índice de grupo (caso * 12 + mes) y una
+    máscara con las filas válidas (caso conocido, mes 1-12 y hora < 24).
+    """
+    columnas = tabla['columnas']
+    valores = tabla['valores']
+    n_filas = valores.shape[0]
+
+    mes = valores[:, columnas.index(COL_MES)] if COL_MES in columnas \
+        else np.full(n_filas, np.nan)
+    hora = valores[:, columnas.index(COL_HORA)] if COL_HORA in columnas \
+        else np.zeros(n_filas)
+
+    caso_idx = np.full(n_filas, -1, dtype=np.int64)
+    if tabla['caso'] is not None:
+        etiquetas, inverso = np.unique(
+            np.array([normalizar_caso(c) if c is not None else '' for c in tabla['caso']]),
+            return_inverse=True)
+        posicion = np.array([CASOS_NORMALIZADOS.index(e) if e in CASOS_NORMALIZADOS else -1
+                             for e in etiquetas], dtype=np.int64)
+        caso_idx = posicion[inverso]
+
+    with np.errstate(invalid='ignore'):
+        valida = (caso_idx >= 0) & (mes >= 1) & (mes <= 12) & (hora < 24)
+    mes_idx = np.where(valida, mes, 1).astype(np.int64) - 1
+    grupo = np.where(valida, caso_idx * 12 + mes_idx, 0)
+    return grupo, valida
+
+
+def agregar_diario(resultados):
+    """
+    Suma cada columna horaria por caso y mes (un día representativo por mes).
+    Devuelve {'columnas', 'casos', 'valores', 'filas'} con 'valores' de forma
+    (n_casos, 12, n_columnas) y 'filas' (n_casos, 12) las horas de cada grupo.
+    Las celdas vacías cuentan como cero, igual que SUMIFS en la planilla.
+    """
+    tabla = tabla_resultados(resultados)
+    grupo, valida = _indices_grupo(tabla)
+    n_grupos = len(CASOS) * 12
+    valores = np.nan_to_num(tabla['valores'][valida], nan=0.0)
+
+    sumas = np.empty((n_grupos, valores.shape[1]))
+    for j in range(valores.shape[1]):
+        sumas[:, j] = np.bincount(grupo[valida], weights=valores[:, j],
+                                  minlength=n_grupos)
+
+    return {
+        'columnas': tabla['columnas'],
+        'casos': CASOS,
+        'valores': sumas.reshape(len(CASOS), 12, -1),
+        'filas': np.bincount(grupo[valida], minlength=n_grupos).reshape(len(CASOS), 12)
+    }
+
+
+def agregar_mensual(diario):
+    """
+    Escala los totales diarios de `agregar_diario` a totales mensuales
+    multiplicando por los días de cada mes.
+    """
+    return {
+        'columnas': diario['columnas'],
+        'casos': diario['casos'],
+        'valores': diario['valores'] * np.array(DIAS_POR_MES)[None, :, None],
+        'filas': diario['filas']
+    }
+
+
+def cargas_punta(resultados, columnas=(COL_DEMANDA_CALEFACCION, COL_DEMANDA_REFRIGERACION)):
+    """
+    Calcula el máximo horario de las columnas indicadas por caso y mes.
+    Devuelve {columna: arreglo (n_casos, 12)}; NaN si el grupo no tiene datos.
+    """
+    tabla = tabla_resultados(resultados)
+    grupo, valida = _indices_grupo(tabla)
+    n_grupos = len(CASOS) * 12
+
+    puntas = {}
+    for col in columnas:
+        if col not in tabla['columnas']:
+            continue
+        serie = tabla['valores'][valida, tabla['columnas'].index(col)]
+        maximo = np.full(n_grupos, -np.inf)
+        np.maximum.at(maximo, grupo[valida], np.nan_to_num(serie, nan=-np.inf))
+        maximo[np.isneginf(maximo)] = np.nan
+        puntas[col] = maximo.reshape(len(CASOS), 12)
+    return puntas
+
+
+def horas_confort(diario):
+    """
+    Cuenta las horas de disconfort HD(-) y HD(+) y las horas en confort
+    de cada caso y mes a partir de `agregar_diario`.
+    Devuelve {'hd_menos', 'hd_mas', 'confort'} con arreglos (n_casos, 12);
+    'confort' es NaN en los grupos sin filas.
+    """
+    columnas = diario['columnas']
+    valores = diario['valores']
+    ceros = np.zeros(valores.shape[:2])
+
+    hd_menos = valores[..., columnas.index(COL_HD_MENOS)] if COL_HD_MENOS in columnas else ceros
+    hd_mas = valores[..., columnas.index(COL_HD_MAS)] if COL_HD_MAS in columnas else ceros
+    filas = diario['filas']
+    return {
+        'hd_menos': hd_menos,
+        'hd_mas': hd_mas,
+        'confort': np.where(filas > 0, filas - hd_menos - hd_mas, np.nan)
+    }
+
+
+def verificar_resumen(resumen, diario, tolerancia_relativa=0.01, tolerancia_absoluta=0.01):
+    """
+    Compara las tablas mensuales del 'Resumen' con los totales recalculados
+    desde 'Resultados'. Devuelve una lista de diferencias; vacía si todo cuadra.
+    Cada diferencia es un diccionario con tabla, caso, mes, valor en el
+    'Resumen' y valor recalculado.
+    """
+    diferencias = []
+    tablas = (resumen or {}).get('tablas_mensuales') or {}
+    columnas = diario['columnas']
+
+    for nombre_tabla, (col, escalar) in TABLAS_VERIFICABLES.items():
+        tabla = tablas.get(nombre_tabla)
+        if not tabla or col not in columnas:
+            continue
+
+        recalculado = diario['valores'][..., columnas.index(col)]
+        if escalar:
+            recalculado = recalculado * np.array(DIAS_POR_MES)[None, :] / 1000
+
+        for etiqueta, fila in tabla.items():
+            if etiqueta not in CASOS_NORMALIZADOS:
+                continue
+            i = CASOS_NORMALIZADOS.index(etiqueta)
+            esperado = np.array([fila.get(m) for m in MESES], dtype=np.float64)
+            cuadra = np.isclose(esperado, recalculado[i], rtol=tolerancia_relativa,
+                                atol=tolerancia_absoluta) | np.isnan(esperado)
+            for m in np.flatnonzero(~cuadra):
+                diferencias.append({
+                    'tabla': nombre_tabla,
+                    'caso': etiqueta,
+                    'mes': MESES[m],
+                    'valor_resumen': float(esperado[m]),
+                    'valor_resultados': float(recalculado[i, m])
+                })
+    return diferencias
+
+
+def analizar_datos(datos):
+    """
+    Calcula los agregados y la verificación contra el 'Resumen' de un
+    `datos_extraidos` de PBTD03 ya leído.
+    """
+    resultados = datos.get('Resultados')
+    if resultados is None:
+        return None
+
+    diario = agregar_diario(resultados)
+    return {
+        'diario': diario,
+        'mensual': agregar_mensual(diario),
+        'cargas_punta': cargas_punta(resultados),
+        'horas_confort': horas_confort(diario),
+        'diferencias_resumen': verificar_resumen(datos.get('Resumen'), diario)
+    }
+
+
+def analizar_planilla(ruta):
+    """
+    Lee una planilla PBTD03 con 'Resultados' en forma de arreglos y devuelve
+    su análisis (ver `analizar_datos`), o None si no se pudo leer.
+    """
+    lector = LectorPBTD03_v2(ruta, resultados_como_arreglo=True)
+    if not lector.datos_extraidos:
+        return None
+    return analizar_datos(lector.datos_extraidos)
+
+
+def analizar_portafolio(rutas):
+    """
+    Analiza una lista de planillas PBTD03 de a una (sin retener los datos
+    crudos) y apila los agregados mensuales de todas las viviendas.
+
+    Devuelve un diccionario con:
+      - 'archivos': rutas leídas correctamente, en el orden de los arreglos.
+      - 'columnas' y 'casos': ejes de 'mensual'.
+      - 'mensual': arreglo (n_viviendas, n_casos, 12, n_columnas).
+      - 'cargas_punta': {columna: arreglo (n_viviendas, n_casos, 12)}.
+      - 'observadas': archivos cuyo 'Resumen' no cuadra, con sus diferencias.
+      - 'fallidos': archivos que no se pudieron leer.
+    """
+    archivos, mensuales, puntas, observadas, fallidos = [], [], [], {}, []
+    columnas = None
+
+    for ruta in rutas:
+        analisis = analizar_planilla(ruta)
+        if analisis is None:
+            fallidos.append(ruta)
+            continue
+
+        mensual = analisis['mensual']
+        if columnas is None:
+            columnas = mensual['columnas']
+        elif mensual['columnas'] != columnas:
+            # Alinear por nombre si la planilla trae columnas en otro orden
+            indices = [mensual['columnas'].index(c) if c in mensual['columnas'] else None
+                       for c in columnas]
+            valores = np.full(mensual['valores'].shape[:2] + (len(columnas),), np.nan)
+            for j, k in enumerate(indices):
+                if k is not None:
+                    valores[..., j] = mensual['valores'][..., k]
+            mensual = dict(mensual, valores=valores)
+
+        archivos.append(ruta)
+        mensuales.append(mensual['valores'])
+        puntas.append(analisis['cargas_punta'])
+        if analisis['diferencias_resumen']:
+            observadas[ruta] = analisis['diferencias_resumen']
+
+    cargas = {}
+    for col in (COL_DEMANDA_CALEFACCION, COL_DEMANDA_REFRIGERACION):
+        cargas[col] = np.stack([p.get(col, np.full((len(CASOS), 12), np.nan)) for p in puntas]) \
+            if puntas else np.empty((0, len(CASOS), 12))
+
+    return {
+        'archivos': archivos,
+        'columnas': columnas or [],
+        'casos': CASOS,
+        'mensual': np.stack(mensuales) if mensuales else np.empty((0, len(CASOS), 12, 0)),
+        'cargas_punta': cargas,
+        'observadas': observadas,
+        'fallidos': fallidos
+    }
@@ -0,0 +1,147 @@
+# ----------------------------
+# -------- ASÍNCRONO ---------
+# ----------------------------
+
+import asyncio
+import functools
+import multiprocessing
+
+from .escritor import EscritorPBTD01_v2
+from .lector import LectorPBTD01_v2, LectorPBTD03_v2
+
+
+def _leer(clase, ruta, opciones):
+    """Función de trabajo: lee la planilla y devuelve `datos_extraidos`."""
+    return clase(ruta, **opciones).datos_extraidos
+
+
+def _escribir(ruta_plantilla, ruta_salida, datos):
+    """Función de trabajo: crea la planilla igual que la API síncrona."""
+    return EscritorPBTD01_v2().crear_nueva_planilla(ruta_plantilla, ruta_salida, datos)
+
+
+def _ejecutar_en_hijo(conexion, funcion, args):
+    """Punto de entrada del proceso hijo: envía ('ok', resultado) o ('error', excepción)."""
+    try:
+        conexion.send(('ok', funcion(*args)))
+    except BaseException as e:
+        conexion.send(('error', e))
+    finally:
+        conexion.close()
+
+
+class ServicioAsincronoPBTD:
+    """
+    Puntos de entrada asyncio para leer y escribir planillas sin bloquear el
+    event loop.
+
+    - `concurrencia`: trabajos ejecutándose a la vez.
+    - `pendientes_max`: trabajos que pueden esperar turno. Cuando se llena,
+      los llamadores quedan esperando (contrapresión) en lugar de encolar
+      trabajo sin límite. None = sin límite.
+    - `ejecutor`: un `concurrent.futures.Executor` propio. Si es None, cada
+      trabajo corre en un proceso hijo dedicado, que se termina si la tarea
+      se cancela; así una carga abandonada deja de consumir CPU. Con un
+      ejecutor propio solo se pueden cancelar los trabajos que aún no empiezan.
+    - `metricas`: un `MetricasLote` (ver metricas.py) donde se registra cada
+      trabajo, midiendo solo el tiempo en ejecución (no la espera de turno).
+      Conviene crearlo con trabajadores=concurrencia.
+
+    Los procesos hijos se crean con 'forkserver' (o 'spawn' donde no existe):
+    el loop usa hilos para esperar a los hijos, y con 'fork' un hijo podría
+    heredar un lock tomado. Como con todo multiprocessing sin 'fork', el
+    script principal debe estar protegido con `if __name__ == '__main__':`.
+    """
+
+    def __init__(self, concurrencia=4, pendientes_max=None, ejecutor=None, metricas=None):
+        self.concurrencia = concurrencia
+        self.pendientes_max = pendientes_max
+        self.ejecutor = ejecutor
+        self.metricas = metricas
+        # Los semáforos se crean dentro del loop que los usa (ver _semaforos)
+        self._loop = None
+        self._en_curso = None
+        self._admision = None
+
+        metodos = multiprocessing.get_all_start_methods()
+        if 'forkserver' in metodos:
+            self._contexto = multiprocessing.get_context('forkserver')
+            # El servidor importa pandas/openpyxl una vez y cada hijo parte con ellos
+            self._contexto.set_forkserver_preload(
+                ['pandas', 'openpyxl', 'pypbtdcev.lector', 'pypbtdcev.escritor'])
+        else:
+            self._contexto = multiprocessing.get_context('spawn')
+
+    def _semaforos(self):
+        """Semáforos del loop en ejecución; se crean la primera vez en cada loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._en_curso = asyncio.Semaphore(self.concurrencia)
+            self._admision = asyncio.Semaphore(self.concurrencia + self.pendientes_max) \
+                if self.pendientes_max is not None else None
+        return self._en_curso, self._admision
+
+    async def _ejecutar(self, funcion, *args, plantilla=None, ruta=None):
+        en_curso, admision = self._semaforos()
+        if admision is not None:
+            await admision.acquire()
+        try:
+            async with en_curso:
+                if self.metricas is None or plantilla is None:
+                    return await self._correr(funcion, args)
+                with self.metricas.medir_archivo(plantilla, ruta) as medicion:
+                    resultado = await self._correr(funcion, args)
+                    if funcion is _leer and not resultado:
+                        medicion.fallo('SinDatos')
+                    return resultado
+        finally:
+            if admision is not None:
+                admision.release()
+
+    async def _correr(self, funcion, args):
+        if self.ejecutor is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.ejecutor, functools.partial(funcion, *args))
+        return await self._ejecutar_en_proceso(funcion, args)
+
+    async def _ejecutar_en_proceso(self, funcion, args):
+        receptor, emisor = self._contexto.Pipe(duplex=False)
+        proceso = self._contexto.Process(
+            target=_ejecutar_en_hijo, args=(emisor, funcion, args), daemon=True)
+        proceso.start()
+        emisor.close()
+
+        loop = asyncio.get_running_loop()
+        try:
+            estado, valor = await loop.run_in_executor(None, receptor.recv)
+        except asyncio.CancelledError:
+            proceso.terminate()
+            raise
+        except EOFError:
+            raise RuntimeError(
+                f"El proceso de trabajo terminó sin respuesta (código {proceso.exitcode}).")
+        finally:
+            # Primero esperar al hijo: al morir cierra su extremo y libera el recv
+            await loop.run_in_executor(None, proceso.join)
+            receptor.close()
+
+        if estado == 'error':
+            raise valor
+        return valor
+
+    async def leer_pbtd01(self, ruta):
+        """Equivalente asíncrono de `LectorPBTD01_v2(ruta).datos_extraidos`."""
+        return await self._ejecutar(_leer, LectorPBTD01_v2, ruta, {},
+                                    plantilla='PBTD01', ruta=ruta)
+
+    async def leer_pbtd03(self, ruta, **opciones):
+        """Equivalente asíncrono de `LectorPBTD03_v2(ruta, **opciones).datos_extraidos`."""
+        return await self._ejecutar(_leer, LectorPBTD03_v2, ruta, opciones,
+                                    plantilla='PBTD03', ruta=ruta)
+
+    async def crear_nueva_planilla(self, ruta_plantilla, ruta_salida, datos):
+        """Equivalente asíncrono de `EscritorPBTD01_v2().crear_nueva_planilla(...)`."""
+        return await self._ejecutar(_escribir, ruta_plantilla, ruta_salida, datos,
+                                    plantilla='PBTD01-escritura', ruta=ruta_salida)
@@ -0,0 +1,216 @@
+# ----------------------------
+# --------- CALIDAD ----------
+# ----------------------------
+
+# Reglas de consistencia para muchas planillas a la vez. Cada regla se evalúa
+# sobre las tablas de portafolio (ver portafolio.py), donde cada campo de
+# todas las viviendas es una columna, así que no hay bucles por archivo:
+#
+#   tablas = ConstructorPortafolio().construir(rutas)
+#   violaciones = evaluar(tablas)
+#   violaciones.groupby('regla').size()
+#
+# El resultado es una tabla con una fila por violación: id_vivienda, regla,
+# severidad, tabla, fila (posición en la lista de `datos_extraidos`, o vacía
+# si la regla es de la vivienda), campo, valor y referencia (valor esperado o
+# límite violado).
+
+from .portafolio import ConstructorPortafolio
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+COLUMNAS = ['id_vivienda', 'regla', 'severidad', 'tabla', 'fila', 'campo', 'valor', 'referencia']
+
+# Diferencia admitida entre un total y la suma de sus partes.
+TOLERANCIA_RELATIVA = 0.01
+TOLERANCIA_ABSOLUTA = 0.01
+
+# Rangos plausibles: (tabla, campo) -> (mínimo, máximo), inclusive.
+RANGOS_PLAUSIBLES = {
+    ('muros', 'u_w_m2k'): (0.05, 4.0),
+    ('techos', 'u_w_m2k'): (0.05, 4.0),
+    ('pisos', 'u_w_m2k'): (0.05, 4.0),
+    ('obstrucciones', 'anual_referencial_rad_directa_porc'): (0.0, 100.0),
+    ('dimensiones', 'altura_m'): (1.8, 6.0),
+}
+
+
+class ReglaCalidad:
+    """
+    Regla vectorizada: `funcion(tablas)` recibe {tabla: DataFrame} (con la
+    columna 'fila') y devuelve un DataFrame con las columnas de `_violaciones`.
+    """
+    __slots__ = ('nombre', 'descripcion', 'funcion', 'severidad')
+
+    def __init__(self, nombre, descripcion, funcion, severidad='error'):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.funcion = funcion
+        self.severidad = severidad
+
+    def evaluar(self, tablas):
+        resultado = self.funcion(tablas)
+        resultado.insert(1, 'regla', self.nombre)
+        resultado.insert(2, 'severidad', self.severidad)
+        return resultado
+
+    def __repr__(self):
+        return f"ReglaCalidad({self.nombre!r})"
+
+
+def _violaciones(df, mascara, tabla, campo, valor, referencia=None):
+    """Filas de `df` donde `mascara` es True, en el formato de la tabla de violaciones."""
+    mascara = np.asarray(mascara, dtype=bool)
+    n = int(mascara.sum())
+    referencia = np.full(len(df), np.nan) if referencia is None else np.asarray(referencia, dtype=np.float64)
+    fila = df['fila'].to_numpy()[mascara] if 'fila' in df else np.full(n, pd.NA)
+    return pd.DataFrame({
+        'id_vivienda': df['id_vivienda'].to_numpy()[mascara],
+        'tabla': tabla,
+        'fila': pd.array(fila, dtype='Int64'),
+        'campo': campo,
+        'valor': np.asarray(valor, dtype=object)[mascara],
+        'referencia': referencia[mascara],
+    })
+
+
+def _numeros(df, campo):
+    return df[campo].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _difieren(valor, referencia):
+    """True donde ambos valores existen y difieren más que la tolerancia."""
+    with np.errstate(invalid='ignore'):
+        cercanos = np.isclose(valor, referencia, rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA)
+    return ~np.isnan(valor) & ~np.isnan(referencia) & ~cercanos
+
+
+# ---------------------------
+# --- Reglas predefinidas ---
+# ---------------------------
+
+def total_igual_suma(campo_total, campo_piso):
+    """El total del proyecto debe ser la suma del campo en la tabla de dimensiones (por piso)."""
+    def funcion(tablas):
+        proyecto, dimensiones = tablas['proyecto'], tablas['dimensiones']
+        suma = dimensiones.groupby('id_vivienda', sort=False, observed=True)[campo_piso].sum(min_count=1)
+        referencia = suma.reindex(proyecto['id_vivienda']).to_numpy(dtype=np.float64, na_value=np.nan)
+        valor = _numeros(proyecto, campo_total)
+        return _violaciones(proyecto, _difieren(valor, referencia), 'proyecto', campo_total,
+                            valor, referencia)
+
+    return ReglaCalidad(f'{campo_total}_igual_suma_pisos',
+                        f"'{campo_total}' distinto de la suma de '{campo_piso}' de los pisos", funcion)
+
+
+def _volumen_por_piso(tablas):
+    dimensiones = tablas['dimensiones']
+    referencia = _numeros(dimensiones, 'area_m2') * _numeros(dimensiones, 'altura_m')
+    valor = _numeros(dimensiones, 'volumen_m3')
+    return _violaciones(dimensiones, _difieren(valor, referencia), 'dimensiones', 'volumen_m3',
+                        valor, referencia)
+
+
+def _ventanas_sin_muro(tablas):
+    """
+    'elemento_envolvente' de cada ventana debe ser un muro (o techo, para
+    lucarnas) declarado en la misma vivienda.
+    """
+    ventanas, muros, techos = tablas['ventanas'], tablas['muros'], tablas['techos']
+    elemento = ventanas['elemento_envolvente'].astype(object)
+    con_elemento = elemento.notna().to_numpy()
+    claves = pd.MultiIndex.from_arrays(
+        [ventanas['id_vivienda'].astype(object), elemento.astype(str).str.strip()])
+    declarados = pd.MultiIndex.from_arrays([
+        pd.concat([muros['id_vivienda'], techos['id_vivienda']], ignore_index=True).astype(object),
+        pd.concat([muros['nombre_muro'].astype(object), techos['techos'].astype(object)],
+                  ignore_index=True).astype(str).str.strip()])
+    mascara = con_elemento & ~claves.isin(declarados)
+    return _violaciones(ventanas, mascara, 'ventanas', 'elemento_envolvente', elemento.to_numpy())
+
+
+def rango_plausible(tabla, campo, minimo, maximo, severidad='advertencia'):
+    """Valores de `tabla.campo` fuera de [minimo, maximo] (los vacíos no se revisan)."""
+    def funcion(tablas):
+        df = tablas[tabla]
+        valor = _numeros(df, campo)
+        with np.errstate(invalid='ignore'):
+            fuera = (valor < minimo) | (valor > maximo)
+        referencia = np.where(valor < minimo, minimo, maximo)
+        return _violaciones(df, fuera, tabla, campo, valor, referencia)
+
+    return ReglaCalidad(f'{tabla}.{campo}_fuera_de_rango',
+                        f"'{campo}' de '{tabla}' fuera de [{minimo:g}, {maximo:g}]",
+                        funcion, severidad)
+
+
+def reglas_predefinidas(rangos=RANGOS_PLAUSIBLES):
+    """Reglas por defecto de `evaluar`; `rangos` reemplaza los rangos plausibles."""
+    reglas = [
+        total_igual_suma('area_total_m2', 'area_m2'),
+        total_igual_suma('volumen_total_m3', 'volumen_m3'),
+        ReglaCalidad('volumen_piso_igual_area_por_altura',
+                     "'volumen_m3' del piso distinto de area_m2 × altura_m", _volumen_por_piso),
+        ReglaCalidad('ventana_en_muro_inexistente',
+                     "La ventana apunta a un muro o techo que la vivienda no declara",
+                     _ventanas_sin_muro),
+    ]
+    reglas += [rango_plausible(tabla, campo, minimo, maximo)
+               for (tabla, campo), (minimo, maximo) in rangos.items()]
+    return reglas
+
+
+# --------------
+# --- Motor ---
+# --------------
+
+def _con_fila(tablas):
+    """Agrega 'fila': la posición de cada fila dentro de la lista de su vivienda."""
+    resultado = {}
+    for nombre, df in tablas.items():
+        if 'id_vivienda' in df and 'fila' not in df and nombre != 'proyecto':
+            df = df.assign(fila=df.groupby('id_vivienda', sort=False, observed=True).cumcount())
+        resultado[nombre] = df
+    return resultado
+
+
+def _tabla_vacia():
+    return pd.DataFrame({c: pd.Series(dtype='Int64' if c == 'fila' else object) for c in COLUMNAS})
+
+
+def evaluar(tablas, reglas=None):
+    """
+    Evalúa las reglas (por defecto, `reglas_predefinidas()`) sobre las tablas
+    de portafolio ({tabla: DataFrame}, ver ConstructorPortafolio) y devuelve
+    la tabla de violaciones, ordenada por vivienda y regla.
+    """
+    tablas = _con_fila(tablas)
+    reglas = reglas_predefinidas() if reglas is None else reglas
+    partes = [p for p in (regla.evaluar(tablas) for regla in reglas) if len(p)]
+    if not partes:
+        return _tabla_vacia()
+    violaciones = pd.concat(partes, ignore_index=True)[COLUMNAS]
+    return violaciones.sort_values(['id_vivienda', 'regla', 'fila'], kind='stable',
+                                   ignore_index=True)
+
+
+def evaluar_datos(datos_por_vivienda, reglas=None):
+    """Evalúa {id_vivienda: datos_extraidos} (ej: leídos de un JSONL)."""
+    constructor = ConstructorPortafolio()
+    for id_vivienda, datos in datos_por_vivienda.items():
+        constructor.agregar(id_vivienda, datos)
+    return evaluar(constructor.lote(), reglas)
+
+
+def evaluar_portafolio(rutas, reglas=None, tamano_lote=500, **opciones_lector):
+    """
+    Lee las planillas y evalúa las reglas de a `tamano_lote` archivos, así
+    la memoria no crece con el portafolio. Devuelve la tabla de violaciones.
+    """
+    constructor = ConstructorPortafolio()
+    reglas = reglas_predefinidas() if reglas is None else reglas
+    partes = [evaluar(lote, reglas) for lote in constructor.lotes(rutas, tamano_lote, **opciones_lector)]
+    partes = [p for p in partes if len(p)]
+    return pd.concat(partes, ignore_index=True) if partes else _tabla_vacia()
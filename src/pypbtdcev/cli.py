@@ -0,0 +1,660 @@
+# ----------------------------
+# ----------- CLI ------------
+# ----------------------------
+
+# Comando `pypbtdcev` para procesar lotes de planillas sin escribir Python.
+#
+#   pypbtdcev leer DIRECTORIO --salida datos.jsonl --procesos 8 --progreso
+#   pypbtdcev leer DIRECTORIO --parquet tablas/
+#   pypbtdcev generar datos.jsonl --plantilla 01.xlsm --salida generadas/
+#   pypbtdcev clonar ORIGEN... --plantilla 01.xlsm --salida clonadas/
+#   pypbtdcev sondear DIRECTORIO --hash
+#   pypbtdcev revisar datos.jsonl --salida violaciones.csv
+#   pypbtdcev comparar anterior.xlsx siguiente.xlsx
+#   pypbtdcev comparar --iteraciones datos.jsonl --salida cambios.csv
+#   pypbtdcev duplicados datos.jsonl --salida duplicados.csv --indice huellas.npz
+#   pypbtdcev servir --plantilla 01.xlsm   (ver servicio.py)
+#
+# Los módulos pesados (lector, escritor, pandas) se importan dentro de cada
+# subcomando, así que `pypbtdcev --help` y `sondear` arrancan rápido.
+#
+# Código de salida: 0 si todo se procesó, 1 si algún archivo falló.
+
+import argparse
+import concurrent.futures
+import fnmatch
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+from .serializacion import EscritorJSONL, leer_jsonl
+from .utilidades import hash_archivo, id_vivienda, nombres_de_hojas, tipo_planilla
+
+PATRONES = ('*.xlsm', '*.xlsx', '*.xls')
+
+
+# -----------------------
+# --- Auxiliares ---
+# -----------------------
+
+def _expandir_rutas(entradas, patrones=PATRONES):
+    """Archivos indicados y planillas dentro de los directorios (recursivo), ordenados."""
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for raiz, _, archivos in os.walk(entrada):
+                for nombre in archivos:
+                    # '~$' son archivos de bloqueo de Excel
+                    if not nombre.startswith('~$') and \
+                            any(fnmatch.fnmatch(nombre, p) for p in patrones):
+                        rutas.append(os.path.join(raiz, nombre))
+        else:
+            rutas.append(entrada)
+    return sorted(rutas)
+
+
+class _Progreso:
+    """Línea de progreso en stderr: archivos, archivos/s y fallidos."""
+
+    def __init__(self, total, activo, descripcion):
+        self.total = total
+        self.activo = activo
+        self.descripcion = descripcion
+        self.hechos = 0
+        self.fallidos = 0
+        self._inicio = time.perf_counter()
+        self._ultimo = 0.0
+        self._tty = sys.stderr.isatty()
+
+    def avanzar(self, fallido=False):
+        self.hechos += 1
+        self.fallidos += bool(fallido)
+        if not self.activo:
+            return
+        ahora = time.perf_counter()
+        # Sin terminal se escribe una línea cada 5 s para no llenar el log
+        if self.hechos == self.total or ahora - self._ultimo >= (0.2 if self._tty else 5.0):
+            self._ultimo = ahora
+            transcurrido = ahora - self._inicio
+            tasa = self.hechos / transcurrido if transcurrido else 0.0
+            linea = (f"{self.descripcion}: {self.hechos}/{self.total} "
+                     f"({tasa:.1f} archivos/s, {self.fallidos} fallidos)")
+            sys.stderr.write(('\r' + linea) if self._tty else (linea + '\n'))
+            if self._tty and self.hechos == self.total:
+                sys.stderr.write('\n')
+            sys.stderr.flush()
+
+
+def _informar_fallo(ruta, tipo, mensaje):
+    sys.stderr.write(f"❌ {ruta}: {tipo}: {mensaje}\n")
+
+
+def _lotes(iterable, tamano):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# ---------------------------------
+# --- Caché de archivos leídos ---
+# ---------------------------------
+
+class _Cache:
+    """
+    Manifiesto JSON {ruta: {tamano, mtime, hash}} de los archivos ya leídos
+    con éxito. Un archivo se vuelve a leer solo si cambió su tamaño o fecha
+    y además su hash (mismo criterio que SincronizadorDirectorio).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.entradas = {}
+        if ruta and os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                self.entradas = json.load(f)
+
+    def vigente(self, ruta):
+        anterior = self.entradas.get(os.path.abspath(ruta))
+        if anterior is None:
+            return False
+        stat = os.stat(ruta)
+        if anterior['tamano'] == stat.st_size and anterior['mtime'] == stat.st_mtime:
+            return True
+        if hash_archivo(ruta) == anterior['hash']:
+            anterior.update(tamano=stat.st_size, mtime=stat.st_mtime)
+            return True
+        return False
+
+    def registrar(self, ruta):
+        stat = os.stat(ruta)
+        self.entradas[os.path.abspath(ruta)] = {
+            'tamano': stat.st_size, 'mtime': stat.st_mtime, 'hash': hash_archivo(ruta)}
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.entradas, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+
+def _archivo_de_linea(linea, _prefijo=b'{"archivo":'):
+    """'archivo' de una línea JSONL de `leer`, sin decodificar los datos."""
+    if linea.startswith(_prefijo):
+        inicio = linea[len(_prefijo):len(_prefijo) + 4096].decode('utf-8', 'ignore')
+        try:
+            return json.JSONDecoder().raw_decode(inicio)[0]
+        except ValueError:
+            pass
+    return json.loads(linea).get('archivo') if linea.strip() else None
+
+
+def _compactar_jsonl(ruta, inicio, releidos):
+    """
+    Quita de los primeros `inicio` bytes de `ruta` (lo escrito en ejecuciones
+    anteriores) los registros de los archivos `releidos` (rutas absolutas),
+    que ya tienen uno nuevo al final. Las demás líneas se copian tal cual.
+    Devuelve la cantidad de registros quitados.
+    """
+    temporal = ruta + '.tmp'
+    quitados = 0
+    with open(ruta, 'rb') as origen, open(temporal, 'wb') as destino:
+        while origen.tell() < inicio:
+            linea = origen.readline()
+            if not linea:
+                break
+            archivo = _archivo_de_linea(linea)
+            if archivo and os.path.abspath(archivo) in releidos:
+                quitados += 1
+                continue
+            destino.write(linea)
+        shutil.copyfileobj(origen, destino)
+    if quitados:
+        os.replace(temporal, ruta)
+    else:
+        os.remove(temporal)
+    return quitados
+
+
+# -------------------
+# --- Subcomandos ---
+# -------------------
+
+def comando_leer(args):
+    from .aislamiento import leer_aislado
+    from .metricas import MetricasLote
+
+    if args.cache and args.parquet:
+        # Los archivos Parquet se reescriben en cada ejecución: omitir los ya
+        # leídos dejaría fuera sus tablas
+        sys.stderr.write("❌ --cache solo se puede usar con salida JSONL (--salida).\n")
+        return 2
+
+    rutas = _expandir_rutas(args.entradas)
+    cache = _Cache(args.cache)
+    omitidos = [r for r in rutas if cache.vigente(r)] if args.cache else []
+    if omitidos:
+        vigentes = set(omitidos)
+        rutas = [r for r in rutas if r not in vigentes]
+        sys.stderr.write(f"{len(omitidos)} archivos sin cambios desde la última lectura (caché).\n")
+
+    metricas = MetricasLote(trabajadores=args.procesos or os.cpu_count()) if args.metricas else None
+    detener_metricas = metricas.escribir_periodicamente(args.metricas) if metricas else None
+
+    opciones = {'modo_liviano': args.modo_liviano}
+    if args.parquet:
+        from .exportador import ExportadorParquet
+        exportador = ExportadorParquet(args.parquet)
+        # Parquet guarda 'Resultados' como tabla numérica
+        opciones['resultados_como_arreglo'] = True
+        salida = None
+    else:
+        exportador = None
+        # Con caché se agrega a lo ya escrito (y al final se quitan los
+        # registros viejos de los archivos releídos); sin caché se reescribe
+        salida = EscritorJSONL(sys.stdout if args.salida == '-' else args.salida,
+                               agregar=bool(args.cache))
+    compactar = bool(args.cache) and salida is not None and args.salida != '-'
+    inicio_nuevos = os.path.getsize(args.salida) if compactar and os.path.exists(args.salida) else 0
+    releidos = set()
+    errores = EscritorJSONL(args.errores) if args.errores else None
+
+    progreso = _Progreso(len(rutas), args.progreso, 'leer')
+    try:
+        resultados = leer_aislado(
+            rutas, procesos=args.procesos, timeout_s=args.timeout,
+            memoria_max_bytes=args.memoria_max_mb * 1024 ** 2 if args.memoria_max_mb else None,
+            metricas=metricas, **opciones)
+        for lote in _lotes(resultados, args.tamano_lote):
+            for r in lote:
+                progreso.avanzar(fallido=not r.ok)
+                if not r.ok:
+                    _informar_fallo(r.ruta, r.error.tipo, r.error.mensaje)
+                    if errores:
+                        errores.escribir({'archivo': r.ruta, 'tipo_error': r.error.tipo,
+                                          'mensaje': r.error.mensaje})
+                    continue
+                if exportador is not None:
+                    exportador.agregar(id_vivienda(r.ruta), r.datos, archivo=r.ruta)
+                else:
+                    salida.escribir_planilla(r.datos, archivo=r.ruta, id_vivienda=id_vivienda(r.ruta),
+                                             tipo=r.tipo_planilla)
+                if args.cache:
+                    cache.registrar(r.ruta)
+                    releidos.add(os.path.abspath(r.ruta))
+            # Cada lote queda escrito antes de registrarlo en la caché
+            if salida is not None:
+                salida.vaciar()
+            cache.guardar()
+    finally:
+        if exportador is not None:
+            exportador.cerrar()
+        if salida is not None:
+            salida.cerrar()
+        if errores:
+            errores.cerrar()
+        if detener_metricas is not None:
+            detener_metricas.set()
+            metricas.escribir(args.metricas)
+        # También al interrumpir: los releídos ya quedaron en la caché
+        if compactar and inicio_nuevos and releidos:
+            quitados = _compactar_jsonl(args.salida, inicio_nuevos, releidos)
+            if quitados:
+                sys.stderr.write(f"{quitados} registros anteriores reemplazados por su nueva lectura.\n")
+    return 1 if progreso.fallidos else 0
+
+
+def _generar_uno(ruta_plantilla, ruta_salida, datos, validaciones=None):
+    from .escritor import EscritorPBTD01_v2
+    escritor = EscritorPBTD01_v2()
+    if validaciones is not None:
+        fallas = escritor.validar(datos, validaciones)
+        if fallas:
+            detalle = '; '.join(str(f) for f in fallas[:5])
+            return False, f"{len(fallas)} valores no cumplen las validaciones: {detalle}"
+    return escritor.crear_nueva_planilla(ruta_plantilla, ruta_salida, datos), None
+
+
+def _clonar_uno(ruta_origen, ruta_plantilla, ruta_salida, validaciones=None):
+    from .lector import LectorPBTD01_v2
+    lector = LectorPBTD01_v2(ruta_origen)
+    if not lector.datos_extraidos:
+        return False, f"{lector.error}: {lector.error_mensaje}"
+    return _generar_uno(ruta_plantilla, ruta_salida, lector.datos_extraidos, validaciones)
+
+
+def _validaciones(args):
+    """Índice de validaciones de la plantilla si se pidió --validar (se extrae una sola vez)."""
+    if not args.validar:
+        return None
+    from .validaciones import indice_de_plantilla
+    return indice_de_plantilla(args.plantilla, ruta_cache=args.validaciones_cache)
+
+
+def _ruta_salida(directorio, nombre, ruta_plantilla):
+    return os.path.join(directorio, nombre + os.path.splitext(ruta_plantilla)[1])
+
+
+def _trabajo_medido(funcion, argumentos):
+    """Ejecuta un trabajo en el proceso hijo y devuelve (resultado, duracion_s, tipo_error)."""
+    inicio = time.perf_counter()
+    try:
+        resultado, error = funcion(*argumentos), None
+    except Exception as e:
+        resultado, error = (False, f"{type(e).__name__}: {e}"), type(e).__name__
+    return resultado, time.perf_counter() - inicio, error
+
+
+def _ejecutar_trabajos(args, trabajos, descripcion, total):
+    """
+    Ejecuta trabajos (ruta_salida, funcion, argumentos) en procesos, de a
+    `tamano_lote` por proceso, y devuelve la cantidad de fallidos. Con
+    --metricas, cada planilla escrita se registra como 'PBTD01-escritura'.
+    """
+    from .metricas import MetricasLote, tamano_archivo
+
+    metricas = MetricasLote(trabajadores=args.procesos or os.cpu_count()) if args.metricas else None
+    detener_metricas = metricas.escribir_periodicamente(args.metricas) if metricas else None
+    progreso = _Progreso(total, args.progreso, descripcion)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.procesos) as ejecutor:
+            # Se envían bloques acotados para no cargar todo el JSONL en memoria
+            for bloque in _lotes(trabajos, args.tamano_lote * (args.procesos or os.cpu_count())):
+                futuros = [(ruta, ejecutor.submit(_trabajo_medido, funcion, argumentos))
+                           for ruta, funcion, argumentos in bloque]
+                for ruta, futuro in futuros:
+                    try:
+                        resultado, duracion, error = futuro.result()
+                    except Exception as e:
+                        resultado, duracion, error = (False, f"{type(e).__name__}: {e}"), 0.0, \
+                            type(e).__name__
+                    resultado, mensaje = resultado if isinstance(resultado, tuple) \
+                        else (resultado, None)
+                    if not resultado:
+                        _informar_fallo(ruta, 'Error', mensaje or 'no se pudo escribir la planilla')
+                    if metricas is not None:
+                        metricas.registrar('PBTD01-escritura', duracion,
+                                           tamano_archivo(ruta) if resultado else 0,
+                                           None if resultado else error or 'ErrorEscritura')
+                    progreso.avanzar(fallido=not resultado)
+    finally:
+        if detener_metricas is not None:
+            detener_metricas.set()
+            metricas.escribir(args.metricas)
+    return progreso.fallidos
+
+
+def comando_generar(args):
+    os.makedirs(args.salida, exist_ok=True)
+    validaciones = _validaciones(args)
+
+    def contar():
+        with open(args.datos, encoding='utf-8') as f:
+            return sum(1 for linea in f if linea.strip())
+
+    def trabajos():
+        for n, registro in enumerate(leer_jsonl(args.datos), start=1):
+            nombre = registro.get('id_vivienda') or (
+                id_vivienda(registro['archivo']) if registro.get('archivo') else f'planilla_{n:06d}')
+            ruta = _ruta_salida(args.salida, nombre, args.plantilla)
+            yield ruta, _generar_uno, (args.plantilla, ruta, registro['datos'], validaciones)
+
+    fallidos = _ejecutar_trabajos(args, trabajos(), 'generar', contar() if args.progreso else 0)
+    return 1 if fallidos else 0
+
+
+def comando_clonar(args):
+    os.makedirs(args.salida, exist_ok=True)
+    rutas = _expandir_rutas(args.entradas)
+    validaciones = _validaciones(args)
+    trabajos = ((ruta_salida, _clonar_uno, (r, args.plantilla, ruta_salida, validaciones))
+                for r in rutas
+                for ruta_salida in [_ruta_salida(args.salida, id_vivienda(r), args.plantilla)])
+    fallidos = _ejecutar_trabajos(args, trabajos, 'clonar', len(rutas))
+    return 1 if fallidos else 0
+
+
+def comando_revisar(args):
+    """Reglas de consistencia (calidad.py) sobre un JSONL de 'leer'; escribe las violaciones en CSV."""
+    from .calidad import evaluar_datos
+
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'w', encoding='utf-8', newline='')
+    total = 0
+    try:
+        registros = leer_jsonl(args.datos)
+        for n_lote, lote in enumerate(_lotes(registros, args.tamano_lote)):
+            datos = {}
+            for n, registro in enumerate(lote, start=n_lote * args.tamano_lote + 1):
+                nombre = registro.get('id_vivienda') or (
+                    id_vivienda(registro['archivo']) if registro.get('archivo') else f'planilla_{n:06d}')
+                datos[nombre] = registro.get('datos')
+            violaciones = evaluar_datos(datos)
+            violaciones.to_csv(salida, index=False, header=n_lote == 0)
+            total += len(violaciones)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    sys.stderr.write(f"{total} violaciones.\n")
+    return 1 if total and args.estricto else 0
+
+
+def comando_comparar(args):
+    """Cambios entre dos planillas, o entre iteraciones consecutivas de cada caso de un JSONL, en CSV."""
+    from .diferencias import comparar_archivos, comparar_iteraciones_jsonl, tabla_cambios
+
+    tolerancias = {'rtol': args.tolerancia_relativa, 'atol': args.tolerancia_absoluta}
+    if args.iteraciones:
+        diferencias = comparar_iteraciones_jsonl(args.iteraciones, **tolerancias)
+    elif len(args.entradas) == 2:
+        try:
+            diferencias = [(None, comparar_archivos(*args.entradas, **tolerancias))]
+        except ValueError as e:
+            sys.stderr.write(f"{e}\n")
+            return 1
+    else:
+        sys.stderr.write("Indique dos planillas o --iteraciones con un JSONL.\n")
+        return 2
+
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'w', encoding='utf-8', newline='')
+    pares = cambios = 0
+    try:
+        for n_lote, lote in enumerate(_lotes(diferencias, 1000)):
+            tabla = tabla_cambios(lote)
+            if not args.iteraciones:
+                tabla = tabla.drop(columns='caso')
+            tabla.to_csv(salida, index=False, header=n_lote == 0)
+            pares += len(lote)
+            cambios += len(tabla)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    sys.stderr.write(f"{pares} pares comparados, {cambios} cambios.\n")
+    return 0
+
+
+def comando_duplicados(args):
+    """Duplicados exactos y casi duplicados de un JSONL de 'leer' (duplicados.py), en CSV."""
+    from .duplicados import IndiceDuplicados
+
+    if args.indice and os.path.exists(args.indice):
+        indice = IndiceDuplicados.cargar(args.indice)
+    else:
+        indice = IndiceDuplicados()
+    conocidos = set(indice.ids)
+    nuevas = 0
+    for n, registro in enumerate(leer_jsonl(args.datos), start=1):
+        nombre = registro.get('id_vivienda') or (
+            id_vivienda(registro['archivo']) if registro.get('archivo') else f'planilla_{n:06d}')
+        if nombre not in conocidos:
+            indice.agregar(nombre, registro.get('datos'))
+            conocidos.add(nombre)
+            nuevas += 1
+    if args.indice:
+        indice.guardar(args.indice)
+
+    pares = indice.duplicados(args.umbral)
+    pares.to_csv(sys.stdout if args.salida == '-' else args.salida, index=False)
+    sys.stderr.write(f"{nuevas} planillas nuevas, {len(indice)} en el índice, "
+                     f"{len(pares)} pares duplicados.\n")
+    return 0
+
+
+def comando_sondear(args):
+    """Metadatos de cada archivo, sin cargar el libro (no importa pandas)."""
+    fallidos = 0
+    salida = EscritorJSONL(sys.stdout)
+    for ruta in _expandir_rutas(args.entradas):
+        registro = {'archivo': ruta}
+        try:
+            stat = os.stat(ruta)
+            registro.update(tamano=stat.st_size, mtime=stat.st_mtime,
+                            tipo=tipo_planilla(ruta), hojas=nombres_de_hojas(ruta))
+            if args.hash:
+                registro['hash'] = hash_archivo(ruta)
+        except Exception as e:
+            registro['error'] = f"{type(e).__name__}: {e}"
+            fallidos += 1
+        salida.escribir(registro)
+    return 1 if fallidos else 0
+
+
+def comando_servir(args):
+    """Servicio local con los procesos de trabajo y las plantillas ya cargados."""
+    from .servicio import ServicioPBTD, _destino
+
+    nivel = logging.INFO if args.detalle else logging.WARNING
+    with ServicioPBTD(procesos=args.procesos, plantillas=args.plantilla,
+                      timeout_s=args.timeout, nivel_registro=nivel) as servicio:
+        puerto, socket_unix = _destino(args.puerto, args.socket)
+        servidor = servicio.crear_servidor(puerto, args.direccion, socket_unix)
+        destino = socket_unix or f"http://{args.direccion}:{servidor.server_address[1]}"
+        sys.stderr.write(f"Atendiendo en {destino} con {servicio.procesos} procesos "
+                         f"(Ctrl+C para terminar).\n")
+        servicio.servir(puerto, args.direccion, socket_unix)
+    return 0
+
+
+# ---------------
+# --- Parser ---
+# ---------------
+
+def _opciones_lote(parser):
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='Procesos de trabajo (por defecto, uno por CPU).')
+    parser.add_argument('--tamano-lote', type=int, default=50,
+                        help='Archivos por lote: cada cuántos se escribe la salida y la caché '
+                             '(por defecto 50).')
+    parser.add_argument('--progreso', action='store_true',
+                        help='Muestra el avance en stderr.')
+
+
+def _opciones_validacion(parser):
+    parser.add_argument('--validar', action='store_true',
+                        help='Revisa los datos con las validaciones (listas y rangos) de la '
+                             'plantilla antes de escribir; las planillas que no cumplen fallan.')
+    parser.add_argument('--validaciones-cache',
+                        help='JSON donde guardar y reutilizar el índice de validaciones.')
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        prog='pypbtdcev',
+        description='Lectura y generación por lotes de planillas PBTD.')
+    parser.add_argument('-v', '--detalle', action='store_true',
+                        help='Muestra los mensajes de progreso de lectores y escritor.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    leer = subparsers.add_parser(
+        'leer', help='Lee planillas (archivos o directorios) a JSONL o Parquet.')
+    leer.add_argument('entradas', nargs='+', help='Archivos o directorios con planillas.')
+    destino = leer.add_mutually_exclusive_group()
+    destino.add_argument('--salida', default='-',
+                         help="Archivo JSONL, una planilla por línea ('-' = stdout).")
+    destino.add_argument('--parquet', help='Directorio donde escribir las tablas Parquet.')
+    leer.add_argument('--errores', help='Archivo JSONL donde registrar las planillas fallidas.')
+    leer.add_argument('--cache', help='Manifiesto JSON de archivos ya leídos; los que no '
+                                      'cambiaron se omiten y el JSONL se completa.')
+    leer.add_argument('--timeout', type=float, default=300,
+                      help='Segundos máximos por archivo (por defecto 300).')
+    leer.add_argument('--memoria-max-mb', type=int, default=None,
+                      help='Límite de memoria de cada proceso de trabajo (MB).')
+    leer.add_argument('--modo-liviano', action='store_true',
+                      help='Lee solo las hojas necesarias (PBTD03).')
+    leer.add_argument('--metricas', help='Archivo donde escribir métricas en formato Prometheus.')
+    _opciones_lote(leer)
+    leer.set_defaults(funcion=comando_leer)
+
+    generar = subparsers.add_parser(
+        'generar', help="Crea planillas desde un JSONL con 'datos' (ej: la salida de 'leer').")
+    generar.add_argument('datos', help="Archivo JSONL; cada línea con 'datos' y "
+                                       "opcionalmente 'id_vivienda' o 'archivo'.")
+    generar.add_argument('--plantilla', required=True, help='Planilla PBTD01 limpia.')
+    generar.add_argument('--salida', required=True, help='Directorio de las planillas creadas.')
+    generar.add_argument('--metricas', help='Archivo donde escribir métricas en formato Prometheus.')
+    _opciones_validacion(generar)
+    _opciones_lote(generar)
+    generar.set_defaults(funcion=comando_generar)
+
+    clonar = subparsers.add_parser(
+        'clonar', help='Copia los datos de planillas PBTD01 a una plantilla limpia.')
+    clonar.add_argument('entradas', nargs='+', help='Archivos o directorios con planillas.')
+    clonar.add_argument('--plantilla', required=True, help='Plantilla PBTD01 de destino.')
+    clonar.add_argument('--salida', required=True, help='Directorio de las planillas creadas.')
+    clonar.add_argument('--metricas', help='Archivo donde escribir métricas en formato Prometheus.')
+    _opciones_validacion(clonar)
+    _opciones_lote(clonar)
+    clonar.set_defaults(funcion=comando_clonar)
+
+    sondear = subparsers.add_parser(
+        'sondear', help='Muestra metadatos (tipo, hojas, tamaño) en JSONL sin leer los datos.')
+    sondear.add_argument('entradas', nargs='+', help='Archivos o directorios con planillas.')
+    sondear.add_argument('--hash', action='store_true', help='Incluye el SHA-256 del archivo.')
+    sondear.set_defaults(funcion=comando_sondear)
+
+    revisar = subparsers.add_parser(
+        'revisar', help="Revisa la consistencia de los datos de un JSONL de 'leer' (áreas, "
+                        "volúmenes, referencias, rangos) y escribe las violaciones en CSV.")
+    revisar.add_argument('datos', help="Archivo JSONL con 'datos' (la salida de 'leer').")
+    revisar.add_argument('--salida', default='-', help="Archivo CSV ('-' = stdout).")
+    revisar.add_argument('--tamano-lote', type=int, default=1000,
+                         help='Planillas evaluadas juntas (por defecto 1000).')
+    revisar.add_argument('--estricto', action='store_true',
+                         help='Termina con código 1 si hay alguna violación.')
+    revisar.set_defaults(funcion=comando_revisar)
+
+    comparar = subparsers.add_parser(
+        'comparar', help='Cambios entre dos planillas, o entre iteraciones consecutivas de '
+                         "cada caso de un JSONL de 'leer', en CSV.")
+    comparar.add_argument('entradas', nargs='*', help='Planilla anterior y planilla siguiente.')
+    comparar.add_argument('--iteraciones', help="Archivo JSONL (la salida de 'leer'); compara cada "
+                                                'iteración con la anterior del mismo caso.')
+    comparar.add_argument('--salida', default='-', help="Archivo CSV ('-' = stdout).")
+    comparar.add_argument('--tolerancia-relativa', type=float, default=1e-6,
+                          help='Diferencia relativa admitida entre números (por defecto 1e-6).')
+    comparar.add_argument('--tolerancia-absoluta', type=float, default=1e-6,
+                          help='Diferencia absoluta admitida entre números (por defecto 1e-6).')
+    comparar.set_defaults(funcion=comando_comparar)
+
+    duplicados = subparsers.add_parser(
+        'duplicados', help="Busca planillas duplicadas o casi duplicadas (misma envolvente) "
+                           "en un JSONL de 'leer' y escribe los pares en CSV.")
+    duplicados.add_argument('datos', help="Archivo JSONL con 'datos' (la salida de 'leer').")
+    duplicados.add_argument('--salida', default='-', help="Archivo CSV ('-' = stdout).")
+    duplicados.add_argument('--umbral', type=float, default=0.8,
+                            help='Similitud mínima de los casi duplicados (por defecto 0.8).')
+    duplicados.add_argument('--indice', help='Archivo .npz con las huellas: se carga si existe, '
+                                             'se agregan las planillas nuevas y se guarda.')
+    duplicados.set_defaults(funcion=comando_duplicados)
+
+    servir = subparsers.add_parser(
+        'servir', help='Servicio local (HTTP o socket Unix) para leer, sondear y generar '
+                       'sin pagar el arranque en cada pedido.')
+    destino = servir.add_mutually_exclusive_group()
+    destino.add_argument('--socket', help='Socket Unix donde escuchar (por defecto '
+                                          'pypbtdcev-UID.sock en el directorio temporal).')
+    destino.add_argument('--puerto', type=int, default=None,
+                         help='Escuchar por HTTP en este puerto, en vez de un socket Unix.')
+    servir.add_argument('--direccion', default='127.0.0.1',
+                        help='Dirección HTTP donde escuchar con --puerto (por defecto 127.0.0.1).')
+    servir.add_argument('--plantilla', action='append', default=[],
+                        help='Plantilla a mantener precargada (se puede repetir).')
+    servir.add_argument('--procesos', type=int, default=None,
+                        help='Procesos de trabajo (por defecto, uno por CPU).')
+    servir.add_argument('--timeout', type=float, default=300,
+                        help='Segundos máximos de espera por pedido (por defecto 300).')
+    servir.set_defaults(funcion=comando_servir)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.detalle:
+        from .instrumentacion import mostrar_progreso
+        mostrar_progreso()
+    else:
+        # Los fallos se informan por archivo; no repetir los mensajes del lector
+        logging.getLogger('pypbtdcev').setLevel(logging.CRITICAL)
+    try:
+        return args.funcion(args)
+    except KeyboardInterrupt:
+        sys.stderr.write("\nInterrumpido.\n")
+        return 130
+    except BrokenPipeError:
+        # La salida se cerró antes de tiempo (ej: `pypbtdcev sondear . | head`).
+        # Redirigir stdout a devnull evita un segundo error al cerrar el intérprete
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# ----------------------------
+# ------- COMPARATIVA --------
+# ----------------------------
+
+# Ubica una vivienda entre sus pares: el percentil de su demanda de
+# calefacción y refrigeración (kWh/m²·año, del 'Resumen' de la PBTD03) entre
+# las viviendas de la misma zona térmica, tipo de vivienda y banda de
+# superficie.
+#
+#   indice = IndicePercentiles.desde_portafolio(ConstructorPortafolio().construir(rutas))
+#   indice.ubicar(datos)['demanda_calefaccion_kwh_m2']
+#   # Ubicacion(demanda_calefaccion_kwh_m2=84.2: percentil 71.5 de 143, grupo ('C', 'Casa', '70-90'))
+#   indice.agregar(datos)           # la vivienda pasa a ser par de las siguientes
+#
+# Cada grupo guarda una lista ordenada por métrica, así que un percentil es
+# una búsqueda binaria (bisect) y agregar una vivienda es una inserción
+# ordenada. Si el grupo tiene menos de `minimo_pares` viviendas se usa uno más
+# amplio: sin la banda de superficie, y luego solo la zona térmica.
+
+import bisect
+import json
+import os
+
+from .exportador import _a_real, _a_texto
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Métrica -> (ruta del valor por m² en 'Resumen', ruta del total anual).
+# Si falta el valor por m², se calcula como total / area_total_m2.
+METRICAS = {
+    'demanda_calefaccion_kwh_m2': (
+        ('demanda_energetica', 'tabla_demanda', 'caso_propuesto', 'demanda_calefaccion_kwh_por_m2_ano'),
+        ('demanda_energetica', 'tabla_demanda', 'caso_propuesto', 'demanda_calefaccion_kwh_ano')),
+    'demanda_refrigeracion_kwh_m2': (
+        ('demanda_energetica', 'tabla_demanda', 'caso_propuesto', 'demanda_refrigeracion_kwh_por_m2_ano'),
+        ('demanda_energetica', 'tabla_demanda', 'caso_propuesto', 'demanda_refrigeracion_kwh_ano')),
+    'demanda_total_kwh_m2': (
+        ('demanda_energetica', 'tabla_demanda', 'caso_propuesto', 'demanda_total_kwh_por_m2_ano'),
+        None),
+    'consumo_calefaccion_kwh_m2': (
+        ('consumos', '2_consumos_energia_primaria_base', 'calefaccion', 'kwh_m2_ano'),
+        ('consumos', '2_consumos_energia_primaria_base', 'calefaccion', 'kwh_ano')),
+    'consumo_total_kwh_m2': (
+        ('consumos', '4_balance_general', 'consumo_total_final', 'kwh_m2_ano'),
+        ('consumos', '4_balance_general', 'consumo_total_final', 'kwh_ano')),
+}
+
+# Límites de las bandas de superficie (m²): <50, 50-70, ..., >=200.
+BANDAS_SUPERFICIE_M2 = (50, 70, 90, 120, 150, 200)
+
+# Viviendas mínimas en un grupo para usarlo; si no, se usa uno más amplio.
+MINIMO_PARES = 20
+
+# Niveles de agrupación, del más fino al más amplio (cantidad de campos de la clave).
+NIVELES = (3, 2, 1)
+
+
+def _valor_anidado(d, ruta):
+    for clave in ruta:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(clave)
+    return d
+
+
+def banda_superficie(area_m2, bandas=BANDAS_SUPERFICIE_M2):
+    """Etiqueta de la banda de superficie ('<50', '50-70', '>=200'); None sin superficie."""
+    area_m2 = _a_real(area_m2)
+    if area_m2 is None:
+        return None
+    i = bisect.bisect_right(bandas, area_m2)
+    if i == 0:
+        return f'<{bandas[0]:g}'
+    if i == len(bandas):
+        return f'>={bandas[-1]:g}'
+    return f'{bandas[i - 1]:g}-{bandas[i]:g}'
+
+
+def _texto(valor):
+    texto = _a_texto(valor)
+    return texto.strip() if texto and texto.strip() else None
+
+
+def _area_total(datos):
+    cev = (datos or {}).get('CEV-CEVE') or {}
+    return _a_real(_valor_anidado(cev, ('dimensiones_de_la_vivienda', 'totales', 'area_total_m2')))
+
+
+def clave_grupo(datos, bandas=BANDAS_SUPERFICIE_M2):
+    """(zona térmica, tipo de vivienda, banda de superficie) de un `datos_extraidos`."""
+    generales = ((datos or {}).get('CEV-CEVE') or {}).get('datos_generales_proyecto') or {}
+    return (_texto(generales.get('zona_termica_proyecto')), _texto(generales.get('tipo_de_vivienda')),
+            banda_superficie(_area_total(datos), bandas))
+
+
+def metricas(datos, definiciones=METRICAS):
+    """{métrica: valor} (kWh/m²·año) del 'Resumen'; None si la planilla no lo tiene."""
+    resumen = (datos or {}).get('Resumen') or {}
+    area = _area_total(datos)
+    resultado = {}
+    for nombre, (ruta_m2, ruta_total) in definiciones.items():
+        valor = _a_real(_valor_anidado(resumen, ruta_m2))
+        if valor is None and ruta_total is not None and area:
+            total = _a_real(_valor_anidado(resumen, ruta_total))
+            valor = None if total is None else total / area
+        resultado[nombre] = valor
+    return resultado
+
+
+class Ubicacion:
+    """Percentil (0-100, con los empates al medio) de `valor` entre `n` pares del `grupo`."""
+    __slots__ = ('metrica', 'valor', 'percentil', 'n', 'grupo')
+
+    def __init__(self, metrica, valor, percentil, n, grupo):
+        self.metrica = metrica
+        self.valor = valor
+        self.percentil = percentil
+        self.n = n
+        self.grupo = grupo
+
+    def a_dict(self):
+        return {c: getattr(self, c) for c in self.__slots__}
+
+    def __repr__(self):
+        if self.percentil is None:
+            return f"Ubicacion({self.metrica}={self.valor!r}: sin pares)"
+        return (f"Ubicacion({self.metrica}={self.valor:g}: percentil {self.percentil:.1f} "
+                f"de {self.n}, grupo {self.grupo})")
+
+
+class IndicePercentiles:
+    """
+    Listas ordenadas de cada métrica por grupo (zona térmica, tipo de vivienda,
+    banda de superficie) y por sus grupos más amplios, para ubicar viviendas
+    entre sus pares en tiempo logarítmico.
+    """
+
+    def __init__(self, definiciones=METRICAS, bandas=BANDAS_SUPERFICIE_M2, minimo_pares=MINIMO_PARES):
+        self.definiciones = definiciones
+        self.bandas = tuple(bandas)
+        self.minimo_pares = minimo_pares
+        self._valores = {}      # (grupo, métrica) -> lista ordenada
+        self.viviendas = 0
+
+    def __len__(self):
+        return self.viviendas
+
+    # --- Carga ---
+
+    def agregar(self, datos):
+        """Agrega una vivienda (un `datos_extraidos`) a los grupos que le corresponden."""
+        self.agregar_valores(clave_grupo(datos, self.bandas), metricas(datos, self.definiciones))
+
+    def agregar_valores(self, grupo, valores):
+        """Agrega {métrica: valor} de una vivienda del grupo (zona, tipo, banda)."""
+        for nivel in NIVELES:
+            subgrupo = tuple(grupo[:nivel])
+            if None in subgrupo:
+                continue
+            for metrica, valor in valores.items():
+                if valor is not None and valor == valor:
+                    bisect.insort(self._valores.setdefault((subgrupo, metrica), []), float(valor))
+        self.viviendas += 1
+
+    @classmethod
+    def desde_portafolio(cls, tablas, definiciones=METRICAS, bandas=BANDAS_SUPERFICIE_M2,
+                         minimo_pares=MINIMO_PARES):
+        """Construye el índice de una vez desde las tablas de `ConstructorPortafolio`."""
+        indice = cls(definiciones, bandas, minimo_pares)
+        indice.agregar_portafolio(tablas)
+        return indice
+
+    def agregar_portafolio(self, tablas):
+        """
+        Agrega las viviendas de las tablas de portafolio ('proyecto' y
+        'resumen'). Cada grupo se ordena una vez con numpy y se fusiona con
+        lo que ya tenía el índice.
+        """
+        proyecto, resumen = tablas['proyecto'], tablas['resumen']
+        df = pd.DataFrame({
+            'id_vivienda': proyecto['id_vivienda'].astype(object),
+            'zona': [_texto(v) for v in proyecto['zona_termica_proyecto'].astype(object)],
+            'tipo': [_texto(v) for v in proyecto['tipo_de_vivienda'].astype(object)],
+            'banda': [banda_superficie(v, self.bandas) for v in proyecto['area_total_m2']],
+        })
+        area = proyecto['area_total_m2'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        rutas = {}
+        for nombre, (ruta_m2, ruta_total) in self.definiciones.items():
+            rutas[(ruta_m2[0], '.'.join(ruta_m2[1:]))] = (nombre, 'm2')
+            if ruta_total is not None:
+                rutas[(ruta_total[0], '.'.join(ruta_total[1:]))] = (nombre, 'total')
+        claves = pd.MultiIndex.from_arrays([resumen['seccion'].astype(object),
+                                            resumen['clave'].astype(object)])
+        filas = resumen[claves.isin(list(rutas))]
+        valores = {}
+        if len(filas):
+            pares = [rutas[(s, c)] for s, c in zip(filas['seccion'], filas['clave'])]
+            largo = pd.DataFrame({'id_vivienda': filas['id_vivienda'].astype(object).to_numpy(),
+                                  'columna': [f'{m}|{t}' for m, t in pares],
+                                  'valor': filas['valor'].to_numpy(dtype=np.float64, na_value=np.nan)})
+            ancho = largo.pivot_table(index='id_vivienda', columns='columna', values='valor',
+                                      aggfunc='first').reindex(df['id_vivienda'])
+            valores = {c: ancho[c].to_numpy(dtype=np.float64) for c in ancho.columns}
+
+        for nombre in self.definiciones:
+            nan = np.full(len(df), np.nan)
+            por_m2 = valores.get(f'{nombre}|m2', nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                por_area = valores.get(f'{nombre}|total', nan) / np.where(area > 0, area, np.nan)
+            df[nombre] = np.where(np.isnan(por_m2), por_area, por_m2)
+
+        columnas = ['zona', 'tipo', 'banda']
+        for nivel in NIVELES:
+            subgrupos = df[columnas[:nivel]]
+            validos = subgrupos.notna().all(axis=1).to_numpy()
+            for nombre in self.definiciones:
+                serie = df.loc[validos & df[nombre].notna().to_numpy(), columnas[:nivel] + [nombre]]
+                for subgrupo, parte in serie.groupby(columnas[:nivel], sort=False)[nombre]:
+                    subgrupo = subgrupo if isinstance(subgrupo, tuple) else (subgrupo,)
+                    self._fusionar((subgrupo, nombre), np.sort(parte.to_numpy(dtype=np.float64)))
+        self.viviendas += len(df)
+
+    def _fusionar(self, clave, ordenados):
+        actual = self._valores.get(clave)
+        if actual:
+            ordenados = np.sort(np.concatenate([np.asarray(actual), ordenados]), kind='mergesort')
+        self._valores[clave] = ordenados.tolist()
+
+    # --- Consultas ---
+
+    def valores(self, grupo, metrica):
+        """Lista ordenada de la métrica en el grupo (tupla de 1 a 3 campos); no modificar."""
+        return self._valores.get((tuple(grupo), metrica), [])
+
+    def percentil(self, grupo, metrica, valor):
+        """Percentil de `valor` en el grupo (empates al medio) y cantidad de pares; (None, 0) sin pares."""
+        lista = self.valores(grupo, metrica)
+        if not lista:
+            return None, 0
+        menores = bisect.bisect_left(lista, valor)
+        iguales = bisect.bisect_right(lista, valor, lo=menores) - menores
+        return 100.0 * (menores + 0.5 * iguales) / len(lista), len(lista)
+
+    def valor_en_percentil(self, grupo, metrica, percentil):
+        """Valor de la métrica en el percentil pedido (0-100) del grupo, por rango más cercano."""
+        lista = self.valores(grupo, metrica)
+        if not lista:
+            return None
+        i = min(len(lista) - 1, max(0, int(round(percentil / 100.0 * (len(lista) - 1)))))
+        return lista[i]
+
+    def _grupo_para(self, grupo, metrica):
+        """El grupo más fino con al menos `minimo_pares`; si ninguno llega, el más grande que exista."""
+        candidatos = [tuple(grupo[:nivel]) for nivel in NIVELES if None not in grupo[:nivel]]
+        for subgrupo in candidatos:
+            if len(self.valores(subgrupo, metrica)) >= self.minimo_pares:
+                return subgrupo
+        existentes = [g for g in candidatos if self.valores(g, metrica)]
+        return max(existentes, key=lambda g: len(self.valores(g, metrica))) if existentes else None
+
+    def ubicar_valores(self, grupo, valores):
+        """{métrica: Ubicacion} para {métrica: valor} de una vivienda del grupo (zona, tipo, banda)."""
+        resultado = {}
+        for metrica, valor in valores.items():
+            subgrupo = None if valor is None else self._grupo_para(grupo, metrica)
+            if subgrupo is None:
+                resultado[metrica] = Ubicacion(metrica, valor, None, 0, None)
+            else:
+                percentil, n = self.percentil(subgrupo, metrica, valor)
+                resultado[metrica] = Ubicacion(metrica, valor, percentil, n, subgrupo)
+        return resultado
+
+    def ubicar(self, datos):
+        """{métrica: Ubicacion} de un `datos_extraidos` (PBTD03) entre sus pares."""
+        return self.ubicar_valores(clave_grupo(datos, self.bandas), metricas(datos, self.definiciones))
+
+    # --- Persistencia ---
+
+    def guardar(self, ruta):
+        contenido = {
+            'bandas': list(self.bandas), 'minimo_pares': self.minimo_pares,
+            'viviendas': self.viviendas,
+            'grupos': [[list(grupo), metrica, lista] for (grupo, metrica), lista in self._valores.items()]
+        }
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta, definiciones=METRICAS):
+        with open(ruta, encoding='utf-8') as f:
+            contenido = json.load(f)
+        indice = cls(definiciones, contenido['bandas'], contenido['minimo_pares'])
+        indice.viviendas = contenido['viviendas']
+        indice._valores = {(tuple(grupo), metrica): lista for grupo, metrica, lista in contenido['grupos']}
+        return indice
+
+    def __repr__(self):
+        grupos = len({grupo for grupo, _ in self._valores if len(grupo) == NIVELES[0]})
+        return f"IndicePercentiles({self.viviendas} viviendas, {grupos} grupos)"
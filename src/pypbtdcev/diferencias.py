@@ -0,0 +1,473 @@
+# ----------------------------
+# ------- DIFERENCIAS --------
+# ----------------------------
+
+# Diferencias estructurales entre dos planillas, típicamente dos iteraciones
+# de la misma vivienda (mismo 'caso_interno_evaluador', distinta
+# 'iteracion_evaluador'):
+#
+#   diferencia = comparar(datos_anterior, datos_siguiente)
+#   for cambio in diferencia.cambios:
+#       print(cambio)   # CEV-CEVE.ventanas[V3].alto_m: 1.2 -> 1.4
+#
+# Cada sección (cada hoja, y cada apartado de 'CEV-CEVE') tiene una huella;
+# las secciones con la misma huella no se recorren. Las tablas (listas de
+# diccionarios) se alinean por su primera columna ('muro', 'id_ventana',
+# 'hora', ...), así una ventana agregada al medio no marca como cambiadas las
+# siguientes. Los números se comparan con tolerancia, y 'Resultados' se
+# compara columna por columna con numpy.
+
+import hashlib
+import json
+import math
+
+from .analitica import tabla_resultados
+from .exportador import _a_real, _a_texto
+from .serializacion import _codificador, _normalizar, expandir_tablas
+from .utilidades import hash_archivo, leer_planilla, modulo_perezoso
+from .utilidades import id_vivienda as _id_vivienda
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+TOLERANCIA_RELATIVA = 1e-6
+TOLERANCIA_ABSOLUTA = 1e-6
+
+# Tipos de cambio
+MODIFICADO = 'modificado'
+AGREGADO = 'agregado'
+ELIMINADO = 'eliminado'
+FILAS_MODIFICADAS = 'filas_modificadas'   # 'Resultados': `despues` es la cantidad de filas distintas
+
+HOJA_PRINCIPAL = 'CEV-CEVE'
+HOJA_RESULTADOS = 'Resultados'
+
+COLUMNAS = ['seccion', 'fila', 'campo', 'tipo', 'antes', 'despues']
+
+
+def _ruta(seccion, fila, campo):
+    ruta = seccion if fila is None else f'{seccion}[{fila}]'
+    return ruta if campo is None else f'{ruta}.{campo}'
+
+
+class Cambio:
+    """Un cambio: `seccion` (ej: 'CEV-CEVE.ventanas'), `fila` (clave de la fila o None), `campo`."""
+    __slots__ = ('seccion', 'fila', 'campo', 'tipo', 'antes', 'despues')
+
+    def __init__(self, seccion, fila, campo, tipo, antes, despues):
+        self.seccion = seccion
+        self.fila = fila
+        self.campo = campo
+        self.tipo = tipo
+        self.antes = antes
+        self.despues = despues
+
+    @property
+    def ruta(self):
+        return _ruta(self.seccion, self.fila, self.campo)
+
+    def a_dict(self):
+        return {c: getattr(self, c) for c in COLUMNAS}
+
+    def __repr__(self):
+        if self.tipo == MODIFICADO:
+            return f"{self.ruta}: {self.antes!r} -> {self.despues!r}"
+        if self.tipo == FILAS_MODIFICADAS:
+            return f"{self.ruta}: {self.despues} filas modificadas"
+        return f"{self.ruta}: {self.tipo}"
+
+
+class Diferencia:
+    """Resultado de `comparar`: los cambios y las secciones que se omitieron por tener la misma huella."""
+    __slots__ = ('anterior', 'siguiente', 'cambios', 'secciones_iguales')
+
+    def __init__(self, anterior, siguiente, cambios, secciones_iguales=()):
+        self.anterior = anterior
+        self.siguiente = siguiente
+        self.cambios = cambios
+        self.secciones_iguales = list(secciones_iguales)
+
+    @property
+    def identicas(self):
+        return not self.cambios
+
+    def a_filas(self):
+        """Un diccionario por cambio, con 'anterior' y 'siguiente'; filas y listas como texto JSON."""
+        filas = []
+        for cambio in self.cambios:
+            fila = {'anterior': self.anterior, 'siguiente': self.siguiente}
+            fila.update(cambio.a_dict())
+            for c in ('antes', 'despues'):
+                if isinstance(fila[c], (dict, list)):
+                    fila[c] = _codificador.encode(fila[c])
+            filas.append(fila)
+        return filas
+
+    def __repr__(self):
+        return f"Diferencia({self.anterior!r} -> {self.siguiente!r}, {len(self.cambios)} cambios)"
+
+
+# ---------------
+# --- Huellas ---
+# ---------------
+
+def secciones(datos):
+    """Divide `datos_extraidos` en secciones: 'CEV-CEVE.<apartado>' y el resto de las hojas."""
+    resultado = {}
+    for hoja, valor in (datos or {}).items():
+        if hoja == HOJA_PRINCIPAL and isinstance(valor, dict):
+            for apartado, contenido in valor.items():
+                resultado[f'{hoja}.{apartado}'] = contenido
+        else:
+            resultado[hoja] = valor
+    return resultado
+
+
+def _huella_resultados(valor):
+    h = hashlib.blake2b(digest_size=16)
+    tabla = tabla_resultados(valor)
+    if tabla is not None:
+        h.update(_codificador.encode(_normalizar(tabla['columnas'])).encode('utf-8'))
+        h.update(np.ascontiguousarray(tabla['valores'], dtype=np.float64).tobytes())
+        if tabla.get('caso') is not None:
+            h.update(_codificador.encode(_normalizar(list(tabla['caso']))).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _huella(valor):
+    return hashlib.blake2b(_codificador.encode(_normalizar(valor)).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+
+def huellas(datos):
+    """
+    {sección: huella} de un `datos_extraidos`. 'Resultados' en forma de
+    arreglo (`resultados_como_arreglo=True`) se resume sin pasar por JSON.
+    """
+    return {nombre: _huella_resultados(valor) if nombre == HOJA_RESULTADOS else _huella(valor)
+            for nombre, valor in secciones(datos).items()}
+
+
+def huella_contenido(datos, huellas_secciones=None):
+    """Huella de toda la planilla (sin metadatos como el nombre del archivo)."""
+    huellas_secciones = huellas(datos) if huellas_secciones is None else huellas_secciones
+    texto = _codificador.encode(sorted(huellas_secciones.items()))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# -----------------
+# --- Comparar ---
+# -----------------
+
+def _union(a, b):
+    """Claves de `a` en orden, y luego las que solo están en `b`."""
+    return list(a) + [k for k in b if k not in a]
+
+
+def _vacio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return None
+    return _a_real(valor) if isinstance(valor, (int, float, str)) else None
+
+
+def _iguales(a, b, rtol, atol):
+    if a == b or (_vacio(a) and _vacio(b)):
+        return True
+    x, y = _numero(a), _numero(b)
+    if x is None or y is None:
+        return False
+    return math.isclose(x, y, rel_tol=rtol, abs_tol=atol)
+
+
+def _es_tabla(a, b):
+    return isinstance(a, list) and isinstance(b, list) and bool(a or b) \
+        and all(isinstance(f, dict) for f in a) and all(isinstance(f, dict) for f in b)
+
+
+def _filas_por_clave(filas):
+    """
+    {clave: fila} usando la primera columna como clave. Las filas sin clave
+    se numeran entre ellas ('#3'); las claves repetidas también ('M1#2').
+    """
+    resultado = {}
+    sin_clave = 0
+    for fila in filas:
+        clave = _a_texto(next(iter(fila.values()), None)) if fila else None
+        if _vacio(clave):
+            sin_clave += 1
+            clave = f'#{sin_clave}'
+        else:
+            clave = clave.strip()
+        if clave in resultado:
+            n = 2
+            while f'{clave}#{n}' in resultado:
+                n += 1
+            clave = f'{clave}#{n}'
+        resultado[clave] = fila
+    return resultado
+
+
+def _comparar(seccion, fila, campo, a, b, cambios, rtol, atol):
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in _union(a, b):
+            sub = str(k) if campo is None else f'{campo}.{k}'
+            if k not in b:
+                cambios.append(Cambio(seccion, fila, sub, ELIMINADO, a[k], None))
+            elif k not in a:
+                cambios.append(Cambio(seccion, fila, sub, AGREGADO, None, b[k]))
+            else:
+                _comparar(seccion, fila, sub, a[k], b[k], cambios, rtol, atol)
+    elif _es_tabla(a, b):
+        tabla = _ruta(seccion, fila, campo)
+        filas_a, filas_b = _filas_por_clave(a), _filas_por_clave(b)
+        for clave in _union(filas_a, filas_b):
+            if clave not in filas_b:
+                cambios.append(Cambio(tabla, clave, None, ELIMINADO, filas_a[clave], None))
+            elif clave not in filas_a:
+                cambios.append(Cambio(tabla, clave, None, AGREGADO, None, filas_b[clave]))
+            else:
+                _comparar(tabla, clave, None, filas_a[clave], filas_b[clave], cambios, rtol, atol)
+    elif isinstance(a, list) and isinstance(b, list):
+        base = campo or ''
+        for i in range(max(len(a), len(b))):
+            sub = f'{base}[{i}]'
+            if i >= len(b):
+                cambios.append(Cambio(seccion, fila, sub, ELIMINADO, a[i], None))
+            elif i >= len(a):
+                cambios.append(Cambio(seccion, fila, sub, AGREGADO, None, b[i]))
+            else:
+                _comparar(seccion, fila, sub, a[i], b[i], cambios, rtol, atol)
+    elif not _iguales(a, b, rtol, atol):
+        cambios.append(Cambio(seccion, fila, campo, MODIFICADO, a, b))
+
+
+def _comparar_resultados(a, b, cambios, rtol, atol):
+    """'Resultados' columna por columna: un cambio por columna con la cantidad de filas distintas."""
+    tabla_a, tabla_b = tabla_resultados(a), tabla_resultados(b)
+    if tabla_a is None or tabla_b is None:
+        if tabla_a is not tabla_b:
+            tipo = AGREGADO if tabla_a is None else ELIMINADO
+            cambios.append(Cambio(HOJA_RESULTADOS, None, None, tipo, None, None))
+        return
+    n_a, n_b = tabla_a['valores'].shape[0], tabla_b['valores'].shape[0]
+    if n_a != n_b:
+        cambios.append(Cambio(HOJA_RESULTADOS, None, 'filas', MODIFICADO, n_a, n_b))
+    n = min(n_a, n_b)
+
+    columnas_a = {c: j for j, c in enumerate(tabla_a['columnas'])}
+    columnas_b = {c: j for j, c in enumerate(tabla_b['columnas'])}
+    for columna in _union(columnas_a, columnas_b):
+        if columna not in columnas_b:
+            cambios.append(Cambio(HOJA_RESULTADOS, None, columna, ELIMINADO, None, None))
+        elif columna not in columnas_a:
+            cambios.append(Cambio(HOJA_RESULTADOS, None, columna, AGREGADO, None, None))
+        else:
+            va = np.asarray(tabla_a['valores'][:n, columnas_a[columna]], dtype=np.float64)
+            vb = np.asarray(tabla_b['valores'][:n, columnas_b[columna]], dtype=np.float64)
+            distintas = int((~np.isclose(va, vb, rtol=rtol, atol=atol, equal_nan=True)).sum())
+            if distintas:
+                cambios.append(Cambio(HOJA_RESULTADOS, None, columna, FILAS_MODIFICADAS, None, distintas))
+
+    caso_a, caso_b = tabla_a.get('caso'), tabla_b.get('caso')
+    if caso_a is not None and caso_b is not None:
+        distintas = sum(1 for x, y in zip(caso_a[:n], caso_b[:n]) if _a_texto(x) != _a_texto(y))
+        if distintas:
+            cambios.append(Cambio(HOJA_RESULTADOS, None, 'caso', FILAS_MODIFICADAS, None, distintas))
+
+
+def comparar(datos_anterior, datos_siguiente, anterior=None, siguiente=None,
+             rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA,
+             huellas_anterior=None, huellas_siguiente=None):
+    """
+    Compara dos `datos_extraidos` y devuelve una `Diferencia`. `anterior` y
+    `siguiente` son nombres para el informe. Se pueden pasar huellas ya
+    calculadas (ver `huellas`) para no recalcularlas.
+    """
+    secciones_a, secciones_b = secciones(datos_anterior), secciones(datos_siguiente)
+    huellas_a = huellas(datos_anterior) if huellas_anterior is None else huellas_anterior
+    huellas_b = huellas(datos_siguiente) if huellas_siguiente is None else huellas_siguiente
+
+    cambios, iguales = [], []
+    for nombre in _union(secciones_a, secciones_b):
+        if nombre not in secciones_b:
+            cambios.append(Cambio(nombre, None, None, ELIMINADO, None, None))
+        elif nombre not in secciones_a:
+            cambios.append(Cambio(nombre, None, None, AGREGADO, None, None))
+        elif huellas_a.get(nombre) == huellas_b.get(nombre):
+            iguales.append(nombre)
+        elif nombre == HOJA_RESULTADOS:
+            _comparar_resultados(secciones_a[nombre], secciones_b[nombre], cambios, rtol, atol)
+        else:
+            _comparar(nombre, None, None, _normalizar(secciones_a[nombre]),
+                      _normalizar(secciones_b[nombre]), cambios, rtol, atol)
+    return Diferencia(anterior, siguiente, cambios, iguales)
+
+
+def comparar_archivos(ruta_anterior, ruta_siguiente, rtol=TOLERANCIA_RELATIVA,
+                      atol=TOLERANCIA_ABSOLUTA, **opciones_lector):
+    """
+    Compara dos planillas. Si los archivos son idénticos (mismo SHA-256) no
+    se leen. Lanza ValueError si alguna no se puede leer.
+    """
+    anterior, siguiente = _id_vivienda(ruta_anterior), _id_vivienda(ruta_siguiente)
+    if hash_archivo(ruta_anterior) == hash_archivo(ruta_siguiente):
+        return Diferencia(anterior, siguiente, [])
+    opciones_lector.setdefault('resultados_como_arreglo', True)
+    datos = []
+    for ruta in (ruta_anterior, ruta_siguiente):
+        _, datos_extraidos = leer_planilla(ruta, **opciones_lector)
+        if not datos_extraidos:
+            raise ValueError(f"No se pudo leer '{ruta}'.")
+        datos.append(datos_extraidos)
+    return comparar(datos[0], datos[1], anterior, siguiente, rtol, atol)
+
+
+# -------------------
+# --- Iteraciones ---
+# -------------------
+
+def caso_e_iteracion(datos):
+    """
+    ((rut_evaluador, caso_interno_evaluador), iteracion_evaluador) de una
+    planilla; el caso es None si no tiene 'caso_interno_evaluador'.
+    """
+    generales = ((datos or {}).get(HOJA_PRINCIPAL) or {}).get('datos_generales_proyecto') or {}
+    caso = _a_texto(generales.get('caso_interno_evaluador'))
+    if _vacio(caso):
+        return None, None
+    caso = caso[:-2] if caso.endswith('.0') else caso
+    return (_a_texto(generales.get('rut_evaluador')), caso), _a_real(generales.get('iteracion_evaluador'))
+
+
+class _Entrada:
+    __slots__ = ('id_vivienda', 'caso', 'iteracion', 'huellas', 'huella', 'posicion')
+
+    def __init__(self, id_vivienda, datos, posicion, huellas_secciones):
+        self.id_vivienda = id_vivienda
+        self.caso, self.iteracion = caso_e_iteracion(datos)
+        self.huellas = huellas_secciones
+        self.huella = huella_contenido(datos, huellas_secciones)
+        self.posicion = posicion
+
+
+def _pares(entradas):
+    """Pares de iteraciones consecutivas de cada caso (las sin número de iteración, al final)."""
+    casos = {}
+    for entrada in entradas:
+        if entrada.caso is not None:
+            casos.setdefault(entrada.caso, []).append(entrada)
+    for caso, grupo in casos.items():
+        grupo.sort(key=lambda e: (e.iteracion is None, e.iteracion or 0, e.id_vivienda))
+        for anterior, siguiente in zip(grupo, grupo[1:]):
+            yield caso, anterior, siguiente
+
+
+def _diferencias(entradas, cargar, rtol, atol, preparar=None):
+    """
+    `cargar(posicion)` devuelve los datos de una entrada; `preparar(datos,
+    secciones)` (opcional) los deja listos para comparar esas secciones.
+    """
+    cache = {}
+    for caso, anterior, siguiente in _pares(entradas):
+        if anterior.huella == siguiente.huella:
+            yield caso, Diferencia(anterior.id_vivienda, siguiente.id_vivienda, [], anterior.huellas)
+            continue
+        # Los pares consecutivos comparten una planilla: se guarda solo la última
+        datos = {e.posicion: cache[e.posicion] if e.posicion in cache else cargar(e.posicion)
+                 for e in (anterior, siguiente)}
+        cache = {siguiente.posicion: datos[siguiente.posicion]}
+        datos_a, datos_b = datos[anterior.posicion], datos[siguiente.posicion]
+        if preparar is not None:
+            distintas = {n for n in _union(anterior.huellas, siguiente.huellas)
+                         if anterior.huellas.get(n) != siguiente.huellas.get(n)}
+            datos_a, datos_b = preparar(datos_a, distintas), preparar(datos_b, distintas)
+        yield caso, comparar(datos_a, datos_b, anterior.id_vivienda, siguiente.id_vivienda,
+                             rtol, atol, anterior.huellas, siguiente.huellas)
+
+
+def comparar_iteraciones(planillas, rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA):
+    """
+    Compara cada iteración con la anterior del mismo caso. `planillas` es
+    {id_vivienda: datos_extraidos}. Entrega (caso, Diferencia) por par,
+    incluidos los idénticos (`diferencia.identicas`).
+    """
+    entradas = [_Entrada(id_vivienda, datos, id_vivienda, huellas(datos))
+                for id_vivienda, datos in planillas.items()]
+    yield from _diferencias(entradas, planillas.__getitem__, rtol, atol)
+
+
+def _huellas_jsonl(datos):
+    """
+    Huellas de un registro JSONL sin expandir: ya son tipos JSON, así que no
+    hace falta normalizar. 'Resultados' pasa a arreglo (más rápido que JSON).
+    """
+    resultado = {}
+    for nombre, valor in secciones(datos).items():
+        if nombre == HOJA_RESULTADOS:
+            resultado[nombre] = _huella_resultados(expandir_tablas(valor, arreglos=True))
+        else:
+            resultado[nombre] = hashlib.blake2b(_codificador.encode(valor).encode('utf-8'),
+                                                digest_size=16).hexdigest()
+    return resultado
+
+
+def _expandir_secciones(datos, nombres):
+    """Expande (ver `expandir_tablas`) solo las secciones de `nombres`."""
+    resultado = {}
+    for hoja, valor in (datos or {}).items():
+        if hoja == HOJA_PRINCIPAL and isinstance(valor, dict):
+            resultado[hoja] = {apartado: expandir_tablas(contenido, arreglos=True)
+                               if f'{hoja}.{apartado}' in nombres else contenido
+                               for apartado, contenido in valor.items()}
+        else:
+            resultado[hoja] = expandir_tablas(valor, arreglos=True) if hoja in nombres else valor
+    return resultado
+
+
+def _id_registro(registro, n):
+    if registro.get('id_vivienda'):
+        return registro['id_vivienda']
+    return _id_vivienda(registro['archivo']) if registro.get('archivo') else f'planilla_{n:06d}'
+
+
+def comparar_iteraciones_jsonl(ruta, rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA):
+    """
+    Como `comparar_iteraciones`, sobre un JSONL de 'leer'. Una primera pasada
+    guarda solo caso, iteración, huellas y posición de cada línea; después se
+    vuelven a leer únicamente los pares con huellas distintas, y de ellos se
+    expanden solo las secciones que cambiaron.
+    """
+    entradas = []
+    with open(ruta, 'rb') as f:
+        n = 0
+        while True:
+            posicion = f.tell()
+            linea = f.readline()
+            if not linea:
+                break
+            if not linea.strip():
+                continue
+            n += 1
+            registro = json.loads(linea)
+            datos = registro.get('datos')
+            entradas.append(_Entrada(_id_registro(registro, n), datos, posicion, _huellas_jsonl(datos)))
+
+        def cargar(posicion):
+            f.seek(posicion)
+            return json.loads(f.readline()).get('datos')
+
+        yield from _diferencias(entradas, cargar, rtol, atol, _expandir_secciones)
+
+
+def tabla_cambios(diferencias):
+    """DataFrame con un cambio por fila a partir de pares (caso, Diferencia)."""
+    filas = []
+    for caso, diferencia in diferencias:
+        for fila in diferencia.a_filas():
+            fila['caso'] = ' / '.join(c or '' for c in caso) if isinstance(caso, tuple) else caso
+            filas.append(fila)
+    return pd.DataFrame(filas, columns=['caso', 'anterior', 'siguiente'] + COLUMNAS)
@@ -0,0 +1,373 @@
+# ----------------------------
+# -------- DUPLICADOS --------
+# ----------------------------
+
+# Detección de planillas duplicadas o casi duplicadas (copias de una planilla
+# con otro encabezado, o con cambios mínimos de geometría):
+#
+#   indice = IndiceDuplicados()
+#   for id_vivienda, datos in planillas:
+#       indice.agregar(id_vivienda, datos)
+#   pares = indice.duplicados()     # id_a, id_b, tipo ('exacto'/'similar'), similitud, grupo
+#
+# Cada planilla se resume en una `Huella`:
+#   - exacta: hash de las secciones de la envolvente de 'CEV-CEVE', sin el
+#     encabezado del proyecto. Las filas se identifican por su primera columna
+#     (como en diferencias.py), así que el orden de las filas no importa.
+#   - firma: MinHash de los valores numéricos de esas secciones. La fracción de
+#     posiciones iguales entre dos firmas estima la similitud de Jaccard.
+#
+# Los casi duplicados se buscan con LSH: la firma se divide en bandas y solo
+# se comparan las planillas que coinciden en alguna banda completa. Con las
+# bandas ordenadas con numpy no hay comparación de todos contra todos.
+
+import hashlib
+import json
+import os
+import zlib
+
+from .diferencias import _filas_por_clave
+from .exportador import _a_real
+from .registros import RegistroBase
+from .serializacion import _normalizar, leer_jsonl
+from .utilidades import id_vivienda as _id_vivienda
+from .utilidades import leer_planilla, modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Secciones de 'CEV-CEVE' que describen la vivienda (no el proyecto ni el evaluador).
+SECCIONES_ENVOLVENTE = [
+    'elementos_de_la_envolvente', 'dimensiones_de_la_vivienda', 'area_y_coeficiente_muros',
+    'puentes_termicos_particulares', 'puertas', 'ventanas', 'obstrucciones', 'techos', 'pisos'
+]
+
+N_PERMUTACIONES = 128
+BANDAS = 16                 # 16 bandas de 8: candidatos desde ~0.7 de similitud
+UMBRAL_SIMILITUD = 0.8
+SEMILLA = 7919
+
+# Cifras significativas con que se comparan los números (ruido de punto flotante).
+CIFRAS = 6
+
+# Primo menor que 2**32: (a * x + b) % primo cabe en uint64 sin desbordar.
+_PRIMO = (1 << 32) - 5
+
+# Grupos de LSH más grandes que esto se comparan solo contra su primer elemento.
+_MAX_GRUPO_COMPLETO = 32
+
+EXACTO = 'exacto'
+SIMILAR = 'similar'
+
+
+# ---------------
+# --- Huellas ---
+# ---------------
+
+def _valor(valor):
+    """Número a CIFRAS cifras significativas, o texto sin mayúsculas ni espacios sobrantes; None si está vacío."""
+    if isinstance(valor, bool):
+        return str(valor).casefold()
+    if isinstance(valor, (int, float)):
+        return float(f'{valor:.{CIFRAS}g}') if valor == valor else None
+    numero = _a_real(valor)
+    if numero is not None:
+        return float(f'{numero:.{CIFRAS}g}')
+    texto = ' '.join(valor.casefold().split())
+    return texto or None
+
+
+def _hojas(ruta, valor, valores):
+    """Agrega a `valores` las hojas de `valor` como (ruta, valor); las tablas se indexan por su clave."""
+    if isinstance(valor, dict):
+        for k, v in valor.items():
+            _hojas(f'{ruta}.{k}', v, valores)
+    elif isinstance(valor, list):
+        if valor and isinstance(valor[0], RegistroBase):
+            valor = _normalizar(valor)
+        if valor and all(isinstance(f, dict) for f in valor):
+            for clave, fila in _filas_por_clave(valor).items():
+                _hojas(f'{ruta}[{clave}]', fila, valores)
+        else:
+            for i, v in enumerate(valor):
+                _hojas(f'{ruta}[{i}]', v, valores)
+    elif valor is not None:
+        if not isinstance(valor, (str, int, float)):
+            # Tipos de numpy, fechas, registros, tablas columnares
+            valor = _normalizar(valor)
+            if isinstance(valor, (dict, list)) or valor is None:
+                _hojas(ruta, valor, valores)
+                return
+        normalizado = _valor(valor)
+        if normalizado is not None:
+            valores.append((ruta, normalizado))
+
+
+def valores_envolvente(datos):
+    """
+    Valores normalizados de la envolvente: [(ruta, valor)] ordenado por ruta,
+    con los números a CIFRAS cifras significativas (float), los textos sin
+    mayúsculas ni espacios sobrantes, y sin los valores vacíos.
+    """
+    cev = (datos or {}).get('CEV-CEVE') or {}
+    valores = []
+    for seccion in SECCIONES_ENVOLVENTE:
+        if seccion in cev:
+            _hojas(seccion, cev[seccion], valores)
+    valores.sort()
+    return valores
+
+
+def _permutaciones(n_permutaciones, semilla):
+    rng = np.random.default_rng(semilla)
+    a = rng.integers(1, _PRIMO, size=n_permutaciones, dtype=np.uint64)
+    b = rng.integers(0, _PRIMO, size=n_permutaciones, dtype=np.uint64)
+    return a, b
+
+
+def firma_minhash(elementos, n_permutaciones=N_PERMUTACIONES, semilla=SEMILLA, permutaciones=None):
+    """MinHash (uint32) de un conjunto de textos; vacío -> firma de ceros."""
+    a, b = permutaciones or _permutaciones(n_permutaciones, semilla)
+    if not elementos:
+        return np.zeros(len(a), dtype=np.uint32)
+    x = np.fromiter((zlib.crc32(e.encode('utf-8')) for e in elementos),
+                    dtype=np.uint64, count=len(elementos)) % np.uint64(_PRIMO)
+    valores = (a[:, None] * x[None, :] + b[:, None]) % np.uint64(_PRIMO)
+    return valores.min(axis=1).astype(np.uint32)
+
+
+class Huella:
+    """`exacta` (texto hexadecimal) y `firma` (MinHash, arreglo uint32)."""
+    __slots__ = ('exacta', 'firma')
+
+    def __init__(self, exacta, firma):
+        self.exacta = exacta
+        self.firma = firma
+
+    def similitud(self, otra):
+        """Similitud de Jaccard estimada entre los valores numéricos de dos planillas."""
+        if self.exacta == otra.exacta:
+            return 1.0
+        return float(np.mean(self.firma == otra.firma))
+
+    def __repr__(self):
+        return f"Huella({self.exacta[:12]}…)"
+
+
+def huella(datos, n_permutaciones=N_PERMUTACIONES, semilla=SEMILLA, permutaciones=None):
+    """Calcula la `Huella` de un `datos_extraidos` (PBTD01 o PBTD03)."""
+    valores = valores_envolvente(datos)
+    texto = json.dumps(valores, ensure_ascii=False, separators=(',', ':'))
+    exacta = hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+    numericos = {f'{ruta}={valor!r}' for ruta, valor in valores if isinstance(valor, float)}
+    return Huella(exacta, firma_minhash(numericos, n_permutaciones, semilla, permutaciones))
+
+
+# --------------
+# --- Índice ---
+# --------------
+
+class IndiceDuplicados:
+    """
+    Índice de huellas para encontrar duplicados exactos (misma `exacta`) y
+    casi duplicados (firmas con similitud >= `umbral`) entre muchas planillas.
+    `n_permutaciones` debe ser múltiplo de `bandas`.
+    """
+
+    def __init__(self, n_permutaciones=N_PERMUTACIONES, bandas=BANDAS,
+                 umbral=UMBRAL_SIMILITUD, semilla=SEMILLA):
+        if n_permutaciones % bandas:
+            raise ValueError("'n_permutaciones' debe ser múltiplo de 'bandas'.")
+        self.n_permutaciones = n_permutaciones
+        self.bandas = bandas
+        self.umbral = umbral
+        self.semilla = semilla
+        self._permutaciones = _permutaciones(n_permutaciones, semilla)
+        self.ids = []
+        self.exactas = []
+        self._por_exacta = {}
+        self._firmas = []
+        self._matriz = np.zeros((0, n_permutaciones), dtype=np.uint32)
+        self._claves = None
+        self._orden = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def huella(self, datos):
+        return huella(datos, self.n_permutaciones, self.semilla, self._permutaciones)
+
+    def agregar(self, id_vivienda, datos):
+        """Agrega una planilla y devuelve su `Huella`."""
+        resultado = self.huella(datos)
+        self.agregar_huella(id_vivienda, resultado)
+        return resultado
+
+    def agregar_huella(self, id_vivienda, huella_planilla):
+        self._por_exacta.setdefault(huella_planilla.exacta, []).append(len(self.ids))
+        self.ids.append(id_vivienda)
+        self.exactas.append(huella_planilla.exacta)
+        self._firmas.append(huella_planilla.firma)
+        self._claves = self._orden = None
+
+    def agregar_planillas(self, rutas, **opciones_lector):
+        """Lee e indexa planillas (id = nombre del archivo). Devuelve las rutas que fallaron."""
+        fallidas = []
+        for ruta in rutas:
+            _, datos = leer_planilla(ruta, **opciones_lector)
+            if not datos:
+                fallidas.append(ruta)
+                continue
+            self.agregar(_id_vivienda(ruta), datos)
+        return fallidas
+
+    def agregar_jsonl(self, ruta):
+        """Indexa un JSONL de 'leer'. Devuelve la cantidad de planillas agregadas."""
+        n = 0
+        for n, registro in enumerate(leer_jsonl(ruta), start=1):
+            nombre = registro.get('id_vivienda') or (
+                _id_vivienda(registro['archivo']) if registro.get('archivo') else f'planilla_{n:06d}')
+            self.agregar(nombre, registro.get('datos'))
+        return n
+
+    # --- Bandas ---
+
+    def _firmas_matriz(self):
+        if self._firmas:
+            self._matriz = np.vstack([self._matriz] + [f[None, :] for f in self._firmas])
+            self._firmas = []
+        return self._matriz
+
+    def _claves_banda(self, firmas):
+        """Una clave uint64 por banda: (n, n_permutaciones) -> (n, bandas)."""
+        filas = self.n_permutaciones // self.bandas
+        partes = firmas.reshape(len(firmas), self.bandas, filas).astype(np.uint64)
+        claves = np.zeros(partes.shape[:2], dtype=np.uint64)
+        for j in range(filas):
+            # Hash polinomial; el desborde de uint64 es intencional
+            claves = claves * np.uint64(0x100000001B3) + partes[:, :, j]
+        return claves
+
+    def _bandas_ordenadas(self):
+        if self._claves is None:
+            claves = self._claves_banda(self._firmas_matriz())
+            self._orden = np.argsort(claves, axis=0, kind='stable')
+            self._claves = np.take_along_axis(claves, self._orden, axis=0)
+        return self._claves, self._orden
+
+    # --- Consultas ---
+
+    def buscar(self, datos_o_huella, umbral=None):
+        """
+        Planillas del índice iguales o parecidas a `datos_o_huella` (datos o
+        `Huella`). Devuelve [(id_vivienda, tipo, similitud)] de mayor a menor.
+        """
+        umbral = self.umbral if umbral is None else umbral
+        consulta = datos_o_huella if isinstance(datos_o_huella, Huella) else self.huella(datos_o_huella)
+        if not self.ids:
+            return []
+        claves, orden = self._bandas_ordenadas()
+        clave_consulta = self._claves_banda(consulta.firma[None, :])[0]
+        candidatos = set()
+        for banda in range(self.bandas):
+            columna = claves[:, banda]
+            desde = np.searchsorted(columna, clave_consulta[banda], side='left')
+            hasta = np.searchsorted(columna, clave_consulta[banda], side='right')
+            candidatos.update(orden[desde:hasta, banda].tolist())
+        candidatos.update(self._por_exacta.get(consulta.exacta, ()))
+
+        matriz = self._firmas_matriz()
+        resultado = []
+        for i in candidatos:
+            if self.exactas[i] == consulta.exacta:
+                resultado.append((self.ids[i], EXACTO, 1.0))
+            else:
+                similitud = float(np.mean(matriz[i] == consulta.firma))
+                if similitud >= umbral:
+                    resultado.append((self.ids[i], SIMILAR, similitud))
+        resultado.sort(key=lambda r: (-r[2], str(r[0])))
+        return resultado
+
+    def _pares_candidatos(self, indices):
+        """Pares (i, j) que comparten al menos una banda, entre las filas `indices`."""
+        claves = self._claves_banda(self._firmas_matriz()[indices])
+        pares = set()
+        for banda in range(self.bandas):
+            columna = claves[:, banda]
+            orden = np.argsort(columna, kind='stable')
+            ordenada = columna[orden]
+            cortes = np.flatnonzero(np.diff(ordenada)) + 1
+            for grupo in np.split(orden, cortes):
+                if len(grupo) < 2:
+                    continue
+                grupo = indices[np.sort(grupo)].tolist()
+                if len(grupo) <= _MAX_GRUPO_COMPLETO:
+                    pares.update((a, b) for k, a in enumerate(grupo) for b in grupo[k + 1:])
+                else:
+                    pares.update((grupo[0], b) for b in grupo[1:])
+        return pares
+
+    def duplicados(self, umbral=None):
+        """
+        Todos los duplicados del índice como DataFrame (id_a, id_b, tipo,
+        similitud, grupo). Los exactos se informan contra la primera planilla
+        con la misma huella; los casi duplicados, entre esas primeras planillas.
+        `grupo` une los pares encadenados (a~b, b~c -> mismo grupo).
+        """
+        umbral = self.umbral if umbral is None else umbral
+        matriz = self._firmas_matriz()
+        pares = [(iguales[0], i, EXACTO, 1.0)
+                 for iguales in self._por_exacta.values() for i in iguales[1:]]
+
+        indices = np.array([iguales[0] for iguales in self._por_exacta.values()], dtype=np.int64)
+        candidatos = sorted(self._pares_candidatos(indices)) if len(indices) > 1 else []
+        if candidatos:
+            a, b = np.array(candidatos, dtype=np.int64).T
+            similitudes = (matriz[a] == matriz[b]).mean(axis=1)
+            for i, j, s in zip(a.tolist(), b.tolist(), similitudes.tolist()):
+                if s >= umbral:
+                    pares.append((i, j, SIMILAR, s))
+
+        # Grupos por unión-búsqueda
+        padre = list(range(len(self.ids)))
+
+        def raiz(i):
+            while padre[i] != i:
+                padre[i] = padre[padre[i]]
+                i = padre[i]
+            return i
+
+        for i, j, _, _ in pares:
+            padre[raiz(j)] = raiz(i)
+        numeros = {}
+        filas = [{'id_a': self.ids[i], 'id_b': self.ids[j], 'tipo': tipo, 'similitud': s,
+                  'grupo': numeros.setdefault(raiz(i), len(numeros))}
+                 for i, j, tipo, s in pares]
+        tabla = pd.DataFrame(filas, columns=['id_a', 'id_b', 'tipo', 'similitud', 'grupo'])
+        return tabla.sort_values(['grupo', 'tipo', 'similitud'], ascending=[True, True, False],
+                                 ignore_index=True)
+
+    # --- Persistencia ---
+
+    def guardar(self, ruta):
+        """Guarda el índice en un archivo .npz."""
+        temporal = ruta + '.tmp.npz'
+        np.savez(temporal, firmas=self._firmas_matriz(),
+                 ids=np.array([str(i) for i in self.ids], dtype=str),
+                 exactas=np.array(self.exactas, dtype='U32'),
+                 parametros=np.array([self.n_permutaciones, self.bandas, self.semilla]),
+                 umbral=np.array(self.umbral))
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as archivo:
+            n_permutaciones, bandas, semilla = (int(v) for v in archivo['parametros'])
+            indice = cls(n_permutaciones, bandas, float(archivo['umbral']), semilla)
+            for id_vivienda, exacta, firma in zip(archivo['ids'].tolist(), archivo['exactas'].tolist(),
+                                                  archivo['firmas']):
+                indice.agregar_huella(id_vivienda, Huella(exacta, firma))
+        return indice
+
+    def __repr__(self):
+        return f"IndiceDuplicados({len(self)} planillas, umbral={self.umbral:g})"
@@ -0,0 +1,355 @@
+# ----------------------------
+# -------- EXPORTADOR --------
+# ----------------------------
+
+import os
+
+from .analitica import tabla_resultados as _tabla_resultados
+from .lector import LectorPBTD01_v2, LectorPBTD03_v2
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+
+# Campos del encabezado del proyecto (hoja 'CEV-CEVE').
+CAMPOS_PROYECTO = [
+    'tipo_de_calificacion', 'tipo_de_vivienda_calificacion', 'region', 'comuna',
+    'zona_termica_proyecto', 'dormitorios_de_la_vivienda',
+    'identificacion_de_la_vivienda_a_evaluar', 'nombre_del_proyecto',
+    'direccion_de_la_vivienda', 'tipo_de_vivienda', 'rol_vivienda',
+    'evaluador_energetico', 'rol_registro_de_evaluadores', 'rut_evaluador',
+    'version_planilla', 'caso_interno_evaluador', 'iteracion_evaluador',
+    'solicitado_por', 'rut_mandante'
+]
+# Los que se exportan como números; el resto, como texto.
+CAMPOS_PROYECTO_REALES = {
+    'dormitorios_de_la_vivienda', 'caso_interno_evaluador', 'iteracion_evaluador'
+}
+
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+         'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+
+# Esquema de cada tabla normalizada: (columna, tipo) con tipo 'texto' o 'real'.
+# Todas las tablas llevan además 'id_vivienda' como primera columna.
+ESQUEMAS = {
+    'proyecto': [('archivo', 'texto'), ('tipo_planilla', 'texto')] +
+                [(c, 'real' if c in CAMPOS_PROYECTO_REALES else 'texto') for c in CAMPOS_PROYECTO] +
+                [('area_total_m2', 'real'), ('volumen_total_m3', 'real')],
+    'muros': [
+        ('muro', 'texto'), ('nombre_muro', 'texto'), ('angulo_azimut', 'real'),
+        ('orientacion', 'texto'), ('densidad_muro', 'texto'), ('area_m2', 'real'),
+        ('u_w_m2k', 'real'), ('puente_termico_p01', 'texto'),
+        ('puente_termico_p02', 'texto'), ('puente_termico_p03', 'texto'),
+        ('posicion_aislacion', 'texto')
+    ],
+    'ventanas': [
+        ('id_ventana', 'texto'), ('tipo_ventana', 'texto'), ('azimut', 'real'),
+        ('orientacion', 'texto'), ('elemento_envolvente', 'texto'),
+        ('tipo_cierre', 'texto'), ('posicion_ventanal', 'texto'),
+        ('aislacion_con_sin_retorno', 'texto'), ('alto_m', 'real'), ('ancho_m', 'real'),
+        ('categoria_para_pt_y_infilt', 'texto'), ('tipo_marco', 'texto'),
+        ('fav1_d', 'real'), ('fav1_l', 'real'), ('fav2_izquierda_p', 'real'),
+        ('fav2_izquierda_s', 'real'), ('fav2_derecha_p', 'real'),
+        ('fav2_derecha_s', 'real'), ('fav3_e', 'real'), ('fav3_t', 'real'),
+        ('fav3_beta', 'real'), ('fav3_alpha', 'real')
+    ],
+    'puertas': [
+        ('id_puerta', 'texto'), ('tipo_puerta', 'texto'), ('azimut', 'real'),
+        ('orientacion', 'texto'), ('categoria_infiltracion', 'texto'),
+        ('alto_m', 'real'), ('ancho_m', 'real'), ('area_vidrio_m2', 'real'),
+        ('fav1_d', 'real'), ('fav1_l', 'real'), ('fav2_izquierda_p', 'real'),
+        ('fav2_izquierda_s', 'real'), ('fav2_derecha_p', 'real'),
+        ('fav2_derecha_s', 'real'), ('fav3_e', 'real'), ('fav3_t', 'real'),
+        ('fav3_beta', 'real'), ('fav3_alpha', 'real')
+    ],
+    'obstrucciones': [
+        ('orientacion', 'texto'), ('anual_referencial_rad_directa_porc', 'real'),
+        ('azimut_rango', 'texto'), ('id_obstruccion', 'texto'), ('division', 'real'),
+        ('a_m', 'real'), ('b_m', 'real'), ('d_m', 'real')
+    ],
+    'techos': [
+        ('id_techo', 'texto'), ('techos', 'texto'), ('densidad_techo', 'texto'),
+        ('area_m2', 'real'), ('u_w_m2k', 'real'), ('camaras_de_aire', 'texto'),
+        ('tipo_de_cubierta', 'texto'), ('posicion_aislacion', 'texto')
+    ],
+    'pisos': [
+        ('id_piso', 'texto'), ('piso', 'texto'), ('densidad_piso', 'texto'),
+        ('area_m2', 'real'), ('u_w_m2k', 'real'),
+        ('perimetro_contacto_terreno_m', 'real'), ('piso_ventilado', 'texto'),
+        ('posicion_aislacion', 'texto'), ('ls_w_k', 'real')
+    ],
+    'dimensiones': [
+        ('piso', 'texto'), ('area_m2', 'real'), ('altura_m', 'real'), ('volumen_m3', 'real')
+    ],
+    'renovaciones': [('hora', 'texto')] + [(m, 'real') for m in MESES],
+    'resumen': [
+        ('seccion', 'texto'), ('clave', 'texto'),
+        ('valor', 'real'), ('valor_texto', 'texto')
+    ]
+}
+
+# Tablas de la hoja 'CEV-CEVE' que se exportan fila por fila.
+TABLAS_CEV = {
+    'muros': 'area_y_coeficiente_muros',
+    'ventanas': 'ventanas',
+    'puertas': 'puertas',
+    'techos': 'techos',
+    'pisos': 'pisos'
+}
+
+
+def _importar_pyarrow():
+    """Importa pyarrow solo cuando se necesita."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "La exportación a Parquet requiere 'pyarrow'. "
+            "Instálelo con: pip install pypbtdcev[parquet]") from e
+    return pyarrow
+
+
+def _tipo_arrow(pa, tipo):
+    return {'texto': pa.string(), 'real': pa.float64()}[tipo]
+
+
+def _a_real(valor):
+    if valor is None:
+        return None
+    try:
+        numero = float(str(valor).replace(',', '.')) if isinstance(valor, str) else float(valor)
+    except (ValueError, TypeError):
+        return None
+    return None if np.isnan(numero) else numero
+
+
+def _a_texto(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return str(valor)
+
+
+def _aplanar(prefijo, valor, filas):
+    """Aplana un diccionario anidado en pares (clave con puntos, valor)."""
+    if isinstance(valor, dict):
+        for k, v in valor.items():
+            _aplanar(f'{prefijo}.{k}' if prefijo else str(k), v, filas)
+    else:
+        filas.append((prefijo, valor))
+
+
+def tablas_normalizadas(id_vivienda, datos, archivo=None):
+    """
+    Convierte un `datos_extraidos` (PBTD01 o PBTD03) en tablas normalizadas.
+    Devuelve {tabla: lista de diccionarios}, todos con 'id_vivienda'.
+    La tabla 'resultados' se devuelve aparte en `tabla_resultados`.
+    """
+    cev = (datos or {}).get('CEV-CEVE') or {}
+    tablas = {nombre: [] for nombre in ESQUEMAS}
+
+    # --- Encabezado del proyecto ---
+    generales = cev.get('datos_generales_proyecto') or {}
+    totales = (cev.get('dimensiones_de_la_vivienda') or {}).get('totales') or {}
+    proyecto = {'archivo': archivo,
+                'tipo_planilla': 'PBTD03' if 'Resumen' in (datos or {}) else 'PBTD01'}
+    proyecto.update({c: generales.get(c) for c in CAMPOS_PROYECTO})
+    proyecto.update(totales)
+    tablas['proyecto'].append(proyecto)
+
+    # --- Tablas fila a fila ---
+    # Se copian las filas (también acepta registros o tablas columnares)
+    for nombre, seccion in TABLAS_CEV.items():
+        tablas[nombre].extend(dict(f.items()) for f in cev.get(seccion) or [])
+
+    dimensiones = cev.get('dimensiones_de_la_vivienda') or {}
+    tablas['dimensiones'].extend(dict(f.items()) for f in dimensiones.get('pisos') or [])
+
+    for orientacion, bloque in (cev.get('obstrucciones') or {}).items():
+        for detalle in bloque.get('obstrucciones_detalle') or []:
+            fila = {'orientacion': orientacion,
+                    'anual_referencial_rad_directa_porc': bloque.get('anual_referencial_rad_directa_porc'),
+                    'azimut_rango': bloque.get('azimut_rango')}
+            fila.update(detalle)
+            tablas['obstrucciones'].append(fila)
+
+    condiciones = cev.get('condiciones_de_uso') or {}
+    tablas['renovaciones'].extend(
+        dict(f.items()) for f in condiciones.get('renovaciones_aire_por_hora') or [])
+
+    # --- Resumen (PBTD03) en formato largo ---
+    pares = []
+    _aplanar('', (datos or {}).get('Resumen') or {}, pares)
+    for clave, valor in pares:
+        seccion, _, resto = clave.partition('.')
+        tablas['resumen'].append({'seccion': seccion, 'clave': resto,
+                                  'valor': _a_real(valor), 'valor_texto': _a_texto(valor)})
+
+    for filas in tablas.values():
+        for fila in filas:
+            fila['id_vivienda'] = id_vivienda
+    return tablas
+
+
+def tabla_resultados(id_vivienda, resultados):
+    """
+    Convierte 'Resultados' (lista de diccionarios o forma de arreglos) en
+    columnas: {'id_vivienda', 'fila', 'caso', <columnas numéricas>}.
+    """
+    tabla = _tabla_resultados(resultados)
+    if tabla is None:
+        return None
+
+    n = tabla['valores'].shape[0]
+    columnas = {
+        'id_vivienda': [id_vivienda] * n,
+        'fila': np.arange(n, dtype=np.int32),
+        'caso': [_a_texto(c) for c in tabla['caso']] if tabla['caso'] is not None else [None] * n
+    }
+    for j, col in enumerate(tabla['columnas']):
+        columnas[col] = tabla['valores'][:, j]
+    return columnas
+
+
+class ExportadorParquet:
+    """
+    Escribe las tablas normalizadas de muchas planillas en archivos Parquet
+    (uno por tabla), en grupos de filas de tamaño fijo, a medida que se
+    agregan viviendas. Usar como context manager o llamar a `cerrar()`.
+
+    El esquema de 'resultados' es la unión de las columnas de las viviendas
+    agregadas antes del primer grupo escrito (las que no traen una columna
+    la dejan vacía). Una columna nueva después de eso lanza ValueError.
+    """
+
+    def __init__(self, directorio, filas_por_grupo=100_000, compresion='zstd'):
+        self.pa = _importar_pyarrow()
+        self.directorio = directorio
+        self.filas_por_grupo = filas_por_grupo
+        self.compresion = compresion
+        os.makedirs(directorio, exist_ok=True)
+
+        self._escritores = {}
+        self._pendientes = {}
+        self._filas_pendientes = {}
+        self._esquemas = {}
+        for nombre, columnas in ESQUEMAS.items():
+            campos = [('id_vivienda', 'texto')] + columnas
+            self._esquemas[nombre] = self.pa.schema(
+                [(c, _tipo_arrow(self.pa, t)) for c, t in campos])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _agregar_tabla(self, nombre, tabla):
+        self._pendientes.setdefault(nombre, []).append(tabla)
+        self._filas_pendientes[nombre] = self._filas_pendientes.get(
+            nombre, 0) + tabla.num_rows
+        if self._filas_pendientes[nombre] >= self.filas_por_grupo:
+            self._vaciar(nombre)
+
+    def _vaciar(self, nombre):
+        pendientes = self._pendientes.pop(nombre, [])
+        self._filas_pendientes[nombre] = 0
+        if not pendientes:
+            return
+        tabla = self.pa.concat_tables(pendientes)
+        if nombre not in self._escritores:
+            ruta = os.path.join(self.directorio, f'{nombre}.parquet')
+            self._escritores[nombre] = self.pa.parquet.ParquetWriter(
+                ruta, tabla.schema, compression=self.compresion)
+        self._escritores[nombre].write_table(tabla, row_group_size=self.filas_por_grupo)
+
+    def agregar(self, id_vivienda, datos, archivo=None):
+        """Agrega todas las tablas de un `datos_extraidos` al exportador."""
+        for nombre, filas in tablas_normalizadas(id_vivienda, datos, archivo).items():
+            if not filas:
+                continue
+            esquema = self._esquemas[nombre]
+            columnas = {}
+            for campo in esquema:
+                convertir = _a_real if campo.type == self.pa.float64() else _a_texto
+                columnas[campo.name] = [convertir(f.get(campo.name)) for f in filas]
+            self._agregar_tabla(nombre, self.pa.table(columnas, schema=esquema))
+
+        columnas = tabla_resultados(id_vivienda, (datos or {}).get('Resultados'))
+        if columnas is not None:
+            self._agregar_resultados(columnas)
+
+    def _agregar_resultados(self, columnas):
+        pa = self.pa
+        if 'resultados' not in self._esquemas:
+            campos = [('id_vivienda', pa.string()), ('fila', pa.int32()), ('caso', pa.string())]
+            campos += [(c, pa.float64()) for c in columnas
+                       if c not in ('id_vivienda', 'fila', 'caso')]
+            self._esquemas['resultados'] = pa.schema(campos)
+
+        esquema = self._esquemas['resultados']
+        nuevas = [c for c in columnas if esquema.get_field_index(c) < 0]
+        if nuevas:
+            esquema = self._ampliar_resultados(esquema, nuevas, columnas['id_vivienda'][:1])
+        n = len(columnas['fila'])
+        arreglos = [pa.array(columnas[c.name], type=c.type) if c.name in columnas
+                    else pa.nulls(n, type=c.type) for c in esquema]
+        self._agregar_tabla('resultados', pa.Table.from_arrays(arreglos, schema=esquema))
+
+    def _ampliar_resultados(self, esquema, nuevas, id_vivienda):
+        """Agrega columnas al esquema de 'resultados' mientras no se haya escrito nada."""
+        pa = self.pa
+        if 'resultados' in self._escritores:
+            raise ValueError(
+                f"La vivienda {id_vivienda[0] if id_vivienda else ''!r} trae columnas de 'resultados' "
+                f"que no están en el archivo ya escrito: {nuevas}. Aumente 'filas_por_grupo' "
+                "o exporte esas planillas por separado.")
+        for c in nuevas:
+            campo = pa.field(c, pa.float64())
+            esquema = esquema.append(campo)
+            self._pendientes['resultados'] = [
+                t.append_column(campo, pa.nulls(t.num_rows, type=campo.type))
+                for t in self._pendientes.get('resultados', [])]
+        self._esquemas['resultados'] = esquema
+        return esquema
+
+    def cerrar(self):
+        """Escribe los grupos pendientes y cierra los archivos."""
+        for nombre in list(self._pendientes):
+            self._vaciar(nombre)
+        for escritor in self._escritores.values():
+            escritor.close()
+        self._escritores = {}
+
+
+def exportar_planillas(rutas, directorio, tipo='03', filas_por_grupo=100_000):
+    """
+    Lee las planillas de a una y las exporta a Parquet en `directorio`.
+    `tipo` es '01' (LectorPBTD01_v2) o '03' (LectorPBTD03_v2).
+    Devuelve la lista de archivos que no se pudieron leer.
+    """
+    fallidos = []
+    with ExportadorParquet(directorio, filas_por_grupo=filas_por_grupo) as exportador:
+        for ruta in rutas:
+            if tipo == '03':
+                lector = LectorPBTD03_v2(ruta, resultados_como_arreglo=True)
+            else:
+                lector = LectorPBTD01_v2(ruta)
+            if not lector.datos_extraidos:
+                fallidos.append(ruta)
+                continue
+            id_vivienda = os.path.splitext(os.path.basename(ruta))[0]
+            exportador.agregar(id_vivienda, lector.datos_extraidos, archivo=ruta)
+    return fallidos
+
+
+def leer_tabla(directorio, tabla, columnas=None, filtros=None):
+    """
+    Lee una tabla exportada cargando solo las columnas pedidas.
+    `filtros` usa la sintaxis de pyarrow (ej: [('zona_termica_proyecto', '=', 'C')]).
+    """
+    pa = _importar_pyarrow()
+    ruta = os.path.join(directorio, f'{tabla}.parquet')
+    return pa.parquet.read_table(ruta, columns=columnas, filters=filtros)
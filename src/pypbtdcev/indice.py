@@ -0,0 +1,215 @@
+# ----------------------------
+# ---------- ÍNDICE ----------
+# ----------------------------
+
+import glob
+import os
+import sqlite3
+
+from .utilidades import hash_archivo, leer_planilla
+
+
+# Campos de 'datos_generales_proyecto' que se guardan en el índice.
+CAMPOS_TEXTO = [
+    'region', 'comuna', 'zona_termica_proyecto', 'evaluador_energetico',
+    'rut_evaluador', 'version_planilla', 'caso_interno_evaluador'
+]
+CAMPOS_NUMERICOS = ['iteracion_evaluador']
+
+# Totales del 'Resumen' (PBTD03): columna -> ruta dentro de datos['Resumen'].
+TOTALES_RESUMEN = {
+    'demanda_calefaccion_kwh': ('tablas_mensuales', '1_demanda_calefaccion_comparativa',
+                                'calefaccion_vivienda', 'anual'),
+    'demanda_refrigeracion_kwh': ('tablas_mensuales', '2_demanda_refrigeracion_comparativa',
+                                  'refrigeracion_vivienda', 'anual'),
+    # OJO: el lector guarda las filas 12-15 de la hoja en este orden, así que
+    # 'Enfriamiento: HD(-)' queda en la tabla '3_...' y 'Sobrecalentamiento: HD(+)' en '4_...'
+    'hd_menos_horas': ('tablas_mensuales', '3_hd_mas_comparativa',
+                       'enfriamiento_hd_vivienda', 'anual'),
+    'hd_mas_horas': ('tablas_mensuales', '4_hd_menos_comparativa',
+                     'sobrecalentamiento_hd_vivienda', 'anual'),
+    'consumo_total_kwh_m2_ano': ('consumos', '4_balance_general',
+                                 'consumo_total_final', 'kwh_m2_ano'),
+    'coeficiente_c': ('consumos', '4_balance_general', 'indicadores', 'coeficiente_c'),
+    'ahorro_total_porc': ('demanda_energetica', 'comparativa_casos', 'ahorro_total_porc')
+}
+
+# Columnas con índice para las búsquedas habituales.
+COLUMNAS_INDEXADAS = ['comuna', 'region', 'zona_termica_proyecto', 'evaluador_energetico',
+                      'rut_evaluador', 'iteracion_evaluador', 'hash']
+
+# Sufijos admitidos por `buscar` (ej: iteracion_evaluador__gt=2).
+OPERADORES = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=', 'ne': '!=', 'like': 'LIKE'}
+
+
+def _a_real(valor):
+    if valor is None:
+        return None
+    try:
+        return float(str(valor).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _a_texto(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        # Evita '2.0' en campos como el caso interno
+        return str(int(valor))
+    return str(valor)
+
+
+def _valor_anidado(d, ruta):
+    for clave in ruta:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(clave)
+    return d
+
+
+class IndicePlanillas:
+    """
+    Índice local en SQLite con los datos generales, el hash del contenido y
+    los totales del 'Resumen' de cada planilla. La reindexación es
+    incremental: un archivo solo se vuelve a leer si cambió su tamaño o
+    fecha de modificación y, además, su hash.
+    """
+
+    def __init__(self, ruta_db):
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.row_factory = sqlite3.Row
+        self._crear_esquema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def _crear_esquema(self):
+        columnas = ['ruta TEXT PRIMARY KEY', 'tamano INTEGER', 'mtime REAL',
+                    'hash TEXT', 'tipo TEXT']
+        columnas += [f'{c} TEXT' for c in CAMPOS_TEXTO]
+        columnas += [f'{c} REAL' for c in CAMPOS_NUMERICOS]
+        columnas += [f'{c} REAL' for c in TOTALES_RESUMEN]
+        columnas += ['letra_calificacion TEXT']
+        with self.conexion:
+            self.conexion.execute(
+                f"CREATE TABLE IF NOT EXISTS planillas ({', '.join(columnas)})")
+            for c in COLUMNAS_INDEXADAS:
+                self.conexion.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_planillas_{c} ON planillas ({c})")
+
+    # -------------------
+    # --- Indexación ---
+    # -------------------
+
+    def _registro(self, ruta):
+        fila = self.conexion.execute(
+            "SELECT * FROM planillas WHERE ruta = ?", (ruta,)).fetchone()
+        return dict(fila) if fila else None
+
+    def indexar(self, ruta):
+        """
+        Indexa un archivo si es nuevo o cambió.
+        Devuelve 'nuevo', 'actualizado', 'sin_cambios' o 'fallido'.
+        """
+        ruta = os.path.abspath(ruta)
+        stat = os.stat(ruta)
+        anterior = self._registro(ruta)
+
+        if anterior and anterior['tamano'] == stat.st_size and anterior['mtime'] == stat.st_mtime:
+            return 'sin_cambios'
+
+        hash_actual = hash_archivo(ruta)
+        if anterior and anterior['hash'] == hash_actual:
+            # Solo cambió la fecha (ej: copia o 'touch'); no hace falta releer
+            with self.conexion:
+                self.conexion.execute(
+                    "UPDATE planillas SET tamano = ?, mtime = ? WHERE ruta = ?",
+                    (stat.st_size, stat.st_mtime, ruta))
+            return 'sin_cambios'
+
+        tipo, datos = leer_planilla(ruta)
+        if not datos:
+            return 'fallido'
+
+        fila = {'ruta': ruta, 'tamano': stat.st_size, 'mtime': stat.st_mtime,
+                'hash': hash_actual, 'tipo': tipo}
+        fila.update(self._campos(datos))
+        columnas = list(fila)
+        with self.conexion:
+            self.conexion.execute(
+                f"INSERT OR REPLACE INTO planillas ({', '.join(columnas)}) "
+                f"VALUES ({', '.join('?' for _ in columnas)})",
+                [fila[c] for c in columnas])
+        return 'actualizado' if anterior else 'nuevo'
+
+    @staticmethod
+    def _campos(datos):
+        """Extrae los campos indexados de un `datos_extraidos`."""
+        generales = (datos.get('CEV-CEVE') or {}).get('datos_generales_proyecto') or {}
+        campos = {c: _a_texto(generales.get(c)) for c in CAMPOS_TEXTO}
+        campos.update({c: _a_real(generales.get(c)) for c in CAMPOS_NUMERICOS})
+
+        resumen = datos.get('Resumen') or {}
+        campos.update({c: _a_real(_valor_anidado(resumen, ruta))
+                       for c, ruta in TOTALES_RESUMEN.items()})
+        campos['letra_calificacion'] = _a_texto(_valor_anidado(
+            resumen, ('demanda_energetica', 'comparativa_casos', 'letra_calificacion')))
+        return campos
+
+    def indexar_directorio(self, directorio, patron='**/*.xls*'):
+        """
+        Indexa todas las planillas del directorio y elimina del índice las
+        que ya no existen. Devuelve un conteo por resultado.
+        """
+        directorio = os.path.abspath(directorio)
+        rutas = sorted(glob.glob(os.path.join(directorio, patron), recursive=True))
+        conteo = {'nuevo': 0, 'actualizado': 0, 'sin_cambios': 0, 'fallido': 0, 'eliminado': 0}
+        for ruta in rutas:
+            conteo[self.indexar(ruta)] += 1
+
+        existentes = set(rutas)
+        prefijo = directorio.rstrip(os.sep) + os.sep
+        registradas = [r['ruta'] for r in self.conexion.execute(
+            "SELECT ruta FROM planillas WHERE ruta LIKE ?", (prefijo + '%',))]
+        # LIKE trata '_' y '%' como comodines; se confirma el prefijo en Python
+        eliminadas = [r for r in registradas
+                      if r.startswith(prefijo) and r not in existentes]
+        with self.conexion:
+            self.conexion.executemany(
+                "DELETE FROM planillas WHERE ruta = ?", [(r,) for r in eliminadas])
+        conteo['eliminado'] = len(eliminadas)
+        return conteo
+
+    # ----------------
+    # --- Consultas ---
+    # ----------------
+
+    def buscar(self, **filtros):
+        """
+        Busca planillas por igualdad o comparación de campos.
+        Ejemplo: buscar(comuna='Temuco', evaluador_energetico='X', iteracion_evaluador__gt=2)
+        Devuelve una lista de diccionarios.
+        """
+        columnas_validas = {r['name'] for r in self.conexion.execute(
+            "PRAGMA table_info(planillas)")}
+        condiciones, parametros = [], []
+        for clave, valor in filtros.items():
+            campo, _, sufijo = clave.partition('__')
+            if campo not in columnas_validas:
+                raise ValueError(f"Campo desconocido en el índice: '{campo}'")
+            if sufijo and sufijo not in OPERADORES:
+                raise ValueError(f"Operador desconocido: '{sufijo}'")
+            condiciones.append(f"{campo} {OPERADORES.get(sufijo, '=')} ?")
+            parametros.append(valor)
+
+        sql = "SELECT * FROM planillas"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return [dict(r) for r in self.conexion.execute(sql, parametros)]
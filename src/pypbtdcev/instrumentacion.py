@@ -0,0 +1,228 @@
+# ----------------------------
+# ----- INSTRUMENTACIÓN ------
+# ----------------------------
+
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+from .utilidades import tamano_en_bytes
+
+# Registro de mensajes del paquete. Los mensajes de progreso usan el nivel
+# INFO (ocultos por defecto); las advertencias y errores, WARNING y ERROR.
+logger = logging.getLogger('pypbtdcev')
+
+# Observadores activos. Es una tupla que se reemplaza al registrar o quitar,
+# así que leerla no necesita lock: desactivado, el costo es revisar una tupla vacía.
+_observadores = ()
+_lock = threading.Lock()
+
+_archivo_actual = contextvars.ContextVar('pypbtdcev_archivo', default=None)
+_nivel_actual = contextvars.ContextVar('pypbtdcev_nivel', default=0)
+
+
+def silenciar(nivel=logging.WARNING):
+    """
+    Oculta los mensajes del paquete por debajo de `nivel` (por defecto, deja
+    solo advertencias y errores). Con logging.CRITICAL + 1 se ocultan todos.
+    """
+    logger.setLevel(nivel)
+
+
+def mostrar_progreso(nivel=logging.INFO):
+    """Muestra los mensajes de progreso en la consola, como antes hacían los print."""
+    logger.setLevel(nivel)
+    if not any(getattr(h, '_pypbtdcev', False) for h in logger.handlers):
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter('%(message)s'))
+        manejador._pypbtdcev = True
+        logger.addHandler(manejador)
+
+
+# ---------------------
+# --- Observadores ---
+# ---------------------
+
+def registrar_observador(funcion):
+    """
+    Registra una función que recibe cada evento como diccionario:
+        {'tipo', 'nombre', 'detalle', 'archivo', 'nivel',
+         'duracion_s', 'filas', 'bytes', 'error'}
+    'tipo' es 'carga' (lectura del libro), 'seccion' (un _parsear_*),
+    'escritura' (un _escribir_*) o 'guardado'. 'nivel' es 0 para las
+    secciones de primer nivel y aumenta en las llamadas anidadas.
+    Los eventos pueden llegar desde varios hilos.
+    """
+    global _observadores
+    with _lock:
+        _observadores = _observadores + (funcion,)
+
+
+def quitar_observador(funcion):
+    global _observadores
+    with _lock:
+        lista = list(_observadores)
+        if funcion in lista:
+            lista.remove(funcion)
+        _observadores = tuple(lista)
+
+
+@contextlib.contextmanager
+def observar(funcion):
+    """Registra `funcion` solo dentro del bloque `with`."""
+    registrar_observador(funcion)
+    try:
+        yield funcion
+    finally:
+        quitar_observador(funcion)
+
+
+def _emitir(evento):
+    for funcion in _observadores:
+        try:
+            funcion(evento)
+        except Exception:
+            # Un observador con errores no debe romper la lectura ni la escritura
+            logger.exception("Error en un observador de instrumentación.")
+
+
+@contextlib.contextmanager
+def archivo_en_curso(ruta):
+    """Asocia los eventos emitidos dentro del bloque al archivo `ruta`."""
+    token = _archivo_actual.set(str(ruta) if ruta is not None else None)
+    try:
+        yield
+    finally:
+        _archivo_actual.reset(token)
+
+
+class _MedicionNula:
+    """Contexto sin costo cuando no hay observadores."""
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULA = _MedicionNula()
+
+
+class _Medicion:
+    def __init__(self, tipo, nombre, detalle):
+        self.evento = {'tipo': tipo, 'nombre': nombre, 'detalle': detalle,
+                       'archivo': _archivo_actual.get(), 'nivel': _nivel_actual.get(),
+                       'duracion_s': None, 'filas': None, 'bytes': None, 'error': None}
+
+    def __enter__(self):
+        self._token = _nivel_actual.set(self.evento['nivel'] + 1)
+        self._inicio = time.perf_counter()
+        return self.evento
+
+    def __exit__(self, tipo_exc, exc, tb):
+        self.evento['duracion_s'] = time.perf_counter() - self._inicio
+        _nivel_actual.reset(self._token)
+        if tipo_exc is not None:
+            self.evento['error'] = tipo_exc.__name__
+        _emitir(self.evento)
+        return False
+
+
+def medir(tipo, nombre, detalle=None):
+    """
+    Context manager que emite un evento con la duración del bloque. El
+    diccionario que entrega se puede completar con 'filas' y 'bytes'.
+    Sin observadores no mide nada.
+    """
+    if not _observadores:
+        return _NULA
+    return _Medicion(tipo, nombre, detalle)
+
+
+def hay_observadores():
+    return bool(_observadores)
+
+
+# ---------------------------------
+# --- Decorador para secciones ---
+# ---------------------------------
+
+def contar_filas(valor):
+    """Cantidad de registros (elementos de listas) dentro de un resultado."""
+    if isinstance(valor, dict):
+        return sum(contar_filas(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return len(valor)
+    if hasattr(valor, 'shape') and len(getattr(valor, 'shape', ())) >= 1:
+        return int(valor.shape[0])
+    try:
+        # Registros o tablas columnares (ver registros.py)
+        return len(valor) if hasattr(valor, 'a_registros') else 0
+    except TypeError:
+        return 0
+
+
+def seccion(tipo):
+    """
+    Decorador para los métodos _parsear_* ('seccion') y _escribir_*
+    ('escritura'). En lectura cuenta las filas del resultado; en escritura,
+    las de los datos recibidos. Si el segundo argumento es un texto (ej: el
+    nombre de la tabla en _escribir_tabla_cev), se informa como 'detalle'.
+    """
+    def decorador(metodo):
+        nombre = metodo.__name__
+
+        @functools.wraps(metodo)
+        def envuelto(self, *args, **kwargs):
+            if not _observadores:
+                return metodo(self, *args, **kwargs)
+
+            detalle = args[1] if len(args) > 1 and isinstance(args[1], str) else None
+            with _Medicion(tipo, nombre, detalle) as evento:
+                resultado = metodo(self, *args, **kwargs)
+                if tipo == 'escritura':
+                    # Firma (ws, [nombre,] datos, [mapa]): los datos van tras la hoja
+                    datos = args[2] if detalle is not None and len(args) > 2 else \
+                        args[1] if len(args) > 1 else None
+                    evento['filas'] = contar_filas(datos)
+                else:
+                    evento['filas'] = contar_filas(resultado)
+                    evento['bytes'] = tamano_en_bytes(resultado)
+            return resultado
+        return envuelto
+    return decorador
+
+
+# -------------------------------
+# --- Observador de tiempos ---
+# -------------------------------
+
+class RegistroTiempos:
+    """
+    Observador que acumula duraciones por sección ('nombre' o 'nombre:detalle').
+    Con `solo_primer_nivel=True` ignora las llamadas anidadas, para que
+    los tiempos no se cuenten dos veces.
+
+        with observar(RegistroTiempos()) as tiempos:
+            LectorPBTD03_v2(ruta)
+        print(tiempos.totales)
+    """
+
+    def __init__(self, solo_primer_nivel=True):
+        self.solo_primer_nivel = solo_primer_nivel
+        self.totales = {}
+        self.eventos = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, evento):
+        if self.solo_primer_nivel and evento['nivel'] > 0:
+            return
+        clave = evento['nombre']
+        if evento['detalle']:
+            clave = f"{clave}:{evento['detalle']}"
+        with self._lock:
+            self.totales[clave] = self.totales.get(clave, 0.0) + evento['duracion_s']
+            self.eventos += 1
@@ -1,6 +1,32 @@
-import pandas as pd
-import numpy as np
+import functools
 import json
+import logging
+import os
+
+from .instrumentacion import archivo_en_curso, medir, seccion
+from .registros import FORMATOS_TABLAS, compactar_tabla
+from .utilidades import modulo_perezoso, nombres_de_hojas, tamano_en_bytes, tipo_planilla
+
+pd = modulo_perezoso('pandas')
+np = modulo_perezoso('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _indices_celda(celda):
+    """
+    'C7' -> (6, 2): fila y columna base 0. Las coordenadas de los parsers son
+    fijas, así que cada una se convierte una sola vez por proceso (lru_cache
+    es seguro entre hilos).
+    """
+    col_str = ''.join(filter(str.isalpha, celda))
+    row_idx = int(''.join(filter(str.isdigit, celda))) - 1
+
+    # Convertir la letra de la columna a un índice numérico (A=0, B=1, ...)
+    col_idx = sum([(ord(char) - ord('A') + 1) * (26 ** i)
+                  for i, char in enumerate(reversed(col_str.upper()))]) - 1
+    return row_idx, col_idx
 
 
 # -------------------------------------------
@@ -9,20 +35,49 @@ import json
 
 
 class LectorPBTD01_v2:
-    def __init__(self, filepath):
+    # Hojas que leen los parsers de esta clase (ver _hojas_necesarias).
+    HOJAS = ['CEV-CEVE', '3. Tablas Envolvente']
+
+    def __init__(self, filepath, modo_liviano=False, formato_tablas=None):
+        # Si es True, solo se cargan las hojas que se parsean y cada hoja se
+        # libera apenas termina su parser. Al terminar, xl_file_data queda
+        # como diccionario vacío. La reducción a float32 aplica solo a
+        # 'Resultados' leído como arreglo (PBTD03 con resultados_como_arreglo);
+        # el resto de los valores son floats de Python.
+        self.modo_liviano = modo_liviano
+        # Formato de las tablas de la envolvente: None (lista de diccionarios),
+        # 'registros' (filas con __slots__) o 'columnar' (ver registros.py).
+        if formato_tablas not in FORMATOS_TABLAS:
+            raise ValueError(
+                f"formato_tablas desconocido: '{formato_tablas}'. Use uno de {FORMATOS_TABLAS}.")
+        self.formato_tablas = formato_tablas
+        # Nombre del tipo de excepción si la lectura falló (ej: 'FileNotFoundError')
+        # y su mensaje
+        self.error = None
+        self.error_mensaje = None
         try:
-            self.xl_file_data = pd.read_excel(
-                filepath, sheet_name=None, header=None)
-            self.datos_extraidos = self._parse_all_sheets()
+            with archivo_en_curso(filepath):
+                hojas = self._hojas_necesarias(filepath) if modo_liviano else None
+                with medir('carga', 'read_excel') as evento:
+                    self.xl_file_data = pd.read_excel(
+                        filepath, sheet_name=hojas, header=None)
+                    evento['filas'] = sum(len(df) for df in self.xl_file_data.values())
+                    evento['bytes'] = sum(int(df.memory_usage(index=False).sum())
+                                          for df in self.xl_file_data.values())
+                self.datos_extraidos = self._parse_all_sheets()
+            if modo_liviano:
+                self.xl_file_data = {}
         except FileNotFoundError:
-            print(
+            logger.error(
                 f"❌ Error: No se encontró el archivo en la ruta '{filepath}'.")
+            self.error = 'FileNotFoundError'
+            self.error_mensaje = str(filepath)
             self.xl_file_data = None
             self.datos_extraidos = None
         except Exception as e:
-            print(f"Ha ocurrido un error inesperado al leer el archivo: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Ha ocurrido un error inesperado al leer el archivo: {e}")
+            self.error = type(e).__name__
+            self.error_mensaje = str(e)
             self.xl_file_data = None
             self.datos_extraidos = None
 
@@ -30,13 +85,7 @@ class LectorPBTD01_v2:
         """
         Función auxiliar para obtener el valor de una celda usando notación Excel (ej: 'C7').
         """
-        col_str = ''.join(filter(str.isalpha, cell_coord))
-        row_idx = int(''.join(filter(str.isdigit, cell_coord))) - 1
-
-        # Convertir la letra de la columna a un índice numérico (A=0, B=1, ...)
-        col_idx = sum([(ord(char) - ord('A') + 1) * (26 ** i)
-                      for i, char in enumerate(reversed(col_str.upper()))]) - 1
-
+        row_idx, col_idx = _indices_celda(cell_coord)
         # .iat es un método muy rápido para acceder a un valor por sus índices numéricos
         return df.iat[row_idx, col_idx]
 
@@ -92,10 +141,46 @@ class LectorPBTD01_v2:
 
         json_string = df_tabla.replace(
             {np.nan: None}).to_json(orient='records')
-        bloque['obstrucciones_detalle'] = json.loads(json_string)
+        bloque['obstrucciones_detalle'] = self._compactar(
+            'obstrucciones_detalle', json.loads(json_string))
 
         return bloque
 
+    def _hojas_necesarias(self, filepath):
+        """
+        Nombres de las hojas del libro que usan los parsers, leídos sin cargar
+        el libro. Si no se pueden leer (ej: formato .xls), retorna None y se
+        cargan todas las hojas.
+        """
+        try:
+            hojas = nombres_de_hojas(filepath)
+        except Exception:
+            return None
+        return [h for h in hojas if self._es_hoja_necesaria(h)] or None
+
+    def _es_hoja_necesaria(self, nombre):
+        return nombre in self.HOJAS
+
+    def _liberar_hojas(self, *nombres):
+        """En modo liviano, descarta las hojas ya parseadas."""
+        if self.modo_liviano:
+            for nombre in nombres:
+                self.xl_file_data.pop(nombre, None)
+
+    def bytes_estimados(self):
+        """
+        Estimación de la memoria retenida por esta instancia (datos extraídos
+        más hojas aún cargadas), para controlar un presupuesto de memoria.
+        """
+        total = tamano_en_bytes(self.datos_extraidos)
+        for df in (self.xl_file_data or {}).values():
+            total += int(df.memory_usage(deep=True).sum())
+        return total
+
+    def _compactar(self, nombre, filas):
+        """Aplica `formato_tablas` a una tabla recién extraída."""
+        return compactar_tabla(nombre, filas, self.formato_tablas)
+
     def _limpiar_dict_nan(self, d):
         """
         Recorre un diccionario simple y reemplaza los valores NaN por None.
@@ -114,18 +199,21 @@ class LectorPBTD01_v2:
 
         # Llama a la función de parseo para cada hoja y guarda su resultado
         datos_completos['CEV-CEVE'] = self._parsear_hoja_cev_ceve()
+        self._liberar_hojas('CEV-CEVE')
         datos_completos['3. Tablas Envolvente'] = self._parsear_hoja_tablas_envolvente(
         )
+        self._liberar_hojas('3. Tablas Envolvente')
 
         return datos_completos
 
+    @seccion('seccion')
     def _parsear_hoja_cev_ceve(self):
         """
         Parsea la hoja 'CEV-CEVE' y extrae sus tres secciones principales.
         """
         sheet_name = 'CEV-CEVE'
         if sheet_name not in self.xl_file_data:
-            print(
+            logger.warning(
                 f"Advertencia: No se encontró la hoja '{sheet_name}' en el archivo.")
             return
 
@@ -238,8 +326,8 @@ class LectorPBTD01_v2:
         # Reemplazamos todos los NaN restantes por None para un JSON limpio
         df_muros.replace({np.nan: None}, inplace=True)
 
-        hoja_dict['area_y_coeficiente_muros'] = df_muros.to_dict(
-            orient='records')
+        hoja_dict['area_y_coeficiente_muros'] = self._compactar(
+            'area_y_coeficiente_muros', df_muros.to_dict(orient='records'))
 
         # -------------------------------------------
         # --- 3.1.2 Puentes térmicos particulares ---
@@ -260,8 +348,8 @@ class LectorPBTD01_v2:
 
         # Limpiamos vacíos y añadimos al diccionario principal
         df_puentes.replace({np.nan: None}, inplace=True)
-        hoja_dict['puentes_termicos_particulares'] = df_puentes.to_dict(
-            orient='records')
+        hoja_dict['puentes_termicos_particulares'] = self._compactar(
+            'puentes_termicos_particulares', df_puentes.to_dict(orient='records'))
 
         # ---------------------
         # --- 3.1.3 Puertas ---
@@ -291,7 +379,8 @@ class LectorPBTD01_v2:
 
         # Limpiamos vacíos y añadimos al diccionario principal
         df_puertas.replace({np.nan: None}, inplace=True)
-        hoja_dict['puertas'] = df_puertas.to_dict(orient='records')
+        hoja_dict['puertas'] = self._compactar(
+            'puertas', df_puertas.to_dict(orient='records'))
 
         # ----------------------
         # --- 3.1.4 Ventanas ---
@@ -324,7 +413,8 @@ class LectorPBTD01_v2:
 
         # Limpiamos vacíos y añadimos al diccionario principal
         df_ventanas.replace({np.nan: None}, inplace=True)
-        hoja_dict['ventanas'] = df_ventanas.to_dict(orient='records')
+        hoja_dict['ventanas'] = self._compactar(
+            'ventanas', df_ventanas.to_dict(orient='records'))
 
         # ---------------------------
         # --- 3.1.5 Obstrucciones ---
@@ -369,7 +459,7 @@ class LectorPBTD01_v2:
         # Limpiamos vacíos y convertimos a formato JSON-nativo
         json_string = df_techos.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['techos'] = json.loads(json_string)
+        hoja_dict['techos'] = self._compactar('techos', json.loads(json_string))
 
         # -------------------
         # --- 3.1.7 Pisos ---
@@ -396,7 +486,7 @@ class LectorPBTD01_v2:
         # Limpiamos vacíos y convertimos a formato JSON-nativo
         json_string = df_pisos.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['pisos'] = json.loads(json_string)
+        hoja_dict['pisos'] = self._compactar('pisos', json.loads(json_string))
 
         # --------------------------------
         # --- 3.1.8 Resumen Envolvente ---
@@ -564,13 +654,14 @@ class LectorPBTD01_v2:
         # self.datos_extraidos[sheet_name] = hoja_dict
         return hoja_dict
 
+    @seccion('seccion')
     def _parsear_hoja_tablas_envolvente(self):
         """
         Parsea la hoja '3. Tablas Envolvente' y extrae todas sus tablas.
         """
         sheet_name = '3. Tablas Envolvente'
         if sheet_name not in self.xl_file_data:
-            print(
+            logger.warning(
                 f"Advertencia: No se encontró la hoja '{sheet_name}' en el archivo.")
             return
 
@@ -615,7 +706,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string = df_puertas.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['puertas'] = json.loads(json_string)
+        hoja_dict['puertas'] = self._compactar(
+            'puertas_transmitancia', json.loads(json_string))
 
         # ---------------------
         # --- Tabla Vidrios ---
@@ -636,7 +728,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string_vidrios = df_vidrios.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['vidrios'] = json.loads(json_string_vidrios)
+        hoja_dict['vidrios'] = self._compactar(
+            'vidrios', json.loads(json_string_vidrios))
 
         # ----------------------------
         # --- Tabla Marcos Ventana ---
@@ -659,7 +752,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string_marcos = df_marcos.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['marcos_ventana'] = json.loads(json_string_marcos)
+        hoja_dict['marcos_ventana'] = self._compactar(
+            'marcos_ventana', json.loads(json_string_marcos))
 
         # ---------------------------------
         # --- Tabla Muros transmitancia ---
@@ -683,7 +777,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string_muros = df_muros.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['muros_transmitancia'] = json.loads(json_string_muros)
+        hoja_dict['muros_transmitancia'] = self._compactar(
+            'muros_transmitancia', json.loads(json_string_muros))
 
         # ----------------------------------
         # --- Tabla Techos transmitancia ---
@@ -707,7 +802,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string_techos = df_techos.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['techos_transmitancia'] = json.loads(json_string_techos)
+        hoja_dict['techos_transmitancia'] = self._compactar(
+            'techos_transmitancia', json.loads(json_string_techos))
 
         # ---------------------------------
         # --- Tabla Pisos transmitancia ---
@@ -738,7 +834,8 @@ class LectorPBTD01_v2:
         # Limpiamos y convertimos a formato JSON-nativo
         json_string_pisos = df_pisos.replace(
             {np.nan: None}).to_json(orient='records')
-        hoja_dict['pisos_transmitancia'] = json.loads(json_string_pisos)
+        hoja_dict['pisos_transmitancia'] = self._compactar(
+            'pisos_transmitancia', json.loads(json_string_pisos))
 
         return hoja_dict
 
@@ -748,8 +845,17 @@ class LectorPBTD01_v2:
 # ---------------------------------------------------
 
 class LectorPBTD03_v2(LectorPBTD01_v2):
-    def __init__(self, filepath):
-        super().__init__(filepath)
+    def __init__(self, filepath, resultados_como_arreglo=False, modo_liviano=False,
+                 formato_tablas=None):
+        # Si es True, 'Resultados' se entrega como arreglos NumPy en lugar
+        # de una lista de diccionarios (ver _parsear_hoja_resultados_arreglo).
+        self.resultados_como_arreglo = resultados_como_arreglo
+        super().__init__(filepath, modo_liviano=modo_liviano, formato_tablas=formato_tablas)
+
+    def _es_hoja_necesaria(self, nombre):
+        # Misma búsqueda flexible que _parsear_hoja_resumen y _extraer_tabla_resultados
+        nombre_min = nombre.lower()
+        return nombre == 'CEV-CEVE' or 'resumen' in nombre_min or 'resultados' in nombre_min
 
     def _parse_all_sheets(self):
         """
@@ -759,12 +865,21 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
 
         # 1. CEV-CEVE (Heredado)
         datos_completos['CEV-CEVE'] = self._parsear_hoja_cev_ceve()
+        self._liberar_hojas('CEV-CEVE')
 
         # 2. Resumen (Dashboard completo)
         datos_completos['Resumen'] = self._parsear_hoja_resumen()
+        # La hoja 'Resultados' puede servir de respaldo para el Resumen, así
+        # que solo se liberan las hojas cuyo nombre contiene 'resumen'
+        self._liberar_hojas(*[h for h in list(self.xl_file_data or {})
+                              if 'resumen' in h.lower()])
 
         # 3. Resultados (Tabla horaria)
-        datos_completos['Resultados'] = self._parsear_hoja_resultados()
+        if self.resultados_como_arreglo:
+            datos_completos['Resultados'] = self._parsear_hoja_resultados_arreglo()
+        else:
+            datos_completos['Resultados'] = self._parsear_hoja_resultados()
+        self._liberar_hojas(*list(self.xl_file_data or {}))
 
         # 4. Anexo Cálculos (Pendiente para futuro)
         datos_completos['Anexo Cálculos'] = None
@@ -795,9 +910,11 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
                     d[k] = v
         return d
 
-    def _parsear_hoja_resultados(self):
+    def _extraer_tabla_resultados(self):
         """
-        Lee la tabla horaria de la hoja 'Resultados'.
+        Localiza la tabla horaria de la hoja 'Resultados' y la devuelve como
+        DataFrame con encabezados limpios y columnas numéricas convertidas.
+        Retorna (df_tabla, nombre_columna_caso) o (None, None).
         """
         target_name = 'resultados'
         sheet_found = None
@@ -808,8 +925,8 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
                 break
         
         if sheet_found is None:
-            print(f"❌ Error: No se encontró ninguna hoja que coincida con '{target_name}'")
-            return None
+            logger.error(f"❌ Error: No se encontró ninguna hoja que coincida con '{target_name}'")
+            return None, None
 
         df = self.xl_file_data[sheet_found]
 
@@ -840,7 +957,7 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
                     h_str = h_str.replace(' ', '_').replace('.', '').replace('\n', '').replace('ñ', 'n').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u')
                     headers.append(h_str)
         except IndexError:
-            return None
+            return None, None
 
         # Extraer Datos
         try:
@@ -851,17 +968,28 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
                 min_len = min(len(df_tabla.columns), len(headers))
                 df_tabla.columns = headers[:min_len] + [f"extra_{i}" for i in range(len(df_tabla.columns) - min_len)]
         except IndexError:
-             return None
+             return None, None
 
         # Convertir a números (Excluyendo BG)
         idx_relativo_bg = IDX_BG - col_start
         cols_to_convert = list(df_tabla.columns)
+        col_bg_name = None
         if idx_relativo_bg < len(headers):
             col_bg_name = headers[idx_relativo_bg]
             if col_bg_name in cols_to_convert:
                 cols_to_convert.remove(col_bg_name)
         
         df_tabla = self._convertir_decimales_a_float(df_tabla, cols_to_convert)
+        return df_tabla, col_bg_name
+
+    @seccion('seccion')
+    def _parsear_hoja_resultados(self):
+        """
+        Lee la tabla horaria de la hoja 'Resultados'.
+        """
+        df_tabla, _ = self._extraer_tabla_resultados()
+        if df_tabla is None:
+            return None
 
         try:
             json_string = df_tabla.replace({np.nan: None}).to_json(orient='records')
@@ -869,6 +997,36 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
         except Exception:
             return None
 
+    @seccion('seccion')
+    def _parsear_hoja_resultados_arreglo(self):
+        """
+        Lee la tabla horaria de la hoja 'Resultados' como arreglos NumPy,
+        sin pasar por la lista de diccionarios.
+        Retorna un diccionario con:
+          - 'columnas': nombres de las columnas numéricas.
+          - 'valores': arreglo float64 (filas, columnas), NaN en celdas vacías
+            (float32 en modo liviano).
+          - 'caso': arreglo de objetos con la columna 'Caso' (BG) o None.
+        """
+        df_tabla, col_caso = self._extraer_tabla_resultados()
+        if df_tabla is None:
+            return None
+
+        caso = None
+        if col_caso is not None and col_caso in df_tabla.columns:
+            caso = df_tabla[col_caso].to_numpy(dtype=object)
+            caso = np.where(pd.isna(caso), None, caso)
+            df_tabla = df_tabla.drop(columns=[col_caso])
+
+        # En modo liviano los valores se reducen a float32 (la mitad de memoria)
+        tipo = np.float32 if self.modo_liviano else np.float64
+        return {
+            'columnas': list(df_tabla.columns),
+            'valores': df_tabla.to_numpy(dtype=tipo, na_value=np.nan),
+            'caso': caso
+        }
+
+    @seccion('seccion')
     def _parsear_hoja_resumen(self):
         """
         Lee la hoja 'Resumen' completa.
@@ -886,7 +1044,7 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
                     break
         
         if sheet_name is None:
-            print("Aviso: No se encontró la hoja 'Resumen'.")
+            logger.warning("Aviso: No se encontró la hoja 'Resumen'.")
             return None
 
         df = self.xl_file_data[sheet_name]
@@ -1095,4 +1253,58 @@ class LectorPBTD03_v2(LectorPBTD01_v2):
             'consumos': consumos,
             'tablas_mensuales': self._limpiar_dict_recursivo(tablas_mensuales),
             'flujos': self._limpiar_dict_recursivo(flujos)
-        }
\ No newline at end of file
+        }
+
+
+# ---------------------------
+# --- Lector reutilizable ---
+# ---------------------------
+
+# Tipo de error cuando el archivo no es una planilla PBTD01 ni PBTD03.
+TIPO_DESCONOCIDO = 'TipoPlanillaDesconocido'
+
+
+class LectorPBTD:
+    """
+    Lector que se configura una vez y se reutiliza: `leer(ruta)` no guarda
+    nada del archivo en la instancia (las hojas y los datos viven solo en la
+    llamada), así que una misma instancia puede atender varios hilos a la
+    vez sin locks. Detecta el tipo de planilla y usa LectorPBTD01_v2 o
+    LectorPBTD03_v2.
+
+        lector = LectorPBTD(modo_liviano=True)
+        with ThreadPoolExecutor(8) as ejecutor:
+            for tipo, datos in ejecutor.map(lector.leer, rutas):
+                ...
+    """
+    __slots__ = ('_opciones_01', '_opciones_03')
+
+    def __init__(self, resultados_como_arreglo=False, modo_liviano=False, formato_tablas=None):
+        if formato_tablas not in FORMATOS_TABLAS:
+            raise ValueError(
+                f"formato_tablas desconocido: '{formato_tablas}'. Use uno de {FORMATOS_TABLAS}.")
+        self._opciones_01 = {'modo_liviano': modo_liviano, 'formato_tablas': formato_tablas}
+        self._opciones_03 = dict(self._opciones_01, resultados_como_arreglo=resultados_como_arreglo)
+
+    def leer(self, ruta, tipo=None):
+        """Devuelve (tipo_planilla, datos_extraidos); datos_extraidos es None si falla."""
+        tipo, datos, _, _ = self.leer_con_error(ruta, tipo)
+        return tipo, datos
+
+    def leer_con_error(self, ruta, tipo=None):
+        """Devuelve (tipo_planilla, datos, tipo_error, mensaje); sin error, los dos últimos son None."""
+        if not os.path.exists(ruta):
+            return None, None, 'FileNotFoundError', f"No se encontró el archivo '{ruta}'."
+        try:
+            tipo = tipo or tipo_planilla(ruta)
+        except Exception as e:
+            return None, None, type(e).__name__, str(e)
+        if tipo == 'PBTD03':
+            lector = LectorPBTD03_v2(ruta, **self._opciones_03)
+        elif tipo == 'PBTD01':
+            lector = LectorPBTD01_v2(ruta, **self._opciones_01)
+        else:
+            return None, None, TIPO_DESCONOCIDO, f"No se reconoce el tipo de planilla de '{ruta}'."
+        if lector.datos_extraidos is None:
+            return tipo, None, lector.error or 'SinDatos', lector.error_mensaje or ''
+        return tipo, lector.datos_extraidos, None, None
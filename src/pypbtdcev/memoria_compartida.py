@@ -0,0 +1,274 @@
+# ----------------------------
+# ---- MEMORIA COMPARTIDA ----
+# ----------------------------
+
+import collections
+import concurrent.futures
+import itertools
+import numbers
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from .lector import LectorPBTD03_v2
+from .metricas import tamano_archivo
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+
+def _es_numerico(valor):
+    return valor is None or (isinstance(valor, numbers.Real) and not isinstance(valor, bool))
+
+
+def _obtener(d, ruta):
+    for clave in ruta:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(clave)
+    return d
+
+
+def _asignar(d, ruta, valor):
+    for clave in ruta[:-1]:
+        d = d[clave]
+    d[ruta[-1]] = valor
+
+
+# ----------------------------------------
+# --- Conversión de bloques a matrices ---
+# ----------------------------------------
+
+def _matriz_registros(registros, clave_fila):
+    """Lista de registros {'hora', 'enero', ...} -> (filas, columnas, matriz)."""
+    if not registros:
+        return None
+    columnas = [c for c in registros[0] if c != clave_fila]
+    valores = [[r.get(c) for c in columnas] for r in registros]
+    if not all(_es_numerico(v) for fila in valores for v in fila):
+        return None
+    filas = [r.get(clave_fila) for r in registros]
+    return filas, columnas, np.array(valores, dtype=np.float64)
+
+
+def _matriz_anidada(tabla):
+    """Diccionario {fila: {columna: valor}} -> (filas, columnas, matriz)."""
+    if not tabla or not all(isinstance(v, dict) for v in tabla.values()):
+        return None
+    filas = list(tabla)
+    columnas = list(tabla[filas[0]])
+    if any(list(tabla[f]) != columnas for f in filas):
+        return None
+    valores = [[tabla[f][c] for c in columnas] for f in filas]
+    if not all(_es_numerico(v) for fila in valores for v in fila):
+        return None
+    return filas, columnas, np.array(valores, dtype=np.float64)
+
+
+def _bloques_numericos(datos):
+    """
+    Busca los bloques numéricos grandes de un `datos_extraidos` de PBTD03.
+    Devuelve una lista de (ruta, descriptor, matriz). Los bloques con algún
+    valor no numérico se dejan tal cual, para no perder información.
+    """
+    bloques = []
+
+    resultados = datos.get('Resultados')
+    if isinstance(resultados, dict) and resultados.get('valores') is not None:
+        bloques.append((('Resultados', 'valores'), {'tipo': 'arreglo'},
+                        resultados['valores']))
+
+    ruta = ('CEV-CEVE', 'condiciones_de_uso', 'renovaciones_aire_por_hora')
+    matriz = _matriz_registros(_obtener(datos, ruta), 'hora')
+    if matriz is not None:
+        filas, columnas, valores = matriz
+        bloques.append((ruta, {'tipo': 'registros', 'clave_fila': 'hora',
+                               'filas': filas, 'columnas': columnas}, valores))
+
+    for seccion in ('tablas_mensuales', 'flujos'):
+        for nombre, tabla in (_obtener(datos, ('Resumen', seccion)) or {}).items():
+            matriz = _matriz_anidada(tabla)
+            if matriz is not None:
+                filas, columnas, valores = matriz
+                bloques.append((('Resumen', seccion, nombre),
+                                {'tipo': 'anidado', 'filas': filas, 'columnas': columnas},
+                                valores))
+    return bloques
+
+
+# -------------------------------
+# --- Lado del proceso hijo ---
+# -------------------------------
+
+def _parsear_en_trabajador(ruta, opciones):
+    """
+    Lee la planilla, copia sus bloques numéricos a un único segmento de
+    memoria compartida y devuelve (ruta, nombre_segmento, descriptores, datos,
+    duracion_s, error), donde `datos` ya no contiene esos bloques.
+    """
+    inicio = time.perf_counter()
+    lector = LectorPBTD03_v2(ruta, resultados_como_arreglo=True, **opciones)
+    datos = lector.datos_extraidos
+    if not datos:
+        return ruta, None, [], None, time.perf_counter() - inicio, lector.error or 'SinDatos'
+
+    bloques = _bloques_numericos(datos)
+    total = sum(m.size for _, _, m in bloques)
+    segmento = shared_memory.SharedMemory(create=True, size=max(total * 8, 1))
+    destino = np.ndarray((total,), dtype=np.float64, buffer=segmento.buf)
+
+    descriptores = []
+    desplazamiento = 0
+    for ruta_bloque, descriptor, matriz in bloques:
+        destino[desplazamiento:desplazamiento + matriz.size] = matriz.ravel()
+        descriptor = dict(descriptor, ruta=ruta_bloque, forma=matriz.shape,
+                          desplazamiento=desplazamiento)
+        descriptores.append(descriptor)
+        desplazamiento += matriz.size
+        _asignar(datos, ruta_bloque, None)
+
+    del destino
+    # El padre queda a cargo del segmento: aquí solo se cierra, no se borra
+    segmento.close()
+    return ruta, segmento.name, descriptores, datos, time.perf_counter() - inicio, None
+
+
+# ---------------------------
+# --- Lado del proceso padre ---
+# ---------------------------
+
+def _a_diccionarios(descriptor, vista):
+    """Reconstruye la forma original (registros o anidada) desde la matriz."""
+    valores = [[None if np.isnan(v) else v for v in fila] for fila in vista.tolist()]
+    if descriptor['tipo'] == 'registros':
+        return [dict({descriptor['clave_fila']: f}, **dict(zip(descriptor['columnas'], fila)))
+                for f, fila in zip(descriptor['filas'], valores)]
+    return {f: dict(zip(descriptor['columnas'], fila))
+            for f, fila in zip(descriptor['filas'], valores)}
+
+
+class ResultadoCompartido:
+    """
+    Resultado de una planilla leída en un proceso trabajador.
+
+    `datos` tiene la misma estructura que `LectorPBTD03_v2(..., resultados_como_arreglo=True)`,
+    salvo que los bloques numéricos se entregan como vistas NumPy sobre la
+    memoria compartida (sin copia), con la forma {'filas', 'columnas', 'valores'}.
+    Con `como_diccionarios=True` se reconstruyen los diccionarios originales y
+    el segmento se libera de inmediato. Las vistas dejan de ser válidas tras `cerrar()`.
+    """
+
+    def __init__(self, ruta, nombre_segmento, descriptores, datos, como_diccionarios=False):
+        self.ruta = ruta
+        self.datos = datos
+        self._segmento = None
+        if nombre_segmento is None:
+            return
+
+        self._segmento = _adjuntar(nombre_segmento)
+        for descriptor in descriptores:
+            vista = np.ndarray(descriptor['forma'], dtype=np.float64, buffer=self._segmento.buf,
+                               offset=descriptor['desplazamiento'] * 8)
+            vista.flags.writeable = False
+            if descriptor['tipo'] == 'arreglo':
+                valor = vista.copy() if como_diccionarios else vista
+            elif como_diccionarios:
+                valor = _a_diccionarios(descriptor, vista)
+            else:
+                valor = {'filas': descriptor['filas'], 'columnas': descriptor['columnas'],
+                         'valores': vista}
+            _asignar(self.datos, descriptor['ruta'], valor)
+            del vista
+
+        if como_diccionarios:
+            self.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Libera el segmento de memoria compartida."""
+        if self._segmento is None:
+            return
+        segmento, self._segmento = self._segmento, None
+        segmento.unlink()
+        try:
+            segmento.close()
+        except BufferError:
+            # Aún hay vistas vivas; la memoria se libera cuando desaparezcan
+            pass
+
+
+def _adjuntar(nombre):
+    try:
+        # Python 3.13+: el padre no debe registrar el segmento dos veces
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=nombre)
+
+
+def _descartar(nombre):
+    """Borra un segmento que nadie llegó a recibir."""
+    try:
+        segmento = _adjuntar(nombre)
+    except FileNotFoundError:
+        return
+    segmento.unlink()
+    segmento.close()
+
+
+def leer_en_paralelo(rutas, procesos=None, como_diccionarios=False, metricas=None, **opciones):
+    """
+    Lee planillas PBTD03 en varios procesos y entrega un `ResultadoCompartido`
+    por archivo, en el mismo orden de `rutas`. Los trabajadores solo envían
+    descriptores pequeños; los bloques numéricos viajan por memoria compartida.
+    Llamar a `cerrar()` (o usar `with`) en cada resultado al terminar.
+    Con `metricas` (MetricasLote, idealmente con trabajadores=procesos) se
+    registra el tiempo de cada trabajador por planilla.
+    Se leen a lo más 2 × `procesos` planillas por adelantado. Si se deja de
+    iterar (`close()`), solo se espera a las que ya se están leyendo y sus
+    segmentos se borran.
+    """
+    # El rastreador de recursos debe existir antes de crear los procesos,
+    # para que todos compartan el mismo y no borre segmentos en uso
+    resource_tracker.ensure_running()
+    procesos = procesos or os.cpu_count()
+    rutas = iter(rutas)
+    ejecutor = concurrent.futures.ProcessPoolExecutor(max_workers=procesos)
+    en_curso = collections.deque()
+    try:
+        while True:
+            # Como máximo 2 × procesos planillas en vuelo, para no acumular
+            # segmentos en /dev/shm si el consumidor es más lento
+            for ruta in itertools.islice(rutas, 2 * procesos - len(en_curso)):
+                en_curso.append(ejecutor.submit(_parsear_en_trabajador, ruta, opciones))
+            if not en_curso:
+                break
+            ruta, nombre, descriptores, datos, duracion, error = en_curso.popleft().result()
+            if metricas is not None:
+                metricas.registrar('PBTD03', duracion, tamano_archivo(ruta), error)
+            try:
+                resultado = ResultadoCompartido(ruta, nombre, descriptores, datos, como_diccionarios)
+            except BaseException:
+                if nombre is not None:
+                    _descartar(nombre)
+                raise
+            yield resultado
+    finally:
+        # Al cortar la iteración (close, excepción) se cancela lo que no
+        # empezó y se borran los segmentos que nadie recibió
+        for futuro in en_curso:
+            futuro.cancel()
+        for futuro in en_curso:
+            if futuro.cancelled():
+                continue
+            try:
+                nombre = futuro.result()[1]
+            except Exception:
+                continue
+            if nombre is not None:
+                _descartar(nombre)
+        ejecutor.shutdown()
@@ -0,0 +1,332 @@
+# ----------------------------
+# --------- MÉTRICAS ---------
+# ----------------------------
+
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Límites (segundos) de las cubetas del histograma de duración por archivo.
+CUBETAS_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Cuantiles informados; se calculan sobre las últimas `muestras_max` duraciones.
+CUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Serie:
+    """Acumulados de una plantilla dentro de un fragmento."""
+    __slots__ = ('archivos', 'bytes', 'suma_s', 'cubetas', 'muestras')
+
+    def __init__(self, muestras_max):
+        self.archivos = 0
+        self.bytes = 0
+        self.suma_s = 0.0
+        self.cubetas = [0] * (len(CUBETAS_S) + 1)
+        self.muestras = collections.deque(maxlen=muestras_max)
+
+
+class _Fragmento:
+    """Contadores de un solo hilo: se actualizan sin lock."""
+    __slots__ = ('series', 'fallos')
+
+    def __init__(self):
+        self.series = {}
+        self.fallos = collections.Counter()
+
+
+def _etiquetas(**etiquetas):
+    partes = []
+    for clave, valor in etiquetas.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{clave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        return repr(valor) if valor == valor else 'NaN'
+    return str(valor)
+
+
+def tamano_archivo(ruta):
+    """Tamaño en bytes de `ruta`, o 0 si no existe."""
+    try:
+        return os.path.getsize(ruta)
+    except (OSError, TypeError):
+        return 0
+
+
+def _cuantil(ordenadas, q):
+    if not ordenadas:
+        return float('nan')
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+class MetricasLote:
+    """
+    Métricas de una ejecución por lotes (ingesta o generación de planillas):
+    archivos y bytes por segundo, cuantiles p50/p95/p99 e histograma de la
+    duración por plantilla, fallos por tipo de excepción y utilización de
+    los trabajadores. Se exportan en formato de texto de Prometheus.
+
+    Cada hilo escribe en su propio fragmento, así que `registrar` no toma
+    locks (salvo la primera vez en cada hilo); el lock solo se usa al
+    crear fragmentos y al armar la instantánea.
+
+        metricas = MetricasLote(trabajadores=4)
+        metricas.servir(9464)                      # o metricas.escribir(ruta)
+        with metricas.medir_archivo('PBTD03', ruta) as medicion:
+            lector = LectorPBTD03_v2(ruta)
+            medicion.fallo(lector.error)
+    """
+
+    def __init__(self, trabajadores=1, muestras_max=4096, prefijo='pypbtdcev'):
+        self.trabajadores = trabajadores
+        self.muestras_max = muestras_max
+        self.prefijo = prefijo
+        self.inicio = time.time()
+        self._inicio_monotonico = time.perf_counter()
+        self._fragmentos = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # --- Actualización ---
+    # -------------------------
+
+    def _fragmento(self):
+        fragmento = getattr(self._local, 'fragmento', None)
+        if fragmento is None:
+            fragmento = self._local.fragmento = _Fragmento()
+            with self._lock:
+                self._fragmentos.append(fragmento)
+        return fragmento
+
+    def registrar(self, plantilla, duracion_s, bytes_procesados=0, error=None):
+        """
+        Registra un archivo procesado. `duracion_s` es el tiempo de trabajo
+        (se usa también para la utilización); `error` es el nombre del tipo
+        de excepción si falló, o None.
+        """
+        fragmento = self._fragmento()
+        serie = fragmento.series.get(plantilla)
+        if serie is None:
+            serie = fragmento.series[plantilla] = _Serie(self.muestras_max)
+        serie.archivos += 1
+        serie.bytes += bytes_procesados or 0
+        serie.suma_s += duracion_s
+        i = 0
+        while i < len(CUBETAS_S) and duracion_s > CUBETAS_S[i]:
+            i += 1
+        serie.cubetas[i] += 1
+        serie.muestras.append(duracion_s)
+        if error is not None:
+            fragmento.fallos[(plantilla, error)] += 1
+
+    def medir_archivo(self, plantilla, ruta=None):
+        """
+        Context manager que mide la duración del bloque y registra el archivo.
+        Los bytes son el tamaño de `ruta`. Si el bloque lanza una excepción,
+        se registra su tipo y se vuelve a lanzar; los fallos que no lanzan
+        (ej: datos_extraidos None) se informan con `medicion.fallo(...)`.
+        """
+        return _MedicionArchivo(self, plantilla, ruta)
+
+    # ----------------------
+    # --- Instantánea ---
+    # ----------------------
+
+    def resumen(self):
+        """
+        Devuelve los acumulados combinados de todos los hilos:
+        {'plantillas': {plantilla: {...}}, 'fallos': {(plantilla, tipo): n},
+         'transcurrido_s', 'archivos_por_s', 'bytes_por_s', 'utilizacion'}.
+        """
+        with self._lock:
+            fragmentos = list(self._fragmentos)
+        plantillas = {}
+        fallos = collections.Counter()
+        for fragmento in fragmentos:
+            # list() de un dict es atómico bajo el GIL: no hace falta detener al hilo
+            for plantilla, serie in list(fragmento.series.items()):
+                total = plantillas.setdefault(plantilla, {
+                    'archivos': 0, 'bytes': 0, 'suma_s': 0.0,
+                    'cubetas': [0] * (len(CUBETAS_S) + 1), 'muestras': []})
+                total['archivos'] += serie.archivos
+                total['bytes'] += serie.bytes
+                total['suma_s'] += serie.suma_s
+                total['cubetas'] = [a + b for a, b in zip(total['cubetas'], list(serie.cubetas))]
+                total['muestras'].extend(list(serie.muestras))
+            fallos.update(dict(list(fragmento.fallos.items())))
+
+        for total in plantillas.values():
+            ordenadas = sorted(total.pop('muestras'))
+            total['cuantiles'] = {q: _cuantil(ordenadas, q) for q in CUANTILES}
+
+        transcurrido = time.perf_counter() - self._inicio_monotonico
+        archivos = sum(t['archivos'] for t in plantillas.values())
+        ocupado = sum(t['suma_s'] for t in plantillas.values())
+        return {
+            'plantillas': plantillas,
+            'fallos': dict(fallos),
+            'transcurrido_s': transcurrido,
+            'archivos_por_s': archivos / transcurrido if transcurrido else 0.0,
+            'bytes_por_s': sum(t['bytes'] for t in plantillas.values()) / transcurrido
+            if transcurrido else 0.0,
+            'utilizacion': min(1.0, ocupado / (transcurrido * max(self.trabajadores, 1)))
+            if transcurrido else 0.0
+        }
+
+    def texto_prometheus(self):
+        """Instantánea en formato de texto de Prometheus (versión 0.0.4)."""
+        r = self.resumen()
+        p = self.prefijo
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda):
+            lineas.append(f'# HELP {p}_{nombre} {ayuda}')
+            lineas.append(f'# TYPE {p}_{nombre} {tipo}')
+
+        metrica('archivos_total', 'counter', 'Planillas procesadas por plantilla.')
+        for plantilla, t in sorted(r['plantillas'].items()):
+            lineas.append(f'{p}_archivos_total{_etiquetas(plantilla=plantilla)} {t["archivos"]}')
+
+        metrica('bytes_total', 'counter', 'Bytes de planillas procesadas por plantilla.')
+        for plantilla, t in sorted(r['plantillas'].items()):
+            lineas.append(f'{p}_bytes_total{_etiquetas(plantilla=plantilla)} {t["bytes"]}')
+
+        metrica('fallos_total', 'counter', 'Planillas con error, por tipo de excepción.')
+        for (plantilla, tipo), n in sorted(r['fallos'].items()):
+            lineas.append(f'{p}_fallos_total{_etiquetas(plantilla=plantilla, tipo=tipo)} {n}')
+
+        metrica('archivo_duracion_segundos', 'summary',
+                'Duración por planilla (cuantiles sobre las últimas muestras).')
+        for plantilla, t in sorted(r['plantillas'].items()):
+            for q, valor in t['cuantiles'].items():
+                etiquetas = _etiquetas(plantilla=plantilla, quantile=q)
+                lineas.append(f'{p}_archivo_duracion_segundos{etiquetas} {_numero(valor)}')
+            etiquetas = _etiquetas(plantilla=plantilla)
+            lineas.append(f'{p}_archivo_duracion_segundos_sum{etiquetas} {_numero(t["suma_s"])}')
+            lineas.append(f'{p}_archivo_duracion_segundos_count{etiquetas} {t["archivos"]}')
+
+        metrica('archivo_latencia_segundos', 'histogram', 'Histograma de la duración por planilla.')
+        for plantilla, t in sorted(r['plantillas'].items()):
+            acumulado = 0
+            for limite, n in zip(CUBETAS_S + ('+Inf',), t['cubetas']):
+                acumulado += n
+                etiquetas = _etiquetas(plantilla=plantilla, le=limite)
+                lineas.append(f'{p}_archivo_latencia_segundos_bucket{etiquetas} {acumulado}')
+            etiquetas = _etiquetas(plantilla=plantilla)
+            lineas.append(f'{p}_archivo_latencia_segundos_sum{etiquetas} {_numero(t["suma_s"])}')
+            lineas.append(f'{p}_archivo_latencia_segundos_count{etiquetas} {t["archivos"]}')
+
+        metrica('archivos_por_segundo', 'gauge', 'Planillas por segundo desde el inicio.')
+        lineas.append(f'{p}_archivos_por_segundo {_numero(r["archivos_por_s"])}')
+        metrica('bytes_por_segundo', 'gauge', 'Bytes por segundo desde el inicio.')
+        lineas.append(f'{p}_bytes_por_segundo {_numero(r["bytes_por_s"])}')
+        metrica('utilizacion_trabajadores', 'gauge',
+                'Fracción del tiempo disponible de los trabajadores usada en procesar planillas.')
+        lineas.append(f'{p}_utilizacion_trabajadores {_numero(r["utilizacion"])}')
+        metrica('trabajadores', 'gauge', 'Trabajadores de la ejecución.')
+        lineas.append(f'{p}_trabajadores {self.trabajadores}')
+        metrica('inicio_segundos', 'gauge', 'Inicio de la ejecución (segundos Unix).')
+        lineas.append(f'{p}_inicio_segundos {_numero(self.inicio)}')
+        return '\n'.join(lineas) + '\n'
+
+    # ---------------------
+    # --- Exportación ---
+    # ---------------------
+
+    def escribir(self, ruta):
+        """
+        Escribe la instantánea en `ruta` de forma atómica (ej: para el
+        textfile collector de node_exporter).
+        """
+        temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
+    def escribir_periodicamente(self, ruta, intervalo_s=15.0):
+        """
+        Escribe la instantánea cada `intervalo_s` segundos en un hilo aparte.
+        Devuelve un threading.Event: al activarlo (`.set()`) se escribe una
+        última vez y el hilo termina.
+        """
+        detener = threading.Event()
+
+        def ciclo():
+            while not detener.wait(intervalo_s):
+                self._escribir_sin_fallar(ruta)
+            self._escribir_sin_fallar(ruta)
+
+        threading.Thread(target=ciclo, name='pypbtdcev-metricas', daemon=True).start()
+        return detener
+
+    def _escribir_sin_fallar(self, ruta):
+        try:
+            self.escribir(ruta)
+        except OSError:
+            logger.exception(f"No se pudieron escribir las métricas en '{ruta}'.")
+
+    def servir(self, puerto=9464, direccion='127.0.0.1'):
+        """
+        Sirve la instantánea en http://direccion:puerto/metrics desde un hilo
+        aparte. Devuelve el servidor; `servidor.shutdown()` lo detiene.
+        """
+        import http.server
+
+        metricas = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                cuerpo = metricas.texto_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato, *args):
+                logger.debug(formato, *args)
+
+        servidor = http.server.ThreadingHTTPServer((direccion, puerto), Manejador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name='pypbtdcev-metricas-http',
+                         daemon=True).start()
+        return servidor
+
+
+class _MedicionArchivo:
+    def __init__(self, metricas, plantilla, ruta):
+        self.metricas = metricas
+        self.plantilla = plantilla
+        self.ruta = ruta
+        self.error = None
+
+    def fallo(self, error):
+        """Marca el archivo como fallido; `error` es un nombre o una excepción."""
+        if error is not None and not isinstance(error, str):
+            error = type(error).__name__
+        self.error = error
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        duracion = time.perf_counter() - self._inicio
+        if tipo_exc is not None:
+            self.error = tipo_exc.__name__
+        tamano = tamano_archivo(self.ruta) if self.ruta else 0
+        self.metricas.registrar(self.plantilla, duracion, tamano, self.error)
+        return False
@@ -0,0 +1,161 @@
+# ----------------------------
+# -------- PORTAFOLIO ---------
+# ----------------------------
+
+import json
+import os
+
+from .exportador import ESQUEMAS, _a_real, _a_texto, tablas_normalizadas
+from .utilidades import id_vivienda as _id_vivienda
+from .utilidades import leer_planilla, modulo_perezoso, tipo_planilla
+
+pd = modulo_perezoso('pandas')
+
+
+# Columnas de texto con pocos valores distintos que se guardan como Categorical.
+CAMPOS_CATEGORICOS = [
+    'orientacion', 'tipo_marco', 'tipo_ventana', 'posicion_aislacion',
+    'tipo_de_cubierta', 'comuna', 'region', 'zona_termica_proyecto'
+]
+
+
+class DiccionarioCategorias:
+    """
+    Diccionario de categorías por campo, compartido entre lotes.
+
+    Las categorías solo se agregan al final y nunca se reordenan, así que el
+    código de cada valor es estable: un lote viejo y uno nuevo se pueden unir
+    sin recodificar (ver `alinear`). Se puede guardar en JSON para mantener
+    los mismos códigos entre ejecuciones.
+    """
+
+    def __init__(self, categorias=None):
+        self._categorias = {c: list(v) for c, v in (categorias or {}).items()}
+        self._posiciones = {c: {valor: i for i, valor in enumerate(v)}
+                            for c, v in self._categorias.items()}
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def guardar(self, ruta):
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self._categorias, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def categorias(self, campo):
+        return list(self._categorias.get(campo, []))
+
+    def actualizar(self, campo, valores):
+        """Agrega al final los valores que aún no estaban."""
+        lista = self._categorias.setdefault(campo, [])
+        posiciones = self._posiciones.setdefault(campo, {})
+        for valor in valores:
+            if valor is not None and valor not in posiciones:
+                posiciones[valor] = len(lista)
+                lista.append(valor)
+
+    def codificar(self, campo, valores):
+        """Convierte una secuencia de textos en un Categorical con las categorías del campo."""
+        valores = [_a_texto(v) for v in valores]
+        self.actualizar(campo, valores)
+        posiciones = self._posiciones[campo]
+        codigos = [-1 if v is None else posiciones[v] for v in valores]
+        return pd.Categorical.from_codes(codigos, categories=self._categorias[campo])
+
+    def alinear(self, df):
+        """
+        Lleva las columnas categóricas de `df` a las categorías actuales.
+        Como las categorías solo crecen, los códigos existentes no cambian.
+        """
+        for campo in df.columns:
+            if campo in self._categorias and isinstance(df[campo].dtype, pd.CategoricalDtype):
+                if len(df[campo].cat.categories) != len(self._categorias[campo]):
+                    df[campo] = df[campo].cat.set_categories(self._categorias[campo])
+        return df
+
+
+class ConstructorPortafolio:
+    """
+    Arma DataFrames de portafolio (una por tabla normalizada: proyecto, muros,
+    ventanas, puertas, obstrucciones, techos, pisos, dimensiones, renovaciones,
+    resumen) a partir de muchos `datos_extraidos`. Los campos de `CAMPOS_CATEGORICOS`
+    se guardan como pandas Categorical con un diccionario compartido.
+
+        constructor = ConstructorPortafolio()
+        for lote in constructor.lotes(rutas, tamano_lote=500):
+            procesar(lote['ventanas'])
+    """
+
+    def __init__(self, categorias=None, campos_categoricos=CAMPOS_CATEGORICOS):
+        self.categorias = categorias or DiccionarioCategorias()
+        self.campos_categoricos = set(campos_categoricos)
+        self._filas = {nombre: [] for nombre in ESQUEMAS}
+
+    def agregar(self, id_vivienda, datos, archivo=None):
+        """Acumula las tablas de un `datos_extraidos` para el próximo lote."""
+        for nombre, filas in tablas_normalizadas(id_vivienda, datos, archivo).items():
+            self._filas[nombre].extend(filas)
+
+    def _dataframe(self, nombre, filas):
+        campos = [('id_vivienda', 'texto')] + ESQUEMAS[nombre]
+        columnas = {}
+        for campo, tipo in campos:
+            valores = [f.get(campo) for f in filas]
+            if campo in self.campos_categoricos:
+                columnas[campo] = self.categorias.codificar(campo, valores)
+            elif tipo == 'real':
+                columnas[campo] = pd.array([_a_real(v) for v in valores], dtype='float64')
+            else:
+                columnas[campo] = pd.Series([_a_texto(v) for v in valores], dtype=object)
+        return pd.DataFrame(columnas)
+
+    def lote(self):
+        """Devuelve {tabla: DataFrame} con lo acumulado y vacía el acumulador."""
+        filas, self._filas = self._filas, {nombre: [] for nombre in ESQUEMAS}
+        return {nombre: self._dataframe(nombre, f) for nombre, f in filas.items()}
+
+    def lotes(self, rutas, tamano_lote=500, metricas=None, **opciones_lector):
+        """
+        Lee las planillas y entrega un lote de DataFrames cada `tamano_lote`
+        archivos. Las planillas que no se pueden leer se omiten. Con `metricas`
+        (MetricasLote) se registra la lectura de cada planilla.
+        """
+        n = 0
+        for ruta in rutas:
+            if metricas is None:
+                _, datos = leer_planilla(ruta, **opciones_lector)
+            else:
+                tipo = tipo_planilla(ruta)
+                with metricas.medir_archivo(tipo or 'desconocida', ruta) as medicion:
+                    _, datos = leer_planilla(ruta, tipo, **opciones_lector)
+                    if not datos:
+                        medicion.fallo('SinDatos')
+            if not datos:
+                continue
+            self.agregar(_id_vivienda(ruta), datos, archivo=ruta)
+            n += 1
+            if n % tamano_lote == 0:
+                yield self.lote()
+        if n % tamano_lote:
+            yield self.lote()
+
+    def concatenar(self, lotes):
+        """Une varios lotes en un DataFrame por tabla, conservando los Categorical."""
+        partes = {nombre: [] for nombre in ESQUEMAS}
+        for lote in lotes:
+            for nombre, df in lote.items():
+                partes[nombre].append(df)
+        resultado = {}
+        for nombre, dfs in partes.items():
+            # Con categorías idénticas, pd.concat mantiene el tipo Categorical
+            dfs = [self.categorias.alinear(df) for df in dfs]
+            resultado[nombre] = pd.concat(dfs, ignore_index=True) if dfs \
+                else self._dataframe(nombre, [])
+        return resultado
+
+    def construir(self, rutas, tamano_lote=500, metricas=None, **opciones_lector):
+        """Lee todas las planillas y devuelve {tabla: DataFrame}."""
+        return self.concatenar(self.lotes(rutas, tamano_lote, metricas, **opciones_lector))
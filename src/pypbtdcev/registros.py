@@ -0,0 +1,178 @@
+# ----------------------------
+# --------- REGISTROS --------
+# ----------------------------
+
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+
+# Formatos admitidos por `formato_tablas` en los lectores.
+FORMATOS_TABLAS = (None, 'registros', 'columnar')
+
+# Un tipo de registro por esquema (nombre + campos), compartido por todas las viviendas.
+_TIPOS_REGISTRO = {}
+
+
+class RegistroBase:
+    """
+    Fila de tabla con `__slots__`: guarda solo los valores, no las claves.
+    Se comporta como un diccionario de solo lectura (r['campo'], r.get,
+    keys, items) y se convierte con `a_dict()`.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except (AttributeError, TypeError):
+            raise KeyError(campo) from None
+
+    def get(self, campo, defecto=None):
+        return getattr(self, campo, defecto) if campo in self.__slots__ else defecto
+
+    def __contains__(self, campo):
+        return campo in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def values(self):
+        return [getattr(self, c) for c in self.__slots__]
+
+    def items(self):
+        return [(c, getattr(self, c)) for c in self.__slots__]
+
+    def a_dict(self):
+        return {c: getattr(self, c) for c in self.__slots__}
+
+    def __eq__(self, otro):
+        if isinstance(otro, (RegistroBase, dict)):
+            return self.a_dict() == dict(otro.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+def tipo_registro(nombre, campos):
+    """Devuelve (y cachea) la clase con `__slots__` para una sección."""
+    clave = (nombre, tuple(campos))
+    tipo = _TIPOS_REGISTRO.get(clave)
+    if tipo is None:
+        tipo = type(f"Registro_{nombre}", (RegistroBase,), {'__slots__': tuple(campos)})
+        # setdefault: si otro hilo creó el tipo al mismo tiempo, todos usan el mismo
+        tipo = _TIPOS_REGISTRO.setdefault(clave, tipo)
+    return tipo
+
+
+def a_registros(nombre, filas):
+    """Lista de diccionarios -> lista de registros con `__slots__`."""
+    if not filas:
+        return []
+    tipo = tipo_registro(nombre, list(filas[0]))
+    registros = []
+    for fila in filas:
+        registro = tipo.__new__(tipo)
+        for campo, valor in fila.items():
+            setattr(registro, campo, valor)
+        registros.append(registro)
+    return registros
+
+
+class TablaColumnar:
+    """
+    Tabla guardada por columnas (struct-of-arrays). Las columnas donde todos
+    los valores son float o None se guardan como arreglos float64 (None -> NaN);
+    el resto, como listas. Al iterar o indexar se obtienen diccionarios.
+    """
+    __slots__ = ('campos', 'columnas', '_n')
+
+    def __init__(self, campos, columnas, n):
+        self.campos = tuple(campos)
+        self.columnas = columnas
+        self._n = n
+
+    @classmethod
+    def desde_filas(cls, filas):
+        campos = list(filas[0]) if filas else []
+        columnas = {}
+        for campo in campos:
+            valores = [fila.get(campo) for fila in filas]
+            if all(v is None or type(v) is float for v in valores):
+                columnas[campo] = np.array(
+                    [np.nan if v is None else v for v in valores], dtype=np.float64)
+            else:
+                columnas[campo] = valores
+        return cls(campos, columnas, len(filas))
+
+    def __len__(self):
+        return self._n
+
+    def columna(self, campo):
+        """Columna completa (arreglo float64 con NaN, o lista)."""
+        return self.columnas[campo]
+
+    def _valor(self, campo, i):
+        valor = self.columnas[campo][i]
+        if isinstance(valor, np.floating):
+            return None if np.isnan(valor) else float(valor)
+        return valor
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return {c: self._valor(c, i) for c in self.campos}
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def a_registros(self):
+        """Lista de diccionarios, igual que el formato por defecto."""
+        return list(self)
+
+    def __eq__(self, otro):
+        if isinstance(otro, (TablaColumnar, list)):
+            return self.a_registros() == list(otro)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TablaColumnar({self._n} filas, campos={list(self.campos)})"
+
+
+def compactar_tabla(nombre, filas, formato):
+    """Convierte una lista de diccionarios al formato pedido."""
+    if formato is None or filas is None:
+        return filas
+    if formato == 'registros':
+        return a_registros(nombre, filas)
+    if formato == 'columnar':
+        return TablaColumnar.desde_filas(filas)
+    raise ValueError(f"formato_tablas desconocido: '{formato}'. Use uno de {FORMATOS_TABLAS}.")
+
+
+def a_diccionarios(valor):
+    """
+    Convierte recursivamente registros y tablas columnares a diccionarios y
+    listas, por ejemplo antes de serializar con json o de usar el escritor.
+    """
+    if isinstance(valor, RegistroBase):
+        return valor.a_dict()
+    if isinstance(valor, TablaColumnar):
+        return valor.a_registros()
+    if isinstance(valor, dict):
+        return {k: a_diccionarios(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [a_diccionarios(v) for v in valor]
+    return valor
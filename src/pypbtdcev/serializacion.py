@@ -0,0 +1,250 @@
+# ----------------------------
+# ------- SERIALIZACIÓN ------
+# ----------------------------
+
+import datetime
+import decimal
+import io
+import json
+import math
+
+from .registros import RegistroBase, TablaColumnar
+from .utilidades import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+
+# Filas de 'Resultados' que se codifican juntas en cada fragmento.
+FILAS_POR_FRAGMENTO = 256
+
+# Marca de una tabla compacta: {"_formato": "tabla", "columnas": [...], "filas": [[...], ...]}
+FORMATO_TABLA = 'tabla'
+
+_codificador = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+def _normalizar(valor):
+    """
+    Convierte recursivamente a tipos JSON: NaN/inf -> None, escalares y
+    arreglos de numpy, Timestamp/datetime (ISO 8601), Decimal, registros y
+    tablas columnares.
+    """
+    if isinstance(valor, dict):
+        return {k if isinstance(k, str) else str(k): _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, float):
+        return valor if math.isfinite(valor) else None
+    if valor is None or isinstance(valor, (str, bool, int)):
+        return valor
+    if isinstance(valor, (datetime.date, datetime.time)):
+        # Incluye pandas.Timestamp (y pd.NaT, que no es igual a sí mismo)
+        return None if valor != valor else valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return _normalizar(float(valor))
+    if isinstance(valor, RegistroBase):
+        return _normalizar(valor.a_dict())
+    if isinstance(valor, TablaColumnar):
+        return _normalizar(valor.a_registros())
+    if hasattr(valor, 'tolist'):
+        # Escalares y arreglos de numpy (np.int64, np.bool_, ndarray)
+        return _normalizar(valor.tolist())
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    try:
+        if valor != valor:
+            return None
+    except TypeError:
+        # pd.NA no se puede evaluar como booleano
+        return None
+    return str(valor)
+
+
+def _json(valor):
+    return _codificador.encode(_normalizar(valor))
+
+
+def _filas_numericas(matriz):
+    """Codifica un bloque float como lista de listas JSON, con NaN -> null."""
+    texto = json.dumps(matriz.tolist(), separators=(',', ':'))
+    # Solo hay números: los únicos tokens no JSON son NaN e Infinity
+    return texto.replace('NaN', 'null').replace('-Infinity', 'null').replace('Infinity', 'null')
+
+
+def _es_resultados_arreglo(valor):
+    return isinstance(valor, dict) and 'valores' in valor and 'columnas' in valor \
+        and hasattr(valor['valores'], 'dtype')
+
+
+def _es_tabla_de_registros(valor):
+    return isinstance(valor, list) and len(valor) > 1 and isinstance(valor[0], dict)
+
+
+# ----------------------
+# --- Codificación ---
+# ----------------------
+
+def _fragmentos_resultados(valor, compacto):
+    """Fragmentos JSON de la hoja 'Resultados', de a FILAS_POR_FRAGMENTO filas."""
+    if _es_resultados_arreglo(valor):
+        # Forma de arreglo: {'columnas', 'valores' (n x m), 'caso' (n)}
+        yield '{'
+        primero = True
+        for clave, contenido in valor.items():
+            yield ('' if primero else ',') + _codificador.encode(str(clave)) + ':'
+            primero = False
+            if clave == 'valores':
+                matriz = np.asarray(contenido, dtype=np.float64)
+                yield '['
+                for i in range(0, len(matriz), FILAS_POR_FRAGMENTO):
+                    bloque = _filas_numericas(matriz[i:i + FILAS_POR_FRAGMENTO])
+                    yield ('' if i == 0 else ',') + bloque[1:-1]
+                yield ']'
+            else:
+                yield _json(contenido)
+        yield '}'
+        return
+
+    if not (compacto and _es_tabla_de_registros(valor)):
+        yield _json(valor)
+        return
+
+    # Lista de registros: las claves se escriben una sola vez
+    columnas = list(valor[0])
+    yield '{"_formato":"' + FORMATO_TABLA + '","columnas":' + _json(columnas) + ',"filas":['
+    for i in range(0, len(valor), FILAS_POR_FRAGMENTO):
+        filas = [[fila.get(c) for c in columnas] for fila in valor[i:i + FILAS_POR_FRAGMENTO]]
+        yield ('' if i == 0 else ',') + _json(filas)[1:-1]
+    yield ']}'
+
+
+def serializar(registro, resultados_compactos=True):
+    """
+    Genera el JSON de `registro` (sin salto de línea) en fragmentos, sin
+    armar el documento completo en memoria. Cada hoja de 'datos' se codifica
+    por separado y 'Resultados' de a FILAS_POR_FRAGMENTO filas. Con
+    `resultados_compactos`, 'Resultados' como lista de diccionarios se
+    escribe como tabla (columnas una vez + filas); ver `expandir_tablas`.
+    """
+    yield '{'
+    primero = True
+    for clave, valor in registro.items():
+        yield ('' if primero else ',') + _codificador.encode(str(clave)) + ':'
+        primero = False
+        if clave != 'datos' or not isinstance(valor, dict):
+            yield _json(valor)
+            continue
+        yield '{'
+        for j, (hoja, contenido) in enumerate(valor.items()):
+            yield ('' if j == 0 else ',') + _codificador.encode(str(hoja)) + ':'
+            if hoja == 'Resultados':
+                yield from _fragmentos_resultados(contenido, resultados_compactos)
+            else:
+                yield _json(contenido)
+        yield '}'
+    yield '}'
+
+
+# -------------------------
+# --- Escritor de líneas ---
+# -------------------------
+
+class EscritorJSONL:
+    """
+    Escribe una planilla por línea en un archivo (ruta u objeto abierto, en
+    modo texto o binario) o en un socket. Los fragmentos se juntan en un
+    búfer de `tamano_bufer` bytes antes de escribirse.
+
+        with EscritorJSONL('planillas.jsonl') as salida:
+            for ruta in rutas:
+                salida.escribir_planilla(LectorPBTD03_v2(ruta).datos_extraidos, archivo=ruta)
+    """
+
+    def __init__(self, destino, resultados_compactos=True, tamano_bufer=1 << 16, agregar=False):
+        self.resultados_compactos = resultados_compactos
+        self.tamano_bufer = tamano_bufer
+        self._propio = isinstance(destino, str)
+        if self._propio:
+            destino = open(destino, 'ab' if agregar else 'wb')
+        self.destino = destino
+        if hasattr(destino, 'sendall'):
+            self._enviar, self._binario = destino.sendall, True
+        else:
+            self._enviar = destino.write
+            self._binario = 'b' in getattr(destino, 'mode', '') or \
+                isinstance(destino, (io.RawIOBase, io.BufferedIOBase))
+        self.lineas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _emitir(self, texto):
+        self._enviar(texto.encode('utf-8') if self._binario else texto)
+
+    def escribir(self, registro):
+        """Escribe `registro` (un diccionario) como una línea JSON."""
+        partes = []
+        tamano = 0
+        for fragmento in serializar(registro, self.resultados_compactos):
+            partes.append(fragmento)
+            tamano += len(fragmento)
+            if tamano >= self.tamano_bufer:
+                self._emitir(''.join(partes))
+                partes, tamano = [], 0
+        partes.append('\n')
+        self._emitir(''.join(partes))
+        self.lineas += 1
+
+    def escribir_planilla(self, datos, **metadatos):
+        """Escribe `{**metadatos, 'datos': datos}` (ej: archivo=ruta, tipo='PBTD03')."""
+        registro = dict(metadatos)
+        registro['datos'] = datos
+        self.escribir(registro)
+
+    def vaciar(self):
+        if hasattr(self.destino, 'flush'):
+            self.destino.flush()
+
+    def cerrar(self):
+        self.vaciar()
+        if self._propio:
+            self.destino.close()
+
+
+# ---------------
+# --- Lectura ---
+# ---------------
+
+def expandir_tablas(valor, arreglos=False):
+    """
+    Revierte la codificación compacta: las tablas {"_formato": "tabla", ...}
+    vuelven a ser listas de diccionarios. Con `arreglos=True`, 'valores' de
+    'Resultados' en forma de arreglo vuelve a ser un ndarray float64 (null -> NaN).
+    """
+    if isinstance(valor, dict):
+        if valor.get('_formato') == FORMATO_TABLA:
+            columnas = valor['columnas']
+            return [dict(zip(columnas, fila)) for fila in valor['filas']]
+        if arreglos and 'valores' in valor and 'columnas' in valor and isinstance(valor['valores'], list):
+            valor = dict(valor)
+            valor['valores'] = np.array(valor['valores'], dtype=np.float64).reshape(
+                len(valor['valores']), len(valor['columnas']))
+            if 'caso' in valor:
+                valor['caso'] = np.array(valor['caso'], dtype=object)
+            return valor
+        return {k: expandir_tablas(v, arreglos) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [expandir_tablas(v, arreglos) for v in valor]
+    return valor
+
+
+def leer_jsonl(ruta, expandir=True, arreglos=False):
+    """Lee un archivo JSONL línea por línea; con `expandir` aplica `expandir_tablas`."""
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            registro = json.loads(linea)
+            yield expandir_tablas(registro, arreglos) if expandir else registro
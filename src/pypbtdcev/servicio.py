@@ -0,0 +1,564 @@
+# ----------------------------
+# --------- SERVICIO ---------
+# ----------------------------
+
+# Servicio local de larga duración: mantiene pandas/openpyxl importados y las
+# plantillas cargadas en un grupo de procesos, para que cada pedido pague
+# solo el trabajo propio (leer, sondear o generar una planilla).
+#
+#   pypbtdcev servir --plantilla plantilla_01.xlsm       (socket Unix por defecto)
+#   pypbtdcev servir --puerto 8765 --plantilla plantilla_01.xlsm
+#
+#   cliente = ClientePBTD()                     # o ClientePBTD('http://127.0.0.1:8765')
+#   datos = cliente.leer('vivienda.xlsm')['datos']
+#   cliente.generar('plantilla_01.xlsm', 'salida.xlsm', datos)
+#
+# Solo escucha en un socket Unix (permisos 0600) o en localhost: las rutas de
+# los pedidos son rutas del equipo donde corre el servicio. Por HTTP no hay
+# autenticación, así que se rechazan los pedidos que puede armar un navegador:
+# los que traen cabecera Origin, los POST sin Content-Type application/json y
+# los dirigidos a un Host que no es la dirección local (DNS rebinding).
+
+import http.client
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+from .aislamiento import TIEMPO_AGOTADO, TRABAJADOR_TERMINADO, _Trabajador
+from .escritor import EscritorPBTD01_v2
+from .serializacion import expandir_tablas, serializar
+from .utilidades import hash_archivo, nombres_de_hojas, tipo_planilla
+from .validaciones import indice_de_plantilla
+
+logger = logging.getLogger(__name__)
+
+# Socket Unix donde escucha el servicio si no se indica un puerto HTTP.
+SOCKET_POR_DEFECTO = os.path.join(
+    tempfile.gettempdir(), f"pypbtdcev-{os.getuid() if hasattr(os, 'getuid') else 0}.sock")
+PUERTO_POR_DEFECTO = 8765
+
+# Opciones de lectura que acepta POST /leer (ver lector.LectorPBTD).
+OPCIONES_LECTOR = ('resultados_como_arreglo', 'modo_liviano', 'formato_tablas')
+
+# Nombres con que un cliente local puede dirigirse al servicio por HTTP.
+HOSTS_LOCALES = ('localhost', '127.0.0.1', '::1')
+
+# Cada cuánto revisa `ejecutar` si el grupo se cerró mientras espera un trabajador.
+_ESPERA_LIBRE_S = 0.5
+
+
+# -----------------------------
+# --- Lado del trabajador ---
+# -----------------------------
+
+class EscritorPrecargado(EscritorPBTD01_v2):
+    """
+    Escritor que tiene siempre una copia de cada plantilla ya cargada. Al
+    usar una, carga la siguiente en un hilo mientras el proceso espera el
+    próximo pedido, así la carga de la plantilla queda fuera de la latencia.
+    Si el archivo de la plantilla cambia, la copia se descarta.
+    """
+
+    def __init__(self, plantillas=()):
+        super().__init__()
+        self._reservas = {}
+        for ruta in plantillas:
+            self._preparar(os.path.abspath(ruta))
+
+    def _preparar(self, ruta):
+        reserva = {'libro': None, 'mtime': None}
+
+        def cargar():
+            try:
+                reserva['mtime'] = os.path.getmtime(ruta)
+                reserva['libro'] = super(EscritorPrecargado, self)._cargar_plantilla(ruta)
+            except Exception:
+                logger.exception(f"No se pudo precargar la plantilla '{ruta}'.")
+
+        reserva['hilo'] = threading.Thread(target=cargar, daemon=True)
+        reserva['hilo'].start()
+        self._reservas[ruta] = reserva
+
+    def _cargar_plantilla(self, ruta_plantilla):
+        ruta = os.path.abspath(ruta_plantilla)
+        reserva = self._reservas.pop(ruta, None)
+        libro = None
+        if reserva is not None:
+            reserva['hilo'].join()
+            if reserva['mtime'] == os.path.getmtime(ruta):
+                libro = reserva['libro']
+        if libro is None:
+            libro = super()._cargar_plantilla(ruta)
+        # Las plantillas usadas por primera vez también quedan precargadas
+        self._preparar(ruta)
+        return libro
+
+
+_escritor = None
+
+
+def _iniciar_trabajador(plantillas, nivel_registro):
+    global _escritor
+    logging.getLogger('pypbtdcev').setLevel(nivel_registro)
+    # Importar una sola vez por proceso lo que usan los lectores y el escritor
+    import numpy  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    import pandas.io.excel._openpyxl  # noqa: F401
+    _escritor = EscritorPrecargado(plantillas)
+
+
+def _tarea_leer(ruta, opciones):
+    """Devuelve (estado HTTP, cuerpo JSON en bytes); se serializa en el trabajador."""
+    from .aislamiento import _leer
+
+    inicio = time.perf_counter()
+    tipo, datos, error, mensaje = _leer(ruta, opciones)
+    duracion = time.perf_counter() - inicio
+    if error is not None:
+        estado = 404 if error == 'FileNotFoundError' else 422
+        return estado, _cuerpo({'archivo': ruta, 'tipo': tipo, 'error': error,
+                                'mensaje': mensaje, 'duracion_s': duracion})
+    registro = {'archivo': ruta, 'tipo': tipo, 'duracion_s': duracion, 'datos': datos}
+    return 200, ''.join(serializar(registro)).encode('utf-8')
+
+
+def _tarea_generar(ruta_plantilla, ruta_salida, datos, validar=False):
+    inicio = time.perf_counter()
+    if validar:
+        # El índice se extrae una vez por proceso y plantilla
+        fallas = _escritor.validar(datos, indice_de_plantilla(ruta_plantilla))
+        if fallas:
+            return 422, _cuerpo({'salida': ruta_salida, 'ok': False, 'error': 'Validacion',
+                                 'fallas': [f.a_dict() for f in fallas],
+                                 'duracion_s': time.perf_counter() - inicio})
+    ok = _escritor.crear_nueva_planilla(ruta_plantilla, ruta_salida, datos)
+    registro = {'salida': ruta_salida, 'ok': ok, 'duracion_s': time.perf_counter() - inicio}
+    if not ok:
+        registro['error'] = 'No se pudo escribir la planilla (ver el registro del servicio).'
+    return (200 if ok else 422), _cuerpo(registro)
+
+
+def _cuerpo(registro):
+    return ''.join(serializar(registro)).encode('utf-8')
+
+
+_TAREAS = {'leer': _tarea_leer, 'generar': _tarea_generar}
+
+
+def _bucle_servicio(conexion, plantillas, nivel_registro):
+    """
+    Inicializa el proceso, avisa con su pid y atiende (operacion, args) hasta
+    recibir None, respondiendo (estado HTTP, cuerpo).
+    """
+    try:
+        _iniciar_trabajador(plantillas, nivel_registro)
+        conexion.send(os.getpid())
+        while True:
+            pedido = conexion.recv()
+            if pedido is None:
+                break
+            operacion, args = pedido
+            try:
+                respuesta = _TAREAS[operacion](*args)
+            except Exception as e:
+                logger.exception("Error al atender un pedido.")
+                respuesta = 500, _cuerpo({'error': type(e).__name__, 'mensaje': str(e)})
+            conexion.send(respuesta)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conexion.close()
+
+
+def sondear(ruta, con_hash=False):
+    """Metadatos de una planilla sin cargar el libro."""
+    stat = os.stat(ruta)
+    registro = {'archivo': ruta, 'tamano': stat.st_size, 'mtime': stat.st_mtime,
+                'tipo': tipo_planilla(ruta), 'hojas': nombres_de_hojas(ruta)}
+    if con_hash:
+        registro['hash'] = hash_archivo(ruta)
+    return registro
+
+
+# ---------------------
+# --- Servicio ---
+# ---------------------
+
+class _GrupoTrabajadores:
+    """
+    Trabajadores propios (aislamiento._Trabajador) en lugar de un
+    ProcessPoolExecutor: el que muere o supera el tiempo se termina y se
+    reemplaza solo, sin dejar inutilizado al resto del grupo.
+    """
+
+    def __init__(self, procesos, plantillas, nivel_registro):
+        # El servicio atiende en hilos: con 'fork' el hijo podría heredar locks tomados
+        metodos = multiprocessing.get_all_start_methods()
+        self._contexto = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in metodos else 'spawn')
+        self._args = (plantillas, nivel_registro)
+        self._libres = queue.Queue()
+        self._todos = set()
+        self._iniciando = set()
+        self._candado = threading.Lock()
+        self._cerrado = False
+        self.reemplazos = 0
+        for _ in range(procesos):
+            self._libres.put(self._nuevo())
+        # Esperar a que estén listos ahora y no en el primer pedido
+        for trabajador in list(self._iniciando):
+            try:
+                self._esperar_inicio(trabajador)
+            except (EOFError, OSError):
+                self.cerrar()
+                raise RuntimeError("Un trabajador del servicio terminó al iniciarse "
+                                   "(ver el registro del servicio).") from None
+
+    def _nuevo(self):
+        trabajador = _Trabajador(self._contexto, _bucle_servicio, self._args)
+        with self._candado:
+            self._todos.add(trabajador)
+            self._iniciando.add(trabajador)
+        return trabajador
+
+    def _esperar_inicio(self, trabajador):
+        if trabajador in self._iniciando:
+            trabajador.conexion.recv()
+            self._iniciando.discard(trabajador)
+
+    def _devolver(self, trabajador, reemplazar):
+        if reemplazar:
+            trabajador.detener()
+            with self._candado:
+                self._todos.discard(trabajador)
+                self._iniciando.discard(trabajador)
+            self.reemplazos += 1
+            if self._cerrado:
+                return
+            trabajador = self._nuevo()
+        if self._cerrado:
+            trabajador.detener()
+        else:
+            self._libres.put(trabajador)
+
+    def ejecutar(self, operacion, args, timeout_s):
+        """
+        Ejecuta la operación en un trabajador libre y devuelve (estado, cuerpo).
+        Si se supera `timeout_s` o el proceso muere, el trabajador se reemplaza.
+        Con el grupo cerrado responde 503 en lugar de esperar un trabajador.
+        """
+        trabajador = None
+        while trabajador is None:
+            if self._cerrado:
+                return 503, _cuerpo({'error': 'ServicioCerrado',
+                                     'mensaje': 'El servicio se está cerrando.'})
+            try:
+                trabajador = self._libres.get(timeout=_ESPERA_LIBRE_S)
+            except queue.Empty:
+                pass
+        reemplazar = True
+        try:
+            self._esperar_inicio(trabajador)
+            trabajador.conexion.send((operacion, args))
+            if trabajador.conexion.poll(timeout_s):
+                respuesta = trabajador.conexion.recv()
+                reemplazar = False
+                return respuesta
+            return 504, _cuerpo({'error': TIEMPO_AGOTADO,
+                                 'mensaje': f"Se superaron {timeout_s} s; el trabajador se reinició."})
+        except (EOFError, OSError):
+            # El proceso murió (ej: señal del sistema por falta de memoria)
+            trabajador.proceso.join()
+            return 500, _cuerpo({'error': TRABAJADOR_TERMINADO,
+                                 'mensaje': f"El trabajador terminó con código "
+                                            f"{trabajador.proceso.exitcode}."})
+        finally:
+            self._devolver(trabajador, reemplazar)
+
+    def cerrar(self):
+        """Retira los trabajadores libres y termina los que siguen ocupados."""
+        self._cerrado = True
+        libres = []
+        while True:
+            try:
+                libres.append(self._libres.get_nowait())
+            except queue.Empty:
+                break
+        for trabajador in libres:
+            trabajador.retirar()
+        with self._candado:
+            ocupados = self._todos.difference(libres)
+            self._todos.clear()
+        for trabajador in ocupados:
+            trabajador.detener()
+
+
+class _ServidorHTTPUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _destino(puerto, socket_unix):
+    """(puerto, socket_unix) efectivos: socket Unix salvo que se pida un puerto."""
+    if puerto is not None or socket_unix:
+        return puerto, socket_unix
+    if hasattr(socket, 'AF_UNIX'):
+        return None, SOCKET_POR_DEFECTO
+    return PUERTO_POR_DEFECTO, None
+
+
+def _nombre_host(host):
+    """Cabecera Host sin el puerto ('[::1]:8765' -> '::1')."""
+    host = (host or '').strip().lower()
+    if host.startswith('['):
+        return host[1:].split(']', 1)[0]
+    return host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+
+
+class ServicioPBTD:
+    """
+    Grupo de `procesos` trabajadores con las bibliotecas importadas y las
+    `plantillas` precargadas, expuesto por HTTP (localhost) o socket Unix:
+
+        GET  /salud                                  -> estado del servicio
+        POST /leer     {"ruta", "opciones"}          -> {"archivo", "tipo", "datos"}
+        POST /sondear  {"ruta", "hash"}              -> metadatos, sin leer datos
+        POST /generar  {"plantilla", "salida", "datos", "validar"}
+
+    `timeout_s` limita cada pedido (responde 504): el trabajador se termina y
+    se reemplaza, igual que uno que muere durante un pedido (responde 500).
+    "opciones" de /leer solo admite las de OPCIONES_LECTOR (si no, 400).
+    """
+
+    def __init__(self, procesos=None, plantillas=(), timeout_s=300,
+                 nivel_registro=logging.WARNING):
+        self.procesos = procesos or os.cpu_count()
+        self.plantillas = [os.path.abspath(p) for p in plantillas]
+        self.timeout_s = timeout_s
+        self.trabajadores = _GrupoTrabajadores(self.procesos, self.plantillas, nivel_registro)
+        self.inicio = time.time()
+        self.pedidos = 0
+        self._servidor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def atender(self, operacion, pedido):
+        """Ejecuta una operación y devuelve (estado HTTP, cuerpo en bytes)."""
+        self.pedidos += 1
+        if operacion == 'salud':
+            return 200, _cuerpo({'estado': 'ok', 'procesos': self.procesos,
+                                 'plantillas': self.plantillas, 'pedidos': self.pedidos,
+                                 'reemplazos': self.trabajadores.reemplazos,
+                                 'activo_s': time.time() - self.inicio})
+        if operacion == 'sondear':
+            try:
+                return 200, _cuerpo(sondear(pedido['ruta'], bool(pedido.get('hash'))))
+            except OSError as e:
+                return 404, _cuerpo({'error': type(e).__name__, 'mensaje': str(e)})
+        if operacion == 'leer':
+            opciones = pedido.get('opciones') or {}
+            desconocidas = sorted(set(opciones) - set(OPCIONES_LECTOR))
+            if desconocidas:
+                return 400, _cuerpo({'error': 'OpcionDesconocida',
+                                     'mensaje': f"Opciones no admitidas: {desconocidas}. "
+                                                f"Use {list(OPCIONES_LECTOR)}."})
+            args = (pedido['ruta'], opciones)
+        elif operacion == 'generar':
+            args = (pedido['plantilla'], pedido['salida'], expandir_tablas(pedido['datos']),
+                    bool(pedido.get('validar')))
+        else:
+            return 404, _cuerpo({'error': 'OperacionDesconocida', 'mensaje': operacion})
+        return self.trabajadores.ejecutar(operacion, args, self.timeout_s)
+
+    def _manejador(self, hosts):
+        servicio = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _responder(self, estado, cuerpo):
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def _rechazo(self):
+                """(estado, cuerpo) si el pedido no viene de un cliente local, o None."""
+                if self.headers.get('Origin') is not None:
+                    return 403, _cuerpo({'error': 'OrigenNoPermitido',
+                                         'mensaje': 'No se aceptan pedidos de navegadores.'})
+                if hosts is not None and _nombre_host(self.headers.get('Host')) not in hosts:
+                    return 403, _cuerpo({'error': 'HostNoPermitido',
+                                         'mensaje': str(self.headers.get('Host'))})
+                return None
+
+            def do_GET(self):
+                rechazo = self._rechazo()
+                if rechazo is not None:
+                    self._responder(*rechazo)
+                    return
+                if self.path.rstrip('/') != '/salud':
+                    self._responder(404, _cuerpo({'error': 'RutaDesconocida', 'mensaje': self.path}))
+                    return
+                self._responder(*servicio.atender('salud', {}))
+
+            def do_POST(self):
+                rechazo = self._rechazo()
+                tipo = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+                if rechazo is None and tipo != 'application/json':
+                    rechazo = 415, _cuerpo({'error': 'TipoNoAdmitido',
+                                            'mensaje': 'Use Content-Type: application/json.'})
+                if rechazo is not None:
+                    # El cuerpo no se lee: cerrar la conexión en vez de reutilizarla
+                    self.close_connection = True
+                    self._responder(*rechazo)
+                    return
+                try:
+                    largo = int(self.headers.get('Content-Length') or 0)
+                    pedido = json.loads(self.rfile.read(largo) or b'{}')
+                    respuesta = servicio.atender(self.path.strip('/'), pedido)
+                except (ValueError, KeyError) as e:
+                    respuesta = 400, _cuerpo({'error': type(e).__name__, 'mensaje': str(e)})
+                except Exception as e:
+                    logger.exception("Error al atender un pedido.")
+                    respuesta = 500, _cuerpo({'error': type(e).__name__, 'mensaje': str(e)})
+                self._responder(*respuesta)
+
+            def log_message(self, formato, *args):
+                logger.debug(formato, *args)
+
+        return Manejador
+
+    def crear_servidor(self, puerto=None, direccion='127.0.0.1', socket_unix=None):
+        """
+        Crea el servidor sin empezar a atender: HTTP si se indica `puerto`; si
+        no, en `socket_unix` (por defecto SOCKET_POR_DEFECTO). Donde no hay
+        sockets Unix, HTTP en PUERTO_POR_DEFECTO.
+        """
+        puerto, socket_unix = _destino(puerto, socket_unix)
+        if socket_unix:
+            if os.path.exists(socket_unix):
+                os.unlink(socket_unix)
+            servidor = _ServidorHTTPUnix(socket_unix, self._manejador(hosts=None))
+            os.chmod(socket_unix, 0o600)
+        else:
+            hosts = set(HOSTS_LOCALES) | {direccion}
+            servidor = http.server.ThreadingHTTPServer((direccion, puerto), self._manejador(hosts))
+            servidor.daemon_threads = True
+        self._servidor = servidor
+        return servidor
+
+    def servir(self, puerto=None, direccion='127.0.0.1', socket_unix=None):
+        """Atiende pedidos hasta que se interrumpa (Ctrl+C) o se llame a `cerrar`."""
+        puerto, socket_unix = _destino(puerto, socket_unix)
+        servidor = self._servidor or self.crear_servidor(puerto, direccion, socket_unix)
+        destino = socket_unix or f"http://{direccion}:{servidor.server_address[1]}"
+        logger.info(f"Servicio PBTD atendiendo en {destino} con {self.procesos} procesos.")
+        try:
+            servidor.serve_forever()
+        finally:
+            servidor.server_close()
+            if socket_unix and os.path.exists(socket_unix):
+                os.unlink(socket_unix)
+
+    def iniciar(self, puerto=None, direccion='127.0.0.1', socket_unix=None):
+        """Atiende pedidos en un hilo aparte y devuelve el servidor."""
+        puerto, socket_unix = _destino(puerto, socket_unix)
+        servidor = self.crear_servidor(puerto, direccion, socket_unix)
+        threading.Thread(target=self.servir, args=(puerto, direccion, socket_unix),
+                         name='pypbtdcev-servicio', daemon=True).start()
+        return servidor
+
+    def cerrar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor = None
+        self.trabajadores.cerrar()
+
+
+# ---------------
+# --- Cliente ---
+# ---------------
+
+class _ConexionUnix(http.client.HTTPConnection):
+    def __init__(self, ruta, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self._ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._ruta)
+
+
+class ErrorServicio(Exception):
+    """Respuesta con error del servicio; `estado` es el código HTTP y `detalle` el cuerpo."""
+
+    def __init__(self, estado, detalle):
+        super().__init__(f"{estado}: {detalle.get('error')}: {detalle.get('mensaje')}")
+        self.estado = estado
+        self.detalle = detalle
+
+
+class ClientePBTD:
+    """
+    Cliente del servicio, por URL (http://127.0.0.1:8765) o por socket Unix.
+    Sin ninguno de los dos usa el mismo destino por defecto que el servicio.
+    """
+
+    def __init__(self, url=None, socket_unix=None, timeout_s=600):
+        if url is None and not socket_unix:
+            puerto, socket_unix = _destino(None, None)
+            if puerto is not None:
+                url = f'http://127.0.0.1:{puerto}'
+        self.url = url
+        self.socket_unix = socket_unix
+        self.timeout_s = timeout_s
+
+    def _conexion(self):
+        if self.socket_unix:
+            return _ConexionUnix(self.socket_unix, self.timeout_s)
+        destino = self.url.split('://', 1)[-1].rstrip('/')
+        return http.client.HTTPConnection(destino, timeout=self.timeout_s)
+
+    def _pedir(self, metodo, ruta, pedido=None):
+        conexion = self._conexion()
+        try:
+            cuerpo = ''.join(serializar(pedido)).encode('utf-8') if pedido is not None else None
+            cabeceras = {'Content-Type': 'application/json'} if cuerpo is not None else {}
+            conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            resultado = json.loads(respuesta.read())
+        finally:
+            conexion.close()
+        if respuesta.status != 200:
+            raise ErrorServicio(respuesta.status, resultado)
+        return resultado
+
+    def salud(self):
+        return self._pedir('GET', '/salud')
+
+    def leer(self, ruta, **opciones):
+        """Devuelve {'archivo', 'tipo', 'duracion_s', 'datos'}."""
+        return expandir_tablas(self._pedir('POST', '/leer', {'ruta': ruta, 'opciones': opciones}))
+
+    def sondear(self, ruta, con_hash=False):
+        return self._pedir('POST', '/sondear', {'ruta': ruta, 'hash': con_hash})
+
+    def generar(self, ruta_plantilla, ruta_salida, datos, validar=False):
+        """Con `validar`, los datos se revisan con las validaciones de la plantilla (ver validaciones.py)."""
+        return self._pedir('POST', '/generar', {'plantilla': ruta_plantilla, 'salida': ruta_salida,
+                                                'datos': datos, 'validar': validar})
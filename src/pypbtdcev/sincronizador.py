@@ -0,0 +1,132 @@
+# ----------------------------
+# ------ SINCRONIZADOR -------
+# ----------------------------
+
+import fnmatch
+import json
+import os
+import time
+
+from .utilidades import hash_archivo, leer_planilla
+
+
+class SincronizadorDirectorio:
+    """
+    Mantiene un manifiesto (ruta, tamaño, mtime, hash) de las planillas de un
+    directorio y, en cada pasada, lee solo los archivos nuevos o modificados.
+
+    Un archivo se considera modificado si cambió su tamaño o mtime y además
+    su hash; si solo cambió la fecha, se actualiza el manifiesto sin leerlo.
+    """
+
+    def __init__(self, directorio, ruta_manifiesto, patrones=('*.xlsm', '*.xlsx'),
+                 opciones_lector=None):
+        self.directorio = os.path.abspath(directorio)
+        self.ruta_manifiesto = ruta_manifiesto
+        self.patrones = patrones
+        self.opciones_lector = opciones_lector or {}
+        self.manifiesto = {}
+        if os.path.exists(ruta_manifiesto):
+            with open(ruta_manifiesto, encoding='utf-8') as f:
+                self.manifiesto = json.load(f)
+
+    def _guardar_manifiesto(self):
+        # Escritura atómica: un corte a mitad no deja el manifiesto a medias
+        temporal = self.ruta_manifiesto + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.manifiesto, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta_manifiesto)
+
+    def _listar(self):
+        """Recorre el directorio con os.scandir y devuelve {ruta: stat}."""
+        encontrados = {}
+        pendientes = [self.directorio]
+        while pendientes:
+            actual = pendientes.pop()
+            try:
+                entradas = list(os.scandir(actual))
+            except OSError:
+                continue
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    pendientes.append(entrada.path)
+                elif entrada.name.startswith('~$'):
+                    # Archivos de bloqueo de Excel
+                    continue
+                elif any(fnmatch.fnmatch(entrada.name, p) for p in self.patrones):
+                    encontrados[entrada.path] = entrada.stat()
+        return encontrados
+
+    def escanear(self):
+        """
+        Compara el directorio con el manifiesto sin leer planillas.
+        Devuelve una lista de (evento, ruta, stat, hash) con evento 'agregado',
+        'modificado' o 'eliminado' (hash es None si aún no se calculó). Los
+        archivos que solo cambiaron de fecha se actualizan en el manifiesto y
+        no generan evento.
+        """
+        actuales = self._listar()
+        cambios = []
+
+        for ruta, stat in actuales.items():
+            anterior = self.manifiesto.get(ruta)
+            if anterior and anterior['tamano'] == stat.st_size and anterior['mtime'] == stat.st_mtime:
+                continue
+            if anterior is None:
+                cambios.append(('agregado', ruta, stat, None))
+                continue
+            hash_actual = hash_archivo(ruta)
+            if hash_actual == anterior['hash']:
+                anterior.update(tamano=stat.st_size, mtime=stat.st_mtime)
+            else:
+                cambios.append(('modificado', ruta, stat, hash_actual))
+
+        for ruta in set(self.manifiesto) - set(actuales):
+            cambios.append(('eliminado', ruta, None, None))
+        return cambios
+
+    def sincronizar(self):
+        """
+        Generador que emite un evento por cada archivo agregado, modificado o
+        eliminado desde la pasada anterior:
+            {'evento', 'ruta', 'hash', 'tipo', 'datos'}
+        Para agregados y modificados, 'datos' es el `datos_extraidos` (o None
+        si la lectura falló). El manifiesto se guarda al terminar la pasada.
+
+        Cada archivo se registra en el manifiesto recién cuando el consumidor
+        pide el evento siguiente: si la pasada se corta mientras procesa un
+        evento, ese archivo se vuelve a emitir en la pasada siguiente.
+        """
+        try:
+            for evento, ruta, stat, hash_actual in self.escanear():
+                if evento == 'eliminado':
+                    anterior = self.manifiesto[ruta]
+                    yield {'evento': evento, 'ruta': ruta, 'hash': anterior.get('hash'),
+                           'tipo': anterior.get('tipo'), 'datos': None}
+                    del self.manifiesto[ruta]
+                    continue
+
+                hash_actual = hash_actual or hash_archivo(ruta)
+                tipo, datos = leer_planilla(ruta, **self.opciones_lector)
+                yield {'evento': evento, 'ruta': ruta, 'hash': hash_actual,
+                       'tipo': tipo, 'datos': datos}
+                # Aunque falle la lectura se registra el hash, para no
+                # reintentar el mismo archivo en cada pasada
+                self.manifiesto[ruta] = {'tamano': stat.st_size, 'mtime': stat.st_mtime,
+                                         'hash': hash_actual, 'tipo': tipo,
+                                         'leido': datos is not None}
+        finally:
+            self._guardar_manifiesto()
+
+    def vigilar(self, intervalo_s=10.0, pasadas=None):
+        """
+        Repite `sincronizar` cada `intervalo_s` segundos y emite los eventos
+        como un flujo continuo. Con `pasadas` se limita la cantidad de vueltas.
+        """
+        n = 0
+        while pasadas is None or n < pasadas:
+            inicio = time.monotonic()
+            yield from self.sincronizar()
+            n += 1
+            if pasadas is None or n < pasadas:
+                time.sleep(max(0.0, intervalo_s - (time.monotonic() - inicio)))
@@ -0,0 +1,210 @@
+# ----------------------------
+# -------- UTILIDADES --------
+# ----------------------------
+
+import hashlib
+import importlib
+import logging
+import os
+import re
+import sys
+import threading
+import types
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+
+class ModuloPerezoso:
+    """
+    Módulo que se importa recién al usar uno de sus atributos (ej: pd.DataFrame).
+    Así `import pypbtdcev.lector` no carga pandas, numpy ni openpyxl hasta
+    que un lector realmente los necesita. Cada atributo usado queda guardado
+    en la instancia, de modo que los accesos siguientes no pasan por aquí.
+    """
+
+    def __init__(self, nombre):
+        self.__dict__['_nombre'] = nombre
+
+    def _cargar(self):
+        try:
+            modulo = importlib.import_module(self._nombre)
+        except ImportError as e:
+            raise ImportError(
+                f"Se necesita el paquete '{self._nombre}' para esta operación. "
+                f"Instálelo con: pip install {self._nombre}") from e
+        self.__dict__['_modulo'] = modulo
+        return modulo
+
+    def __getattr__(self, atributo):
+        modulo = self.__dict__.get('_modulo') or self._cargar()
+        valor = getattr(modulo, atributo)
+        self.__dict__[atributo] = valor
+        return valor
+
+    def __repr__(self):
+        estado = 'cargado' if '_modulo' in self.__dict__ else 'sin cargar'
+        return f"<ModuloPerezoso '{self._nombre}' ({estado})>"
+
+
+def modulo_perezoso(nombre):
+    """Devuelve el módulo si ya está importado, o un ModuloPerezoso si no."""
+    return sys.modules.get(nombre) or ModuloPerezoso(nombre)
+
+
+def congelar(valor):
+    """
+    Copia de solo lectura de una estructura anidada: los diccionarios pasan
+    a MappingProxyType y las listas a tuplas. Sirve para mapas de celdas que
+    se comparten entre instancias e hilos sin que nadie los modifique.
+    """
+    if isinstance(valor, dict):
+        return types.MappingProxyType({k: congelar(v) for k, v in valor.items()})
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    """Calcula el SHA-256 del contenido de un archivo, leyendo por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def id_vivienda(ruta):
+    """Identificador por defecto de una vivienda: el nombre del archivo sin extensión."""
+    return os.path.splitext(os.path.basename(ruta))[0]
+
+
+def nombres_de_hojas(ruta):
+    """
+    Lee los nombres de las hojas directamente desde 'xl/workbook.xml',
+    sin cargar el libro con pandas ni openpyxl.
+    """
+    with zipfile.ZipFile(ruta) as z:
+        xml = z.read('xl/workbook.xml').decode('utf-8', errors='replace')
+    return re.findall(r'<sheet\b[^>]*\bname="([^"]+)"', xml)
+
+
+def tipo_planilla(ruta):
+    """
+    Devuelve 'PBTD03' si el libro tiene las hojas 'Resumen' y 'Resultados',
+    'PBTD01' si tiene '3. Tablas Envolvente', o None si no se reconoce.
+    """
+    try:
+        hojas = {h.strip().lower() for h in nombres_de_hojas(ruta)}
+    except (zipfile.BadZipFile, KeyError, OSError):
+        return None
+    if 'resumen' in hojas and 'resultados' in hojas:
+        return 'PBTD03'
+    if '3. tablas envolvente' in hojas:
+        return 'PBTD01'
+    return None
+
+
+def leer_planilla(ruta, tipo=None, **opciones):
+    """
+    Lee una planilla con el lector que corresponde a su tipo (ver
+    lector.LectorPBTD; `opciones` son sus argumentos).
+    Devuelve (tipo, datos_extraidos); datos_extraidos es None si falla.
+    """
+    from .lector import LectorPBTD
+
+    tipo, datos, _, mensaje = LectorPBTD(**opciones).leer_con_error(ruta, tipo)
+    if tipo is None:
+        # Sin tipo el lector no llegó a abrir el libro, así que no informó nada
+        logger.warning(f"⚠️ ADVERTENCIA: {mensaje}")
+    return tipo, datos
+
+
+def tamano_en_bytes(objeto):
+    """
+    Estima los bytes que ocupa un objeto y todo lo que contiene (diccionarios,
+    listas, textos, arreglos NumPy). Los objetos compartidos se cuentan una vez.
+    """
+    vistos = set()
+    total = 0
+    pendientes = [objeto]
+    while pendientes:
+        o = pendientes.pop()
+        if id(o) in vistos:
+            continue
+        vistos.add(id(o))
+        nbytes = getattr(o, 'nbytes', None)
+        if isinstance(nbytes, int):
+            # Arreglos NumPy: las vistas no son dueñas de su memoria
+            total += sys.getsizeof(o) if getattr(o, 'base', None) is not None else nbytes
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            pendientes.extend(o.keys())
+            pendientes.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            pendientes.extend(o)
+        elif hasattr(type(o), '__slots__'):
+            pendientes.extend(getattr(o, c) for c in type(o).__slots__ if hasattr(o, c))
+    return total
+
+
+class PresupuestoMemoria:
+    """
+    Presupuesto de memoria compartido entre lecturas concurrentes (hilos).
+    `reservar(n)` bloquea hasta que haya `n` bytes disponibles. Una reserva
+    mayor que el límite se admite solo cuando no hay otras activas, para no
+    quedar bloqueada para siempre.
+
+        presupuesto = PresupuestoMemoria(2 * 1024**3)
+        with presupuesto.reserva(os.path.getsize(ruta) * 20) as r:
+            lector = LectorPBTD03_v2(ruta, modo_liviano=True)
+            r.ajustar(lector.bytes_estimados())
+            procesar(lector.datos_extraidos)
+    """
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.en_uso = 0
+        self._condicion = threading.Condition()
+
+    def reservar(self, n):
+        with self._condicion:
+            self._condicion.wait_for(
+                lambda: self.en_uso == 0 or self.en_uso + n <= self.limite_bytes)
+            self.en_uso += n
+        return n
+
+    def liberar(self, n):
+        with self._condicion:
+            self.en_uso = max(0, self.en_uso - n)
+            self._condicion.notify_all()
+
+    def ajustar(self, anterior, nuevo):
+        """
+        Cambia una reserva ya hecha por su tamaño real (sin bloquear).
+        Devuelve el nuevo tamaño, que es el que luego se debe liberar.
+        """
+        with self._condicion:
+            self.en_uso = max(0, self.en_uso - anterior + nuevo)
+            self._condicion.notify_all()
+        return nuevo
+
+    def reserva(self, n):
+        return _Reserva(self, n)
+
+
+class _Reserva:
+    def __init__(self, presupuesto, n):
+        self.presupuesto = presupuesto
+        self.n = n
+
+    def __enter__(self):
+        self.presupuesto.reservar(self.n)
+        return self
+
+    def ajustar(self, nuevo):
+        self.n = self.presupuesto.ajustar(self.n, nuevo)
+
+    def __exit__(self, *exc):
+        self.presupuesto.liberar(self.n)
@@ -0,0 +1,411 @@
+# ----------------------------
+# ------- VALIDACIONES -------
+# ----------------------------
+
+# Índice de las validaciones de datos de una plantilla (listas desplegables,
+# rangos numéricos y largos de texto). Se extrae una sola vez del libro y se
+# guarda como JSON; después los datos se revisan sin abrir la plantilla:
+#
+#   indice = indice_de_plantilla('plantilla_01.xlsm', ruta_cache='validaciones.json')
+#   fallas = EscritorPBTD01_v2().validar(datos, indice)
+#   EscritorPBTD01_v2().crear_nueva_planilla(plantilla, salida, datos, validaciones=indice)
+#
+# Igual que Excel, las listas no distinguen mayúsculas ni espacios en los
+# extremos. Las validaciones de fecha, hora o fórmula personalizada, y las
+# listas que no se pueden resolver (ej: nombres definidos en otro libro), no
+# se revisan y quedan en `sin_resolver`.
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+from .utilidades import hash_archivo, modulo_perezoso
+
+openpyxl = modulo_perezoso('openpyxl')
+
+logger = logging.getLogger(__name__)
+
+VERSION_INDICE = 1
+
+LISTA = 'lista'
+LISTA_DEPENDIENTE = 'lista_dependiente'
+ENTERO = 'entero'
+DECIMAL = 'decimal'
+LARGO = 'largo'
+
+_TIPOS_EXCEL = {'whole': ENTERO, 'decimal': DECIMAL, 'textLength': LARGO}
+
+_RANGO = re.compile(r"^\$?[A-Z]{1,3}\$?\d+(:\$?[A-Z]{1,3}\$?\d+)?$")
+_INDIRECTO = re.compile(r"^INDIRECT\(\s*\$?([A-Z]{1,3})\$?(\d+)\s*\)$", re.IGNORECASE)
+
+
+def _vacio(valor):
+    if valor is None:
+        return True
+    if isinstance(valor, float):
+        return math.isnan(valor)
+    return isinstance(valor, str) and not valor.strip()
+
+
+def _clave(valor):
+    """Forma comparable de un valor: números como float, textos sin espacios extremos ni mayúsculas."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    texto = str(valor).strip()
+    try:
+        return float(texto.replace(',', '.'))
+    except ValueError:
+        return texto.casefold()
+
+
+def _nombre_lista(valor):
+    """Nombre de lista al que apunta INDIRECT(celda): Excel no admite espacios en los nombres."""
+    return str(valor).strip().replace(' ', '_').casefold()
+
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _compara(operador, x, a, b):
+    if operador in (None, 'between'):
+        return a <= x <= b
+    if operador == 'notBetween':
+        return not a <= x <= b
+    return {
+        'equal': x == a, 'notEqual': x != a,
+        'greaterThan': x > a, 'lessThan': x < a,
+        'greaterThanOrEqual': x >= a, 'lessThanOrEqual': x <= a,
+    }.get(operador, True)
+
+
+# ---------------
+# --- Reglas ---
+# ---------------
+
+class Regla:
+    """
+    Validación de una o más celdas.
+    - `tipo`: LISTA, LISTA_DEPENDIENTE (INDIRECT de otra celda), ENTERO, DECIMAL o LARGO.
+    - `permitidos`: frozenset de valores (ver _clave) de una LISTA.
+    - `operador`, `minimo`, `maximo`: comparación de ENTERO, DECIMAL y LARGO
+      (operadores de Excel: 'between', 'greaterThan', ...).
+    - `depende_de`: celda cuyo valor es el nombre de la lista (LISTA_DEPENDIENTE).
+    - `origen`: descripción para los mensajes (ej: "lista 'Regiones'").
+    """
+    __slots__ = ('tipo', 'origen', 'permite_vacio', 'permitidos', 'operador', 'minimo',
+                 'maximo', 'depende_de')
+
+    def __init__(self, tipo, origen, permite_vacio=True, permitidos=None, operador=None,
+                 minimo=None, maximo=None, depende_de=None):
+        self.tipo = tipo
+        self.origen = origen
+        self.permite_vacio = permite_vacio
+        self.permitidos = permitidos
+        self.operador = operador
+        self.minimo = minimo
+        self.maximo = maximo
+        self.depende_de = depende_de
+
+    def admite(self, valor, celdas_hoja, listas):
+        """
+        True si `valor` cumple la regla. `celdas_hoja` son los valores que se
+        escriben en la misma hoja (para LISTA_DEPENDIENTE) y `listas` las
+        listas con nombre del índice.
+        """
+        if _vacio(valor):
+            return self.permite_vacio
+        if self.tipo == LISTA:
+            return _clave(valor) in self.permitidos
+        if self.tipo == LISTA_DEPENDIENTE:
+            nombre = celdas_hoja.get(self.depende_de)
+            permitidos = listas.get(_nombre_lista(nombre)) if not _vacio(nombre) else None
+            # Sin el valor de la celda de referencia (o su lista) no se puede decidir
+            return permitidos is None or _clave(valor) in permitidos
+        numero = float(len(str(valor))) if self.tipo == LARGO else _numero(valor)
+        if numero is None or (self.tipo == ENTERO and not numero.is_integer()):
+            return False
+        return _compara(self.operador, numero, self.minimo, self.maximo)
+
+    def a_dict(self):
+        registro = {c: getattr(self, c) for c in self.__slots__}
+        if self.permitidos is not None:
+            registro['permitidos'] = sorted(self.permitidos, key=lambda v: (isinstance(v, str), v))
+        return registro
+
+    @classmethod
+    def desde_dict(cls, registro):
+        registro = dict(registro)
+        if registro.get('permitidos') is not None:
+            registro['permitidos'] = frozenset(registro['permitidos'])
+        return cls(**registro)
+
+    def __repr__(self):
+        return f"Regla({self.tipo!r}, {self.origen!r})"
+
+
+class FallaValidacion:
+    """Valor que no cumple la validación de su celda."""
+    __slots__ = ('hoja', 'celda', 'valor', 'regla')
+
+    def __init__(self, hoja, celda, valor, regla):
+        self.hoja = hoja
+        self.celda = celda
+        self.valor = valor
+        self.regla = regla
+
+    def a_dict(self):
+        return {'hoja': self.hoja, 'celda': self.celda, 'valor': self.valor,
+                'regla': self.regla.origen}
+
+    def __str__(self):
+        return f"{self.hoja}!{self.celda} = {self.valor!r} no cumple {self.regla.origen}"
+
+    def __repr__(self):
+        return f"FallaValidacion({self.hoja!r}, {self.celda!r}, {self.valor!r}, {self.regla.origen!r})"
+
+
+# ----------------------------------
+# --- Extracción desde el libro ---
+# ----------------------------------
+
+def _valores_rango(ws, rango):
+    min_col, min_row, max_col, max_row = openpyxl.utils.cell.range_boundaries(rango.replace('$', ''))
+    return [v for fila in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col,
+                                       max_col=max_col, values_only=True)
+            for v in fila if not _vacio(v)]
+
+
+def _nombres_definidos(wb):
+    """{nombre en minúsculas: [(hoja, rango), ...]} de los nombres que apuntan a rangos."""
+    nombres = {}
+    ambitos = [wb.defined_names] + [ws.defined_names for ws in wb.worksheets]
+    for ambito in ambitos:
+        for nombre, definicion in ambito.items():
+            try:
+                destinos = list(definicion.destinations)
+            except Exception:
+                continue
+            if destinos:
+                nombres.setdefault(nombre.casefold(), destinos)
+    return nombres
+
+
+def _resolver(wb, hoja_actual, formula, nombres):
+    """Valores de una referencia ('$L$9:$N$9', 'Zona!A2:A20') o nombre definido; None si no se puede."""
+    texto = formula.strip().lstrip('=')
+    if '!' in texto:
+        hoja, rango = texto.rsplit('!', 1)
+        hoja = hoja.strip("'").replace("''", "'")
+    else:
+        hoja, rango = hoja_actual, texto
+    if _RANGO.match(rango.upper()):
+        return _valores_rango(wb[hoja], rango) if hoja in wb.sheetnames else None
+    destinos = nombres.get(texto.casefold())
+    if not destinos:
+        return None
+    valores = []
+    for hoja, rango in destinos:
+        if hoja not in wb.sheetnames:
+            return None
+        valores.extend(_valores_rango(wb[hoja], rango))
+    return valores
+
+
+def _limite(wb, hoja, formula, nombres):
+    if formula is None:
+        return None
+    numero = _numero(formula.lstrip('='))
+    if numero is not None:
+        return numero
+    valores = _resolver(wb, hoja, formula, nombres)
+    return _numero(valores[0]) if valores and len(valores) == 1 else None
+
+
+def _regla(wb, hoja, dv, nombres):
+    """Regla de una validación de openpyxl, o (None, motivo) si no se puede revisar."""
+    permite_vacio = bool(dv.allow_blank)
+    formula = (dv.formula1 or '').strip()
+    if dv.type == 'list':
+        if formula.startswith('"'):
+            valores = [v for v in formula.strip('"').split(',') if v.strip()]
+            return Regla(LISTA, f"lista {formula}", permite_vacio,
+                         permitidos=frozenset(_clave(v) for v in valores)), None
+        indirecto = _INDIRECTO.match(formula)
+        if indirecto:
+            return Regla(LISTA_DEPENDIENTE, f"lista {formula}", permite_vacio,
+                         depende_de=indirecto.group(1).upper() + indirecto.group(2)), None
+        valores = _resolver(wb, hoja, formula, nombres)
+        if valores is None:
+            return None, f"lista '{formula}' no encontrada en el libro"
+        if not valores:
+            # Ej: fórmulas sin valor calculado guardado; una lista vacía rechazaría todo
+            return None, f"lista '{formula}' sin valores"
+        return Regla(LISTA, f"lista '{formula}'", permite_vacio,
+                     permitidos=frozenset(_clave(v) for v in valores)), None
+    tipo = _TIPOS_EXCEL.get(dv.type)
+    if tipo is None:
+        return None, f"validación de tipo '{dv.type}' no se revisa"
+    minimo = _limite(wb, hoja, dv.formula1, nombres)
+    maximo = _limite(wb, hoja, dv.formula2, nombres)
+    operador = dv.operator or 'between'
+    if minimo is None or (operador in ('between', 'notBetween') and maximo is None):
+        return None, f"límites '{dv.formula1}'/'{dv.formula2}' no numéricos"
+    texto = f"{operador} {minimo:g}" + (f" y {maximo:g}" if maximo is not None else '')
+    return Regla(tipo, f"{tipo} {texto}", permite_vacio, operador=operador,
+                 minimo=minimo, maximo=maximo), None
+
+
+# --------------
+# --- Índice ---
+# --------------
+
+class IndiceValidaciones:
+    """
+    Reglas de validación por celda de una plantilla:
+    - `reglas`: {hoja: {celda: Regla}}; las celdas de un mismo rango comparten la Regla.
+    - `listas`: {nombre en minúsculas: frozenset} de los nombres definidos, para
+      las listas dependientes (INDIRECT).
+    - `sin_resolver`: validaciones del libro que no se revisan, con el motivo.
+    """
+
+    def __init__(self, reglas, listas=None, sin_resolver=(), plantilla=None, hash_plantilla=None):
+        self.reglas = reglas
+        self.listas = listas or {}
+        self.sin_resolver = list(sin_resolver)
+        self.plantilla = plantilla
+        self.hash_plantilla = hash_plantilla
+
+    def __len__(self):
+        return sum(len(celdas) for celdas in self.reglas.values())
+
+    def __repr__(self):
+        return (f"IndiceValidaciones({self.plantilla!r}, {len(self)} celdas, "
+                f"{len(self.sin_resolver)} sin resolver)")
+
+    @classmethod
+    def desde_plantilla(cls, ruta_plantilla):
+        """Extrae las validaciones abriendo el libro (una sola vez por plantilla)."""
+        logger.info(f"Extrayendo validaciones de '{ruta_plantilla}'...")
+        # data_only: las listas se leen con los valores calculados por Excel
+        wb = openpyxl.load_workbook(ruta_plantilla, data_only=True)
+        nombres = _nombres_definidos(wb)
+        reglas, sin_resolver = {}, []
+        for ws in wb.worksheets:
+            for dv in ws.data_validations.dataValidation:
+                regla, motivo = _regla(wb, ws.title, dv, nombres)
+                if regla is None:
+                    sin_resolver.append(f"{ws.title}!{dv.sqref}: {motivo}")
+                    continue
+                celdas = reglas.setdefault(ws.title, {})
+                for rango in dv.sqref.ranges:
+                    for fila in range(rango.min_row, rango.max_row + 1):
+                        for col in range(rango.min_col, rango.max_col + 1):
+                            celdas[f"{openpyxl.utils.get_column_letter(col)}{fila}"] = regla
+        listas = {}
+        for nombre in nombres:
+            valores = _resolver(wb, None, nombre, nombres)
+            if valores:
+                listas[nombre] = frozenset(_clave(v) for v in valores)
+        indice = cls(reglas, listas, sin_resolver, os.path.basename(ruta_plantilla),
+                     hash_archivo(ruta_plantilla))
+        logger.info(f" -> {len(indice)} celdas con validación, {len(sin_resolver)} sin resolver.")
+        return indice
+
+    def verificar_celdas(self, celdas):
+        """
+        Revisa {hoja: {celda: valor}} (ver EscritorPBTD01_v2.celdas_a_escribir).
+        Devuelve la lista de FallaValidacion, vacía si todo cumple.
+        """
+        fallas = []
+        for hoja, valores in celdas.items():
+            reglas = self.reglas.get(hoja)
+            if not reglas:
+                continue
+            for celda, valor in valores.items():
+                regla = reglas.get(celda)
+                if regla is not None and not regla.admite(valor, valores, self.listas):
+                    fallas.append(FallaValidacion(hoja, celda, valor, regla))
+        return fallas
+
+    # --- Persistencia ---
+
+    def a_dict(self):
+        ids, reglas, celdas = {}, [], {}
+        for hoja, por_celda in self.reglas.items():
+            for celda, regla in por_celda.items():
+                if id(regla) not in ids:
+                    ids[id(regla)] = len(reglas)
+                    reglas.append(regla.a_dict())
+                celdas.setdefault(hoja, {})[celda] = ids[id(regla)]
+        return {'version': VERSION_INDICE, 'plantilla': self.plantilla,
+                'hash': self.hash_plantilla, 'reglas': reglas, 'celdas': celdas,
+                'listas': {n: sorted(v, key=lambda x: (isinstance(x, str), x))
+                           for n, v in self.listas.items()},
+                'sin_resolver': self.sin_resolver}
+
+    @classmethod
+    def desde_dict(cls, registro):
+        if registro.get('version') != VERSION_INDICE:
+            raise ValueError(f"Versión de índice de validaciones no soportada: {registro.get('version')}")
+        reglas = [Regla.desde_dict(r) for r in registro['reglas']]
+        return cls({hoja: {celda: reglas[i] for celda, i in por_celda.items()}
+                    for hoja, por_celda in registro['celdas'].items()},
+                   {n: frozenset(v) for n, v in registro['listas'].items()},
+                   registro['sin_resolver'], registro['plantilla'], registro['hash'])
+
+    def guardar(self, ruta):
+        """Escribe el índice como JSON (reemplazo atómico)."""
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return cls.desde_dict(json.load(f))
+
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def indice_de_plantilla(ruta_plantilla, ruta_cache=None):
+    """
+    Índice de validaciones de una plantilla, extraído una vez por proceso.
+    Con `ruta_cache`, se guarda en ese JSON y se reutiliza mientras el hash
+    de la plantilla no cambie, así otros procesos no abren el libro.
+    """
+    stat = os.stat(ruta_plantilla)
+    clave = (os.path.abspath(ruta_plantilla), stat.st_mtime, stat.st_size)
+    with _lock:
+        indice = _indices.get(clave)
+    if indice is not None:
+        return indice
+
+    if ruta_cache and os.path.exists(ruta_cache):
+        try:
+            indice = IndiceValidaciones.cargar(ruta_cache)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ ADVERTENCIA: No se pudo leer '{ruta_cache}' ({e}); se vuelve a extraer.")
+            indice = None
+        if indice is not None and indice.hash_plantilla != hash_archivo(ruta_plantilla):
+            indice = None
+    if indice is None:
+        indice = IndiceValidaciones.desde_plantilla(ruta_plantilla)
+        if ruta_cache:
+            indice.guardar(ruta_cache)
+    with _lock:
+        _indices[clave] = indice
+    return indice